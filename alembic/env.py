@@ -1,4 +1,5 @@
 import asyncio
+import re
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
@@ -7,15 +8,16 @@ import os
 from alembic import context
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
+from app.core.config import DATABASE_URL
 from app.models import (
     Base,
-    ClassCollector,
-    ClassStudent,
-    CollectionNews,
-    CollectionPart,
-    Collection,
-    SchoolClass,
-    StudentCollection,
+    Account,
+    CollectionAccount,
+    CollectionAccountSlot,
+    Transaction,
+    StudentCollectionTotal,
+    IdempotencyKey,
+    OutboxEvent,
 )
 
 # this is the Alembic Config object, which provides
@@ -27,9 +29,6 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-DATABASE_URL = os.getenv(
-    "DATABASE_URL", "postgresql+asyncpg://user:password@sm_class_db/sm_class_db"
-)
 config.set_main_option("sqlalchemy.url", DATABASE_URL)
 
 
@@ -39,6 +38,17 @@ config.set_main_option("sqlalchemy.url", DATABASE_URL)
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+# Monthly partitions of transactions (attached or detached) are managed by
+# TransactionPartitionService, not by autogenerate
+PARTITION_TABLE = re.compile(r"^transactions_(p\d{4}_\d{2}|default)$")
+
+
+def include_name(name, type_, parent_names):
+    if type_ == "table":
+        return not PARTITION_TABLE.match(name)
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -61,6 +71,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -88,7 +99,11 @@ async def run_migrations_online() -> None:
 
 
 def do_run_migrations(connection):
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+    )
     with context.begin_transaction():
         context.run_migrations()
 
@@ -0,0 +1,174 @@
+"""partition transactions by month
+
+Revision ID: 40d4fafb1adf
+Revises: 73ab62d6279b
+Create Date: 2026-10-17 18:07:10.872228
+
+Rebuilds transactions as a table range-partitioned on timestamp with one
+partition per UTC month (transactions_pYYYY_MM) plus a default partition.
+The primary key becomes (id, timestamp) and external_transaction_id loses
+its UNIQUE constraint, as unique indexes on a partitioned table must
+contain the partition key. Rows are copied in one transaction, so writes
+to transactions are blocked while the migration runs.
+"""
+
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "40d4fafb1adf"
+down_revision: Union[str, None] = "73ab62d6279b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+COLUMNS = (
+    "id, account_id, type, status, amount, timestamp, description, "
+    "collection_id, student_id, external_transaction_id"
+)
+
+
+def _columns(timestamp_nullable: bool) -> list:
+    return [
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("account_id", sa.UUID(), nullable=False),
+        sa.Column(
+            "type",
+            postgresql.ENUM(name="transactiontype", create_type=False),
+            nullable=False,
+        ),
+        sa.Column(
+            "status",
+            postgresql.ENUM(name="transactionstatus", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("amount", sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column(
+            "timestamp",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=timestamp_nullable,
+        ),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("collection_id", sa.String(), nullable=True),
+        sa.Column("student_id", sa.String(), nullable=True),
+        sa.Column("external_transaction_id", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["account_id"], ["accounts.id"], name="transactions_account_id_fkey"
+        ),
+    ]
+
+
+def _add_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _create_indexes(external_id_unique: bool) -> None:
+    op.create_index(
+        op.f("ix_transactions_collection_id"),
+        "transactions",
+        ["collection_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_transactions_external_transaction_id"),
+        "transactions",
+        ["external_transaction_id"],
+        unique=external_id_unique,
+    )
+    op.create_index(
+        op.f("ix_transactions_student_id"), "transactions", ["student_id"], unique=False
+    )
+    op.create_index(
+        "ix_transactions_account_id_timestamp_id",
+        "transactions",
+        ["account_id", sa.text("timestamp DESC"), sa.text("id DESC")],
+        unique=False,
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    op.execute("SET LOCAL statement_timeout = 0")
+    op.execute("LOCK TABLE transactions IN EXCLUSIVE MODE")
+    op.execute("ALTER TABLE transactions RENAME TO transactions_unpartitioned")
+    op.execute(
+        "ALTER TABLE transactions_unpartitioned RENAME CONSTRAINT transactions_pkey TO transactions_unpartitioned_pkey"
+    )
+    for index in (
+        "ix_transactions_collection_id",
+        "ix_transactions_external_transaction_id",
+        "ix_transactions_student_id",
+        "ix_transactions_account_id_timestamp_id",
+    ):
+        op.drop_index(index, table_name="transactions_unpartitioned")
+
+    op.create_table(
+        "transactions",
+        *_columns(timestamp_nullable=False),
+        sa.PrimaryKeyConstraint("id", "timestamp"),
+        postgresql_partition_by="RANGE (timestamp)",
+    )
+
+    now = datetime.now(timezone.utc)
+    oldest = (
+        bind.scalar(sa.text("SELECT min(timestamp) FROM transactions_unpartitioned"))
+        or now
+    )
+    month = date(
+        oldest.astimezone(timezone.utc).year, oldest.astimezone(timezone.utc).month, 1
+    )
+    last = date(now.year, now.month, 1)
+    for _ in range(MONTHS_AHEAD):
+        last = _add_month(last)
+    while month <= last:
+        upper = _add_month(month)
+        op.execute(
+            f"CREATE TABLE transactions_p{month:%Y_%m} PARTITION OF transactions "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+        )
+        month = upper
+    op.execute("CREATE TABLE transactions_default PARTITION OF transactions DEFAULT")
+
+    # Rows without a timestamp (the column was nullable) get the migration time
+    op.execute(
+        f"INSERT INTO transactions ({COLUMNS}) "
+        f"SELECT {COLUMNS.replace('timestamp', 'COALESCE(timestamp, now())')} FROM transactions_unpartitioned"
+    )
+    op.drop_table("transactions_unpartitioned")
+    # Built after the copy, which is much faster than maintaining them row by row
+    _create_indexes(external_id_unique=False)
+    op.execute("ANALYZE transactions")
+
+
+def downgrade() -> None:
+    op.execute("SET LOCAL statement_timeout = 0")
+    op.execute("LOCK TABLE transactions IN EXCLUSIVE MODE")
+    op.execute("ALTER TABLE transactions RENAME TO transactions_partitioned")
+    op.execute(
+        "ALTER TABLE transactions_partitioned RENAME CONSTRAINT transactions_pkey TO transactions_partitioned_pkey"
+    )
+    for index in (
+        "ix_transactions_collection_id",
+        "ix_transactions_external_transaction_id",
+        "ix_transactions_student_id",
+        "ix_transactions_account_id_timestamp_id",
+    ):
+        op.drop_index(index, table_name="transactions_partitioned")
+
+    op.create_table(
+        "transactions",
+        *_columns(timestamp_nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(
+        f"INSERT INTO transactions ({COLUMNS}) SELECT {COLUMNS} FROM transactions_partitioned"
+    )
+    # Drops the attached partitions too; previously detached ones are kept
+    op.drop_table("transactions_partitioned")
+    _create_indexes(external_id_unique=True)
+    op.execute("ANALYZE transactions")
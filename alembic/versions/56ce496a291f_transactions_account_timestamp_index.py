@@ -0,0 +1,29 @@
+"""transactions account timestamp index
+
+Revision ID: 56ce496a291f
+Revises: 441b8876ae70
+Create Date: 2026-10-17 17:42:26.935256
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '56ce496a291f'
+down_revision: Union[str, None] = '441b8876ae70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY so the build doesn't block writes to transactions
+    with op.get_context().autocommit_block():
+        op.create_index('ix_transactions_account_id_timestamp_id', 'transactions', ['account_id', sa.text('timestamp DESC'), sa.text('id DESC')], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_transactions_account_id_timestamp_id', table_name='transactions', postgresql_concurrently=True)
@@ -1,3 +1,4 @@
+from .bulk import BulkIndexer
 from .index import init_indices
 from .instance import get_es_instance
 from .utils import wait_for_elasticsearch
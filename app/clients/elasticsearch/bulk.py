@@ -0,0 +1,99 @@
+import asyncio
+
+from elasticsearch.helpers import async_bulk
+
+from app.core.config import ES_BULK_CHUNK_SIZE, ES_BULK_FLUSH_INTERVAL
+from app.core.metrics import OUTBOUND_REQUEST_DURATION, observe
+
+
+class BulkIndexer:
+    """
+    Buffers index actions and sends them with one bulk request when
+    chunk_size actions are queued or, once started, every flush_interval
+    seconds. Each add() returns a future resolving to None on success or the
+    bulk error for that document, so callers can acknowledge per document.
+
+    Actions added with a version use external versioning: Elasticsearch keeps
+    the document only if the version is higher than the indexed one. A stale
+    action is rejected with 409, which counts as success, since a newer
+    version of the document is already indexed.
+    """
+
+    def __init__(
+        self,
+        es_client,
+        chunk_size: int = ES_BULK_CHUNK_SIZE,
+        flush_interval: float = ES_BULK_FLUSH_INTERVAL,
+    ):
+        self.es = es_client
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._task: asyncio.Task | None = None
+        self.indexed = 0
+        self.failed = 0
+
+    async def add(
+        self, index: str, doc_id: str, source: dict, version: int | None = None
+    ) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        action = {"_index": index, "_id": doc_id, "_source": source}
+        if version is not None:
+            action["version"] = version
+            action["version_type"] = "external"
+        self._pending.append((action, future))
+        if len(self._pending) >= self.chunk_size:
+            await self.flush()
+        return future
+
+    async def flush(self) -> None:
+        # Swap the buffer first so adds made during the request go to the next one
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            with observe(
+                OUTBOUND_REQUEST_DURATION, target="elasticsearch", operation="bulk"
+            ):
+                _, errors = await async_bulk(
+                    self.es,
+                    [action for action, _ in batch],
+                    chunk_size=self.chunk_size,
+                    raise_on_error=False,
+                    raise_on_exception=False,
+                )
+            failed = {
+                str(item["_id"]): item
+                for error in errors
+                for item in error.values()
+                if item.get("status") != 409
+            }
+        except Exception as e:
+            failed = {str(action["_id"]): {"error": str(e)} for action, _ in batch}
+
+        for action, future in batch:
+            error = failed.get(str(action["_id"]))
+            if not future.done():
+                future.set_result(error)
+            if error is None:
+                self.indexed += 1
+            else:
+                self.failed += 1
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Bulk indexer flush failed: {e}")
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._flush_periodically())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
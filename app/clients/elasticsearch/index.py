@@ -1,11 +1,45 @@
+from datetime import datetime, timezone
+
+from app.core.config import TRANSACTIONS_INDEX
+from app.core.metrics import OUTBOUND_REQUEST_DURATION, observe
+
+TRANSACTION_INDEX_BODY = {
+    "settings": {
+        "number_of_shards": 1,
+        "number_of_replicas": 0,
+    },
+    "mappings": {
+        # Columns added to transactions later are stored but not indexed
+        "dynamic": False,
+        "properties": {
+            "id": {"type": "keyword"},
+            "account_id": {"type": "keyword"},
+            "user_id": {"type": "keyword"},
+            "type": {"type": "keyword"},
+            "status": {"type": "keyword"},
+            "amount": {"type": "scaled_float", "scaling_factor": 100},
+            "description": {"type": "text"},
+            "collection_id": {"type": "keyword"},
+            "student_id": {"type": "keyword"},
+            "external_transaction_id": {"type": "keyword"},
+            "timestamp": {"type": "date"},
+        },
+    },
+}
+
+
 async def init_indices(es_client):
     await init_user_index(es_client)
+    await init_transaction_index(es_client)
     return True
 
 
 async def create_index_if_not_exists(es_client, index_name, index_body):
-    if not await es_client.indices.exists(index=index_name):
-        await es_client.indices.create(index=index_name, body=index_body)
+    with observe(
+        OUTBOUND_REQUEST_DURATION, target="elasticsearch", operation="create_index"
+    ):
+        if not await es_client.indices.exists(index=index_name):
+            await es_client.indices.create(index=index_name, body=index_body)
 
 
 async def init_user_index(es_client):
@@ -28,8 +62,30 @@ async def init_user_index(es_client):
 
 
 async def index_user(es_client, user_id: str, username: str, about_me: str):
-    await es_client.index(
-        index="users",
-        id=user_id,
-        body={"id": user_id, "username": username, "about_me": about_me},
-    )
+    with observe(OUTBOUND_REQUEST_DURATION, target="elasticsearch", operation="index"):
+        await es_client.index(
+            index="users",
+            id=user_id,
+            body={"id": user_id, "username": username, "about_me": about_me},
+        )
+
+
+def new_transaction_index_name() -> str:
+    return f"{TRANSACTIONS_INDEX}-{datetime.now(timezone.utc):%Y%m%d%H%M%S}"
+
+
+async def init_transaction_index(es_client):
+    """
+    Creates the first concrete transactions index behind the alias. Reads and
+    writes always go through the alias, so a reindex can swap it atomically.
+    """
+    with observe(
+        OUTBOUND_REQUEST_DURATION, target="elasticsearch", operation="create_index"
+    ):
+        if await es_client.indices.exists_alias(name=TRANSACTIONS_INDEX):
+            return True
+        await es_client.indices.create(
+            index=new_transaction_index_name(),
+            body={**TRANSACTION_INDEX_BODY, "aliases": {TRANSACTIONS_INDEX: {}}},
+        )
+    return True
@@ -1,7 +1,11 @@
+from functools import lru_cache
+
 from elasticsearch import AsyncElasticsearch
 
 from app.core.config import ELASTICSEARCH_HOST
 
 
+@lru_cache(maxsize=1)
 def get_es_instance():
+    """Shared client, so the app, routers and workers use one connection pool."""
     return AsyncElasticsearch(hosts=[ELASTICSEARCH_HOST])
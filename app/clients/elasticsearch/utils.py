@@ -1,11 +1,16 @@
 import asyncio
 
+from app.core.metrics import OUTBOUND_REQUEST_DURATION, observe
+
 
 async def wait_for_elasticsearch(es_client, timeout: int = 60):
     for _ in range(timeout):
         try:
-            if await es_client.ping():
-                return True
+            with observe(
+                OUTBOUND_REQUEST_DURATION, target="elasticsearch", operation="ping"
+            ):
+                if await es_client.ping():
+                    return True
         except Exception:
             pass
         await asyncio.sleep(1)
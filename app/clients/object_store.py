@@ -0,0 +1,122 @@
+import asyncio
+import io
+import os
+from functools import lru_cache
+from typing import Protocol
+
+from minio import Minio
+from minio.error import S3Error
+
+from app.core.config import (
+    ARCHIVE_STORAGE,
+    ARCHIVE_BUCKET,
+    ARCHIVE_LOCAL_PATH,
+    MINIO_ENDPOINT,
+    MINIO_ACCESS_KEY,
+    MINIO_SECRET_KEY,
+    MINIO_SECURE,
+)
+
+
+class ObjectNotFound(Exception):
+    pass
+
+
+class ObjectStore(Protocol):
+    """Minimal blob storage used by the transaction archive."""
+
+    async def put(self, key: str, data: bytes) -> None: ...
+
+    async def get(self, key: str, offset: int = 0, length: int | None = None) -> bytes:
+        """Reads the whole object, or `length` bytes starting at `offset`."""
+        ...
+
+
+class LocalObjectStore:
+    """Objects as files under a directory; for tests and single-node setups."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def _put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Readers never see a half-written object
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _get(self, key: str, offset: int, length: int | None) -> bytes:
+        try:
+            with open(self._path(key), "rb") as f:
+                f.seek(offset)
+                return f.read() if length is None else f.read(length)
+        except FileNotFoundError:
+            raise ObjectNotFound(key)
+
+    async def put(self, key: str, data: bytes) -> None:
+        await asyncio.to_thread(self._put, key, data)
+
+    async def get(self, key: str, offset: int = 0, length: int | None = None) -> bytes:
+        return await asyncio.to_thread(self._get, key, offset, length)
+
+
+class MinioObjectStore:
+    """Objects in a MinIO (S3) bucket; the blocking client runs in threads."""
+
+    def __init__(self, client: Minio, bucket: str):
+        self.client = client
+        self.bucket = bucket
+        self._bucket_checked = False
+
+    def _ensure_bucket(self) -> None:
+        if self._bucket_checked:
+            return
+        if not self.client.bucket_exists(self.bucket):
+            self.client.make_bucket(self.bucket)
+        self._bucket_checked = True
+
+    def _put(self, key: str, data: bytes) -> None:
+        self._ensure_bucket()
+        self.client.put_object(self.bucket, key, io.BytesIO(data), len(data))
+
+    def _get(self, key: str, offset: int, length: int | None) -> bytes:
+        try:
+            response = self.client.get_object(
+                self.bucket, key, offset=offset, length=length or 0
+            )
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                raise ObjectNotFound(key)
+            raise
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    async def put(self, key: str, data: bytes) -> None:
+        await asyncio.to_thread(self._put, key, data)
+
+    async def get(self, key: str, offset: int = 0, length: int | None = None) -> bytes:
+        return await asyncio.to_thread(self._get, key, offset, length)
+
+
+@lru_cache(maxsize=1)
+def get_archive_store() -> ObjectStore:
+    """Store for archived transaction segments, chosen by ARCHIVE_STORAGE."""
+    if ARCHIVE_STORAGE == "minio":
+        client = Minio(
+            MINIO_ENDPOINT,
+            access_key=MINIO_ACCESS_KEY,
+            secret_key=MINIO_SECRET_KEY,
+            secure=MINIO_SECURE,
+        )
+        return MinioObjectStore(client, ARCHIVE_BUCKET)
+    if ARCHIVE_STORAGE == "local":
+        return LocalObjectStore(ARCHIVE_LOCAL_PATH)
+    raise ValueError(f"Unknown ARCHIVE_STORAGE: {ARCHIVE_STORAGE}")
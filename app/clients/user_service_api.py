@@ -1,36 +1,137 @@
+import asyncio
+import time
+from collections import OrderedDict
+
 import httpx
 from fastapi import HTTPException, status, Request
 from app.core.config import (
     USER_SERVICE_HOST,
+    USER_SERVICE_TIMEOUT,
+    USER_SERVICE_CONNECT_TIMEOUT,
+    USER_SERVICE_MAX_CONNECTIONS,
+    USER_SERVICE_MAX_KEEPALIVE,
+    USER_SERVICE_CHILDREN_CACHE_TTL,
+    USER_SERVICE_CHILDREN_CACHE_SIZE,
+    USER_SERVICE_BREAKER_FAILURES,
+    USER_SERVICE_BREAKER_RESET_SECONDS,
 )
+from app.core.metrics import OUTBOUND_REQUEST_DURATION, observe
 
 
-async def get_children_for_parent(parent_id: str, request: Request) -> list[str]:
+class CircuitBreaker:
     """
-    Calls the UserService to get a list of child IDs for the given parent.
-    Propagates the Authorization header.
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    until `reset_timeout` has passed; then lets a single trial call through.
     """
-    auth_header = request.headers.get("Authorization")
-    if not auth_header:
-        # To nie powinno się zdarzyć, jeśli endpoint jest chroniony CurrentUserDep
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authorization header missing",
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_progress = False
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        if self._trial_in_progress:
+            return False
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._trial_in_progress = True
+            return True
+        return False
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_progress = False
+
+    def record_failure(self):
+        self._failures += 1
+        self._trial_in_progress = False
+        if self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Ends a trial call without an outcome (e.g. it was cancelled)."""
+        self._trial_in_progress = False
+
+
+class UserServiceClient:
+    """
+    Shared client for the UserService: one keep-alive connection pool, a
+    per-parent TTL cache of child IDs, single-flight coalescing of concurrent
+    lookups for the same parent and a circuit breaker for fast failures.
+    """
+
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+        self._children_cache: OrderedDict[str, tuple[float, list[str]]] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self._breaker = CircuitBreaker(
+            USER_SERVICE_BREAKER_FAILURES, USER_SERVICE_BREAKER_RESET_SECONDS
         )
 
-    headers = {"Authorization": auth_header}
-    url = f"{USER_SERVICE_HOST}/api/v1/users/current/children"  # Dostosuj URL do twojego UserService
+    def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=USER_SERVICE_HOST,
+                limits=httpx.Limits(
+                    max_connections=USER_SERVICE_MAX_CONNECTIONS,
+                    max_keepalive_connections=USER_SERVICE_MAX_KEEPALIVE,
+                ),
+                timeout=httpx.Timeout(
+                    USER_SERVICE_TIMEOUT, connect=USER_SERVICE_CONNECT_TIMEOUT
+                ),
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_children(self, parent_id: str, auth_header: str) -> list[str]:
+        cached = self._children_cache.get(parent_id)
+        if cached is not None:
+            expires_at, child_ids = cached
+            if expires_at > time.monotonic():
+                return child_ids
+            del self._children_cache[parent_id]
+
+        # Concurrent requests for the same parent share one upstream call
+        task = self._in_flight.get(parent_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch_children(parent_id, auth_header))
+            self._in_flight[parent_id] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(parent_id, None))
+        return await asyncio.shield(task)
+
+    async def _fetch_children(self, parent_id: str, auth_header: str) -> list[str]:
+        if not self._breaker.allow():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="User Service is unavailable, try again later",
+            )
+        self.start()
+
+        headers = {"Authorization": auth_header}
+        url = "/api/v1/users/current/children"  # Dostosuj URL do twojego UserService
 
-    async with httpx.AsyncClient() as client:
         try:
-            response = await client.get(url, headers=headers)
+            with observe(
+                OUTBOUND_REQUEST_DURATION, target="user_service", operation="children"
+            ):
+                response = await self._client.get(url, headers=headers)
             response.raise_for_status()  # Rzuci wyjątek dla 4xx/5xx
             children_data = (
                 response.json()
             )  # Oczekuje listy obiektów child z polem 'id'
             child_ids = [child.get("id") for child in children_data if child.get("id")]
-            return child_ids
         except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                self._breaker.record_failure()
+            else:
+                self._breaker.record_success()
             # Przekaż błąd z UserService lub zwróć własny
             detail = (
                 f"Error fetching children from User Service: {e.response.status_code}"
@@ -44,13 +145,48 @@ async def get_children_for_parent(parent_id: str, request: Request) -> list[str]
             ) from e
 
         except httpx.RequestError as e:
+            self._breaker.record_failure()
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail=f"Could not connect to User Service: {e}",
             ) from e
 
         except Exception as e:  # Ogólny błąd
+            self._breaker.record_failure()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"An error occurred while communicating with User Service: {str(e)}",
             ) from e
+
+        except BaseException:
+            # Cancelled: no outcome, but a trial call must not stay pending
+            self._breaker.release_trial()
+            raise
+
+        self._breaker.record_success()
+        self._children_cache[parent_id] = (
+            time.monotonic() + USER_SERVICE_CHILDREN_CACHE_TTL,
+            child_ids,
+        )
+        while len(self._children_cache) > USER_SERVICE_CHILDREN_CACHE_SIZE:
+            self._children_cache.popitem(last=False)
+        return child_ids
+
+
+user_service_client = UserServiceClient()
+
+
+async def get_children_for_parent(parent_id: str, request: Request) -> list[str]:
+    """
+    Calls the UserService to get a list of child IDs for the given parent.
+    Propagates the Authorization header.
+    """
+    auth_header = request.headers.get("Authorization")
+    if not auth_header:
+        # To nie powinno się zdarzyć, jeśli endpoint jest chroniony CurrentUserDep
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authorization header missing",
+        )
+
+    return await user_service_client.get_children(parent_id, auth_header)
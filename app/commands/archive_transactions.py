@@ -0,0 +1,62 @@
+"""
+Moves closed months of transactions to cold storage (see ARCHIVE_STORAGE).
+
+    python -m app.commands.archive_transactions --before 2024-09
+    python -m app.commands.archive_transactions list
+
+Without --before, months older than TRANSACTION_ARCHIVE_AFTER_MONTHS are
+archived.
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import date, datetime, timezone
+
+from app.core.config import TRANSACTION_ARCHIVE_AFTER_MONTHS
+from app.core.database import init_db, close_db, get_sessionmaker
+from app.services.partition_service import add_months, month_start
+from app.services.transaction_archive_service import transaction_archive_service
+
+
+async def run(args) -> int:
+    init_db()
+    try:
+        if args.action == "list":
+            async with get_sessionmaker()() as db:
+                for segment in await transaction_archive_service.get_segments(db):
+                    print(
+                        f"{segment.month:%Y-%m} {segment.row_count} rows "
+                        f"{segment.size_bytes} bytes {segment.object_key}"
+                    )
+            return 0
+
+        if args.before:
+            year, month = map(int, args.before.split("-"))
+            before = date(year, month, 1)
+        elif TRANSACTION_ARCHIVE_AFTER_MONTHS > 0:
+            before = add_months(
+                month_start(datetime.now(timezone.utc).date()),
+                -TRANSACTION_ARCHIVE_AFTER_MONTHS,
+            )
+        else:
+            print("Pass --before or set TRANSACTION_ARCHIVE_AFTER_MONTHS")
+            return 1
+        archived = await transaction_archive_service.archive_before(before)
+        print(f"archived: {', '.join(f'{m:%Y-%m}' for m in archived) or 'nothing'}")
+        return 0
+    finally:
+        await close_db()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "action", nargs="?", choices=["archive", "list"], default="archive"
+    )
+    parser.add_argument("--before", help="YYYY-MM; archive months before it")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
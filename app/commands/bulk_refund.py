@@ -0,0 +1,73 @@
+"""
+Refunds every payer of a collection and waits until the job is done.
+
+    python -m app.commands.bulk_refund COLLECTION_ID [--description TEXT]
+    python -m app.commands.bulk_refund --job 42
+
+An unfinished job of the collection (e.g. interrupted by a crash) is resumed
+from its checkpoint instead of starting a new one. Exits with status 2 if the
+job failed.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from fastapi import HTTPException
+
+from app.core.database import init_db, close_db, get_sessionmaker
+from app.models.bulk_refund import BulkRefundStatus
+from app.services.bulk_refund_service import bulk_refund_service
+
+
+async def run(args) -> int:
+    init_db()
+    try:
+        if args.job is not None:
+            job_id = args.job
+        else:
+            async with get_sessionmaker()() as db:
+                job, created = await bulk_refund_service.create_job(
+                    db,
+                    collection_id=args.collection_id,
+                    description=args.description,
+                    chunk_size=args.chunk_size,
+                )
+                await db.commit()
+            print(f"{'Created' if created else 'Resuming'} bulk refund job {job.id}")
+            job_id = job.id
+
+        try:
+            job = await bulk_refund_service.run_job(job_id)
+        except HTTPException as e:
+            print(f"Bulk refund job {job_id} failed: {e.detail}")
+            return 2
+        async with get_sessionmaker()() as db:
+            job = await bulk_refund_service.get_job(db, job_id)
+        if job is None:
+            print(f"Bulk refund job {job_id} not found")
+            return 1
+        print(
+            f"Job {job.id} {job.status.value}: {job.refunded_items}/"
+            f"{job.total_items} accounts, {job.refunded_amount}/{job.total_amount}"
+            + (f" ({job.error})" if job.error else "")
+        )
+        return 2 if job.status == BulkRefundStatus.FAILED else 0
+    finally:
+        await close_db()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("collection_id", nargs="?")
+    parser.add_argument("--job", type=int, help="run or resume this job")
+    parser.add_argument("--description", help="description of the refunds")
+    parser.add_argument("--chunk-size", type=int, help="accounts per chunk")
+    args = parser.parse_args()
+    if args.job is None and args.collection_id is None:
+        parser.error("pass COLLECTION_ID or --job")
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
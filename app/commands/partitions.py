@@ -0,0 +1,60 @@
+"""
+Maintains the monthly partitions of the transactions table.
+
+    python -m app.commands.partitions list
+    python -m app.commands.partitions ensure [--months-ahead 3]
+    python -m app.commands.partitions detach --before 2025-01
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import date
+
+from app.core.config import TRANSACTION_PARTITIONS_AHEAD
+from app.core.database import init_db, close_db, get_sessionmaker
+from app.services.partition_service import (
+    partition_name,
+    transaction_partition_service,
+)
+
+
+async def run(args) -> int:
+    init_db()
+    try:
+        async with get_sessionmaker()() as db:
+            if args.action == "list":
+                for month in await transaction_partition_service.list_partitions(db):
+                    print(partition_name(month))
+                return 0
+            if args.action == "ensure":
+                changed = await transaction_partition_service.ensure_partitions(
+                    db, months_ahead=args.months_ahead
+                )
+            else:
+                year, month = map(int, args.before.split("-"))
+                changed = await transaction_partition_service.detach_partitions_before(
+                    db, date(year, month, 1)
+                )
+            await db.commit()
+            print(f"{args.action}: {', '.join(changed) or 'nothing to do'}")
+            return 0
+    finally:
+        await close_db()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("action", choices=["list", "ensure", "detach"])
+    parser.add_argument(
+        "--months-ahead", type=int, default=TRANSACTION_PARTITIONS_AHEAD
+    )
+    parser.add_argument("--before", help="YYYY-MM; detach months before it")
+    args = parser.parse_args()
+    if args.action == "detach" and not args.before:
+        parser.error("detach requires --before")
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
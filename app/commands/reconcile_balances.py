@@ -0,0 +1,50 @@
+"""
+Checks account and collection balances against their transactions.
+
+    python -m app.commands.reconcile_balances [--full]
+
+Without --full only the transactions since the last snapshot are read.
+Exits with status 2 if any balance does not match.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.core.database import init_db, close_db
+from app.services.reconciliation_service import reconciliation_service
+
+
+async def run(full: bool) -> int:
+    init_db()
+    try:
+        report = await reconciliation_service.reconcile(full=full)
+    finally:
+        await close_db()
+    for mismatch in report.mismatches:
+        print(
+            f"MISMATCH {mismatch.kind} {mismatch.key}: stored "
+            f"{mismatch.stored_balance}, expected {mismatch.expected_balance} "
+            f"(difference {mismatch.difference})"
+        )
+    print(
+        f"Checked {report.transactions_checked} transactions since "
+        f"{report.base_checkpoint or 'the beginning'}, "
+        f"{report.accounts_checked} accounts, {report.collections_checked} "
+        f"collections in {report.duration_seconds}s: "
+        f"{report.mismatch_count} mismatches. Snapshot {report.snapshot_id} "
+        f"at {report.checkpoint}"
+    )
+    return 2 if report.mismatch_count else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--full", action="store_true", help="ignore snapshots, read everything"
+    )
+    sys.exit(asyncio.run(run(parser.parse_args().full)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Rebuilds the transactions search index from Postgres without downtime.
+
+    python -m app.commands.reindex_transactions
+
+Streams every transaction into a new concrete index, swaps the alias to it,
+indexes transactions written while the copy was running and drops the old
+indices. The old index keeps serving searches until the swap.
+
+Documents are written with the highest outbox event id seen by the copy's
+snapshot as their version, so outbox events the copy already reflects cannot
+overwrite it, while later ones replace it.
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import timedelta
+
+from sqlalchemy import String, cast, func
+from sqlalchemy.future import select
+
+from app.clients.elasticsearch import BulkIndexer, get_es_instance
+from app.clients.elasticsearch.index import (
+    TRANSACTION_INDEX_BODY,
+    new_transaction_index_name,
+)
+from app.core.config import TRANSACTIONS_INDEX
+from app.core.database import init_db, close_db, get_sessionmaker
+from app.models.account import Account
+from app.models.outbox import OutboxEvent
+from app.models.transaction import Transaction
+from app.services.outbox_service import transaction_document
+
+STREAM_BATCH_SIZE = 5000
+# Writes committed shortly before the snapshot may carry an earlier timestamp
+CATCH_UP_MARGIN = timedelta(minutes=5)
+
+
+async def copy_transactions(indexer: BulkIndexer, index: str, since=None) -> int:
+    stmt = select(cast(Transaction.id, String), transaction_document()).join(
+        Account, Account.id == Transaction.account_id
+    )
+    if since is not None:
+        stmt = stmt.where(Transaction.timestamp >= since)
+    count = 0
+    async with get_sessionmaker()() as db:
+        # One snapshot for the version and the rows
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        version = await db.scalar(select(func.coalesce(func.max(OutboxEvent.id), 0)))
+        result = await db.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for transaction_id, document in result:
+            await indexer.add(index, transaction_id, document, version=version)
+            count += 1
+    await indexer.flush()
+    return count
+
+
+async def run(batch_size: int) -> int:
+    init_db()
+    es = get_es_instance()
+    new_index = new_transaction_index_name()
+    try:
+        async with get_sessionmaker()() as db:
+            started_at = await db.scalar(select(func.now()))
+
+        # Bulk loading is faster without refreshes and replicas
+        await es.indices.create(
+            index=new_index,
+            body={
+                **TRANSACTION_INDEX_BODY,
+                "settings": {
+                    **TRANSACTION_INDEX_BODY["settings"],
+                    "refresh_interval": "-1",
+                },
+            },
+        )
+        indexer = BulkIndexer(es, chunk_size=batch_size)
+        copied = await copy_transactions(indexer, new_index)
+        if indexer.failed:
+            await es.indices.delete(index=new_index)
+            print(f"Reindex aborted: {indexer.failed} documents failed")
+            return 1
+
+        await es.indices.put_settings(
+            index=new_index, body={"index": {"refresh_interval": None}}
+        )
+        old_indices = []
+        if await es.indices.exists_alias(name=TRANSACTIONS_INDEX):
+            old_indices = list(
+                (await es.indices.get_alias(name=TRANSACTIONS_INDEX)).keys()
+            )
+        actions = [
+            {"remove": {"index": old, "alias": TRANSACTIONS_INDEX}}
+            for old in old_indices
+        ]
+        actions.append({"add": {"index": new_index, "alias": TRANSACTIONS_INDEX}})
+        await es.indices.update_aliases(body={"actions": actions})
+
+        # Live writes went to the old index until the swap
+        caught_up = await copy_transactions(
+            indexer, new_index, since=started_at - CATCH_UP_MARGIN
+        )
+        for old in old_indices:
+            await es.indices.delete(index=old)
+
+        print(
+            f"Reindexed {copied} transactions into {new_index} "
+            f"(+{caught_up} caught up), failed: {indexer.failed}"
+        )
+        return 1 if indexer.failed else 0
+    finally:
+        await es.close()
+        await close_db()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.batch_size)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Rebuilds or verifies the student_collection_totals read model.
+
+    python -m app.commands.student_totals verify
+    python -m app.commands.student_totals rebuild
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.core.database import init_db, close_db, get_sessionmaker
+from app.services.student_collection_total_service import (
+    student_collection_total_service,
+)
+
+
+async def run(action: str) -> int:
+    init_db()
+    try:
+        async with get_sessionmaker()() as db:
+            if action == "rebuild":
+                count = await student_collection_total_service.rebuild(db)
+                await db.commit()
+                print(f"Rebuilt student_collection_totals: {count} rows")
+                return 0
+
+            mismatches = await student_collection_total_service.verify(db)
+            for m in mismatches:
+                print(
+                    f"Mismatch {m['collection_id']}/{m['student_id']}: "
+                    f"expected {m['expected']}, stored {m['stored']}"
+                )
+            print(f"Verified student_collection_totals: {len(mismatches)} mismatches")
+            return 1 if mismatches else 0
+    finally:
+        await close_db()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("action", choices=["verify", "rebuild"])
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.action)))
+
+
+if __name__ == "__main__":
+    main()
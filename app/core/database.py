@@ -0,0 +1,116 @@
+import time
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.core.config import (
+    DATABASE_URL,
+    DATABASE_READ_URL,
+    DB_ECHO,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS,
+)
+from app.core.metrics import DB_POOL_WAIT
+
+# Process-wide engine and session factory, created once in the app lifespan
+engine: AsyncEngine | None = None
+session_local: async_sessionmaker[AsyncSession] | None = None
+# Replica engine (the primary engine when no DATABASE_READ_URL is set) and
+# READ ONLY session factories for the replica and for the primary
+read_engine: AsyncEngine | None = None
+read_session_local: async_sessionmaker[AsyncSession] | None = None
+primary_read_session_local: async_sessionmaker[AsyncSession] | None = None
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that reports how long checkouts wait for a free connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+
+
+def create_engine(url: str = DATABASE_URL) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=DB_ECHO,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={
+            "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        },
+    )
+
+
+def _read_only_sessionmaker(
+    bind: AsyncEngine, replica: bool = False
+) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        bind=bind.execution_options(postgresql_readonly=True),
+        class_=AsyncSession,
+        expire_on_commit=False,
+        # Replica reads may lag the primary; caches must not keep them
+        info={"replica": replica},
+    )
+
+
+def init_db() -> None:
+    global engine, session_local
+    global read_engine, read_session_local, primary_read_session_local
+    if engine is not None:
+        return
+    engine = create_engine()
+    session_local = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    read_engine = create_engine(DATABASE_READ_URL) if DATABASE_READ_URL else engine
+    read_session_local = _read_only_sessionmaker(
+        read_engine, replica=read_engine is not engine
+    )
+    primary_read_session_local = _read_only_sessionmaker(engine)
+
+
+async def close_db() -> None:
+    global engine, session_local
+    global read_engine, read_session_local, primary_read_session_local
+    if engine is None:
+        return
+    if read_engine is not engine:
+        await read_engine.dispose()
+    await engine.dispose()
+    engine = None
+    session_local = None
+    read_engine = None
+    read_session_local = None
+    primary_read_session_local = None
+
+
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    if session_local is None:
+        raise RuntimeError("Database is not initialized, call init_db() first")
+    return session_local
+
+
+def get_read_sessionmaker(primary: bool = False) -> async_sessionmaker[AsyncSession]:
+    """
+    READ ONLY sessions on the replica, or on the primary when the caller
+    needs to see its own recent writes.
+    """
+    maker = primary_read_session_local if primary else read_session_local
+    if maker is None:
+        raise RuntimeError("Database is not initialized, call init_db() first")
+    return maker
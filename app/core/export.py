@@ -0,0 +1,38 @@
+import csv
+import io
+from typing import AsyncIterator
+
+from pydantic import BaseModel
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+async def to_ndjson(items: AsyncIterator[BaseModel]) -> AsyncIterator[str]:
+    async for item in items:
+        yield item.model_dump_json() + "\n"
+
+
+async def to_csv(
+    items: AsyncIterator[BaseModel], fields: list[str]
+) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+    async for item in items:
+        writer.writerow(item.model_dump(mode="json"))
+        # Flush one line at a time so memory stays flat for any export size
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def encode_export(
+    items: AsyncIterator[BaseModel], fmt: str, fields: list[str]
+) -> AsyncIterator[str]:
+    if fmt == "csv":
+        return to_csv(items, fields)
+    return to_ndjson(items)
@@ -0,0 +1,134 @@
+import time
+from contextlib import contextmanager
+
+from fastapi import Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the DB pool",
+)
+BALANCE_LOCK_WAIT = Histogram(
+    "balance_lock_wait_seconds",
+    "Duration of row-locking balance updates, dominated by lock waits",
+    ["account_type"],
+)
+TRANSACTIONS = Counter(
+    "transactions_total",
+    "Recorded transactions by type and status",
+    ["type", "status"],
+)
+BALANCE_CACHE_REQUESTS = Counter(
+    "balance_cache_requests_total",
+    "Balance cache lookups by account kind and result (hit/miss)",
+    ["kind", "result"],
+)
+DEPOSIT_BATCH_SIZE = Histogram(
+    "deposit_group_commit_batch_size",
+    "Deposits applied per group commit",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+OUTBOX_EVENTS = Counter(
+    "outbox_events_total",
+    "Outbox events handed to the sink, by delivery result",
+    ["result"],
+)
+OUTBOUND_REQUEST_DURATION = Histogram(
+    "outbound_request_duration_seconds",
+    "Latency of calls to other services",
+    ["target", "operation"],
+)
+WITHDRAWALS_PROCESSED = Counter(
+    "withdrawals_processed_total",
+    "Withdrawals handed to the payout provider, by result "
+    "(completed, failed, error = outcome unknown, retried later)",
+    ["result"],
+)
+WITHDRAWAL_QUEUE_DEPTH = Gauge(
+    "withdrawal_queue_depth",
+    "PENDING withdrawals, as last counted by the withdrawal processor",
+)
+PAYOUTS_IN_FLIGHT = Gauge(
+    "payouts_in_flight",
+    "Payout provider calls currently in progress",
+)
+
+
+@contextmanager
+def observe(histogram: Histogram, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric = histogram.labels(**labels) if labels else histogram
+        metric.observe(time.perf_counter() - start)
+
+
+class DatabasePoolCollector:
+    """Reads the shared engines' pool state at scrape time."""
+
+    GAUGES = (
+        ("db_pool_size", "Configured pool size", lambda pool: pool.size()),
+        ("db_pool_checked_out", "Connections in use", lambda pool: pool.checkedout()),
+        ("db_pool_checked_in", "Idle connections", lambda pool: pool.checkedin()),
+        (
+            "db_pool_overflow",
+            "Connections over pool_size",
+            lambda pool: max(pool.overflow(), 0),
+        ),
+    )
+
+    def describe(self):
+        for name, doc, _ in self.GAUGES:
+            yield GaugeMetricFamily(name, doc, labels=["pool"])
+
+    def collect(self):
+        from app.core import database
+
+        if database.engine is None:
+            return
+        pools = {"primary": database.engine.pool}
+        if database.read_engine is not database.engine:
+            pools["replica"] = database.read_engine.pool
+        for name, doc, read in self.GAUGES:
+            family = GaugeMetricFamily(name, doc, labels=["pool"])
+            for label, pool in pools.items():
+                family.add_metric([label], read(pool))
+            yield family
+
+
+REGISTRY.register(DatabasePoolCollector())
+
+
+async def prometheus_middleware(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.labels(
+            method=request.method,
+            route=route.path if route else "unmatched",
+            status=status_code,
+        ).observe(time.perf_counter() - start)
+
+
+def metrics_endpoint(_: Request) -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
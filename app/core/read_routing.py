@@ -0,0 +1,52 @@
+import time
+from typing import Iterable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import READ_YOUR_WRITES_SECONDS
+
+_PENDING_KEY = "primary_pin_user_ids"
+
+
+class PrimaryPins:
+    """
+    Remembers users who committed a write in this worker, so their reads go
+    to the primary for `seconds` afterwards instead of a replica that may not
+    have replayed the write yet. Per worker only; clients that need the
+    guarantee across workers send `X-Read-Consistency: strong`.
+    """
+
+    def __init__(self, seconds: float = READ_YOUR_WRITES_SECONDS):
+        self.seconds = seconds
+        self._until: dict[str, float] = {}
+
+    def is_pinned(self, user_id: str) -> bool:
+        until = self._until.get(user_id)
+        if until is None:
+            return False
+        if until > time.monotonic():
+            return True
+        del self._until[user_id]
+        return False
+
+    def pin_on_commit(self, db: AsyncSession, user_ids: Iterable[str]) -> None:
+        db.info.setdefault(_PENDING_KEY, set()).update(user_ids)
+
+    def _after_transaction_end(self, session: Session, transaction) -> None:
+        # Outermost transaction only; pinning after a rollback is harmless
+        if transaction.parent is not None:
+            return
+        user_ids = session.info.pop(_PENDING_KEY, None)
+        if not user_ids or self.seconds <= 0:
+            return
+        now = time.monotonic()
+        for user_id in user_ids:
+            self._until[user_id] = now + self.seconds
+        if len(self._until) > 10000:
+            self._until = {u: t for u, t in self._until.items() if t > now}
+
+
+primary_pins = PrimaryPins()
+event.listen(Session, "after_transaction_end", primary_pins._after_transaction_end)
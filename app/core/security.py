@@ -1,23 +1,118 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+
+import httpx
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from app.core.config import KEYCLOAK_CLIENT_PUBLIC_KEY
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+from app.core.config import (
+    KEYCLOAK_CLIENT_PUBLIC_KEY,
+    KEYCLOAK_HOST,
+    KEYCLOAK_REALM,
+    KEYCLOAK_JWKS_ENABLED,
+    KEYCLOAK_JWKS_REFRESH_SECONDS,
+    JWT_CACHE_SIZE,
+)
+
+logger = logging.getLogger(__name__)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+JWKS_URL = f"{KEYCLOAK_HOST}/realms/{KEYCLOAK_REALM}/protocol/openid-connect/certs"
 
-def verify_token(token: str = Depends(oauth2_scheme)):
-    public_key = (
-        "-----BEGIN PUBLIC KEY-----\n"
-        + KEYCLOAK_CLIENT_PUBLIC_KEY
-        + "\n-----END PUBLIC KEY-----"
-    )
 
-    try:
-        return jwt.decode(
-            token, public_key, algorithms=["RS256"], options={"verify_aud": False}
+class TokenVerifier:
+    """
+    Verifies Keycloak access tokens.
+
+    The public key is parsed once (or fetched from the realm JWKS and kept by
+    kid), and verified claims are cached per token hash until the token's exp,
+    so a client sending the same bearer token again skips RS256 verification.
+    """
+
+    def __init__(
+        self,
+        public_key: str = KEYCLOAK_CLIENT_PUBLIC_KEY,
+        use_jwks: bool = KEYCLOAK_JWKS_ENABLED,
+        cache_size: int = JWT_CACHE_SIZE,
+    ):
+        self.use_jwks = use_jwks
+        self._static_key: Key = jwk.construct(
+            "-----BEGIN PUBLIC KEY-----\n" + public_key + "\n-----END PUBLIC KEY-----",
+            "RS256",
+        )
+        self._jwks_keys: dict[str, Key] = {}
+        self._jwks_lock = asyncio.Lock()
+        self._jwks_fetched_at = 0.0
+        self._cache_size = cache_size
+        self._cache: OrderedDict[bytes, dict] = OrderedDict()
+
+    async def verify(self, token: str) -> dict:
+        cache_key = hashlib.sha256(token.encode()).digest()
+        claims = self._cache.get(cache_key)
+        if claims is not None:
+            if claims["exp"] > time.time():
+                self._cache.move_to_end(cache_key)
+                return claims
+            del self._cache[cache_key]
+
+        key = await self._get_key(token) if self.use_jwks else self._static_key
+        claims = jwt.decode(
+            token, key, algorithms=["RS256"], options={"verify_aud": False}
         )
-    except JWTError as e:
+        if isinstance(claims.get("exp"), (int, float)):
+            self._cache[cache_key] = claims
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return claims
+
+    async def _get_key(self, token: str) -> Key:
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self._jwks_keys.get(kid)
+        if key is None:
+            # Unknown kid usually means the realm rotated keys; refetch, but
+            # at most every few seconds so bogus kids can't hammer Keycloak
+            await self.refresh_jwks(min_age=5)
+            key = self._jwks_keys.get(kid)
+        if key is None:
+            raise JWTError(f"Unknown signing key {kid}")
+        return key
+
+    async def refresh_jwks(self, min_age: float = 0) -> None:
+        async with self._jwks_lock:
+            if time.monotonic() - self._jwks_fetched_at < min_age:
+                return
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                response = await client.get(JWKS_URL)
+                response.raise_for_status()
+            self._jwks_keys = {
+                key_data["kid"]: jwk.construct(key_data, key_data.get("alg", "RS256"))
+                for key_data in response.json().get("keys", [])
+                if key_data.get("use", "sig") == "sig" and key_data.get("kty") == "RSA"
+            }
+            self._jwks_fetched_at = time.monotonic()
+
+    async def refresh_jwks_periodically(self) -> None:
+        """Background task keeping the JWKS fresh across key rotations."""
+        while True:
+            try:
+                await self.refresh_jwks()
+            except Exception as e:
+                logger.warning(f"JWKS refresh failed: {e}")
+            await asyncio.sleep(KEYCLOAK_JWKS_REFRESH_SECONDS)
+
+
+token_verifier = TokenVerifier()
+
+
+async def verify_token(token: str = Depends(oauth2_scheme)):
+    try:
+        return await token_verifier.verify(token)
+    except (JWTError, httpx.HTTPError) as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
@@ -1,17 +1,45 @@
 from typing import Annotated
-from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from app.core.config import DATABASE_URL
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_sessionmaker, get_read_sessionmaker
+from app.core.read_routing import primary_pins
+from app.core.security import token_verifier
+
+# Clients that must see their own writes from any worker send "strong"
+READ_CONSISTENCY_HEADER = "X-Read-Consistency"
 
 
 async def get_db():
-    engine = create_async_engine(DATABASE_URL, echo=True)
-    session_local = sessionmaker(
-        bind=engine, class_=AsyncSession, expire_on_commit=False
-    )
-    async with session_local() as session:
+    async with get_sessionmaker()() as session:
+        yield session
+
+
+async def _request_user_id(request: Request) -> str | None:
+    # Best effort: endpoints enforce authentication through their own deps
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return (await token_verifier.verify(token)).get("sub")
+    except Exception:
+        return None
+
+
+async def get_read_db(request: Request):
+    """
+    READ ONLY session for read endpoints: on the replica, or on the primary
+    when the client asks for strong consistency or the user wrote recently.
+    Strong sessions are flagged in session.info so caches can be bypassed.
+    """
+    strong = request.headers.get(READ_CONSISTENCY_HEADER, "").lower() == "strong"
+    if not strong:
+        user_id = await _request_user_id(request)
+        strong = user_id is not None and primary_pins.is_pinned(user_id)
+    async with get_read_sessionmaker(primary=strong)() as session:
+        session.info["strong_read"] = strong
         yield session
 
 
 DatabaseDep = Annotated[AsyncSession, Depends(get_db)]
+ReadDatabaseDep = Annotated[AsyncSession, Depends(get_read_db)]
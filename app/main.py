@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
@@ -7,6 +8,27 @@ from app.clients.elasticsearch import (
     get_es_instance,
     wait_for_elasticsearch,
 )
+from app.core.config import (
+    OUTBOX_ENABLED,
+    WITHDRAWALS_ENABLED,
+    BALANCE_CACHE_NOTIFY,
+    TRANSACTION_ARCHIVE_AFTER_MONTHS,
+)
+from app.core.database import init_db, close_db
+from app.core.metrics import prometheus_middleware, metrics_endpoint
+from app.core.security import token_verifier
+from app.clients.user_service_api import user_service_client
+from app.services.balance_cache import balance_cache
+from app.services.bulk_refund_service import bulk_refund_service
+from app.services.collection_stats_service import collection_stats_service
+from app.services.deposit_batcher import deposit_batcher
+from app.services.partition_service import transaction_partition_service
+from app.services.transaction_archive_service import transaction_archive_service
+from app.workers.outbox_publisher import OutboxPublisher, create_sink
+from app.workers.withdrawal_processor import (
+    WithdrawalProcessor,
+    create_payout_provider,
+)
 from app.api import api_router
 
 es = get_es_instance()
@@ -14,14 +36,73 @@ es = get_es_instance()
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    if not await wait_for_elasticsearch(es):
-        raise Exception("Elasticsearch is not available after waiting")
+    init_db()
+    user_service_client.start()
+    background_tasks = []
+    outbox_sink = None
+    payout_provider = None
+    try:
+        if not await wait_for_elasticsearch(es):
+            raise Exception("Elasticsearch is not available after waiting")
+
+        await init_indices(es)
+
+        if token_verifier.use_jwks:
+            background_tasks.append(
+                asyncio.create_task(token_verifier.refresh_jwks_periodically())
+            )
+
+        background_tasks.append(
+            asyncio.create_task(transaction_partition_service.run_periodically())
+        )
+
+        background_tasks.append(
+            asyncio.create_task(collection_stats_service.run_periodically())
+        )
+
+        background_tasks.append(
+            asyncio.create_task(bulk_refund_service.run_periodically())
+        )
+
+        if TRANSACTION_ARCHIVE_AFTER_MONTHS > 0:
+            background_tasks.append(
+                asyncio.create_task(transaction_archive_service.run_periodically())
+            )
+
+        if BALANCE_CACHE_NOTIFY:
+            background_tasks.append(asyncio.create_task(balance_cache.listen()))
+
+        if OUTBOX_ENABLED:
+            outbox_sink = create_sink(es)
+            outbox_sink.start()
+            background_tasks.append(
+                asyncio.create_task(OutboxPublisher(outbox_sink).run())
+            )
 
-    await init_indices(es)
+        if WITHDRAWALS_ENABLED:
+            payout_provider = create_payout_provider()
+            payout_provider.start()
+            background_tasks.append(
+                asyncio.create_task(WithdrawalProcessor(payout_provider).run())
+            )
 
-    yield
+        yield
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        if outbox_sink is not None:
+            await outbox_sink.close()
+        if payout_provider is not None:
+            await payout_provider.close()
+        await deposit_batcher.close()
+        await user_service_client.close()
+        await close_db()
+        await es.close()
 
 
 app = FastAPI(lifespan=lifespan)
+app.middleware("http")(prometheus_middleware)
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
 
 app.include_router(api_router, prefix="/api/v1")
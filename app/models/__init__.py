@@ -1 +1,14 @@
 from .base import Base
+from .account import Account
+from .collection_account import CollectionAccount, CollectionAccountSlot
+from .transaction import Transaction
+from .student_collection_total import StudentCollectionTotal
+from .idempotency_key import IdempotencyKey
+from .outbox import OutboxEvent
+from .transaction_archive_segment import (
+    TransactionArchiveSegment,
+    TransactionArchiveAccount,
+)
+from .balance_snapshot import BalanceSnapshot, BalanceSnapshotEntry
+from .collection_daily_stats import CollectionDailyStats, CollectionDailyMember
+from .bulk_refund import BulkRefundJob, BulkRefundItem
@@ -0,0 +1,44 @@
+from sqlalchemy import (
+    Column,
+    BigInteger,
+    Integer,
+    String,
+    DateTime,
+    ForeignKey,
+    Identity,
+    func,
+)
+from .base import Base
+
+
+class BalanceSnapshot(Base):
+    """
+    Checkpoint written by a completed reconciliation run: the net movement of
+    every account and collection from all transactions before `checkpoint`.
+    The next run starts from it and only reads newer transactions.
+    """
+
+    __tablename__ = "balance_snapshots"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    checkpoint = Column(DateTime(timezone=True), nullable=False)
+    transactions_checked = Column(BigInteger, nullable=False)
+    accounts_checked = Column(Integer, nullable=False)
+    collections_checked = Column(Integer, nullable=False)
+    mismatches = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class BalanceSnapshotEntry(Base):
+    """Net movement (minor units) of one account or collection at a snapshot."""
+
+    __tablename__ = "balance_snapshot_entries"
+
+    snapshot_id = Column(
+        BigInteger,
+        ForeignKey("balance_snapshots.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    kind = Column(String, primary_key=True)  # "account" | "collection"
+    key = Column(String, primary_key=True)  # accounts.id lub collection_id
+    net_minor = Column(BigInteger, nullable=False)
@@ -0,0 +1,84 @@
+import enum
+from sqlalchemy import (
+    Column,
+    BigInteger,
+    Integer,
+    String,
+    Numeric,
+    DateTime,
+    ForeignKey,
+    Identity,
+    Index,
+    func,
+    Enum as SQLEnum,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from .base import Base
+
+
+class BulkRefundStatus(enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+class BulkRefundJob(Base):
+    """
+    Refund of everything paid into one collection (e.g. a cancelled trip).
+    The payers are listed in bulk_refund_items when the job is created; the
+    worker refunds their current nets in account_id order, chunk by chunk,
+    and `last_account_id` records how far it got. total_items/total_amount
+    are the figures at creation, refunded_* what was actually returned.
+    """
+
+    __tablename__ = "bulk_refund_jobs"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    collection_id = Column(String, nullable=False)
+    status = Column(
+        SQLEnum(BulkRefundStatus), nullable=False, default=BulkRefundStatus.PENDING
+    )
+    description = Column(String, nullable=True)
+    chunk_size = Column(Integer, nullable=False)
+    total_items = Column(Integer, nullable=False)
+    total_amount = Column(Numeric(12, 2), nullable=False)
+    refunded_items = Column(Integer, nullable=False, default=0)
+    refunded_amount = Column(Numeric(12, 2), nullable=False, default=0)
+    # Checkpoint: items up to this account are refunded (None: none yet)
+    last_account_id = Column(UUID(as_uuid=True), nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+# Co najwyżej jedno niedokończone zlecenie na zbiórkę
+Index(
+    "uq_bulk_refund_jobs_collection_id_unfinished",
+    BulkRefundJob.collection_id,
+    unique=True,
+    postgresql_where=BulkRefundJob.status.in_(
+        [BulkRefundStatus.PENDING, BulkRefundStatus.RUNNING]
+    ),
+)
+
+
+class BulkRefundItem(Base):
+    """
+    One payer of the job's collection: the net at creation until its chunk
+    runs, then the amount the job actually refunded to it.
+    """
+
+    __tablename__ = "bulk_refund_items"
+
+    job_id = Column(
+        BigInteger,
+        ForeignKey("bulk_refund_jobs.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    account_id = Column(UUID(as_uuid=True), primary_key=True)
+    user_id = Column(String, nullable=False)
+    amount = Column(Numeric(10, 2), nullable=False)
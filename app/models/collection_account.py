@@ -1,8 +1,17 @@
 import uuid
 import enum
-from sqlalchemy import Column, String, Numeric, DateTime, func, Enum as SQLEnum
+from sqlalchemy import (
+    Column,
+    String,
+    Numeric,
+    Integer,
+    DateTime,
+    ForeignKey,
+    func,
+    Enum as SQLEnum,
+)
 from sqlalchemy.dialects.postgresql import UUID
-from app.db.base import Base
+from .base import Base
 
 
 # Możesz używać tego statusu lub polegać wyłącznie na statusie z serwisu Collections
@@ -21,6 +30,9 @@ class CollectionAccount(Base):
         String, unique=True, index=True, nullable=False
     )  # Zmieniona nazwa pola
     balance = Column(Numeric(10, 2), nullable=False, default=0.00)
+    # Liczba slotów (striped mode); 0 = całe saldo w kolumnie balance.
+    # Pełne saldo to balance + suma CollectionAccountSlot.balance
+    slot_count = Column(Integer, nullable=False, default=0, server_default="0")
     # Status może być replikowany lub zarządzany tylko w Collection Service
     # Dla uproszczenia i mniejszego couplingu, można usunąć to pole
     # status = Column(SQLEnum(CollectionAccountStatus), nullable=False, default=CollectionAccountStatus.ACTIVE)
@@ -28,3 +40,24 @@ class CollectionAccount(Base):
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
+
+
+class CollectionAccountSlot(Base):
+    """
+    Sub-balance of a striped collection account. Credits land on one of the
+    slots so concurrent payments to a hot collection don't all wait on the
+    single collection_accounts row.
+    """
+
+    __tablename__ = "collection_account_slots"
+
+    collection_account_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("collection_accounts.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    slot = Column(Integer, primary_key=True)
+    balance = Column(Numeric(10, 2), nullable=False, default=0.00)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
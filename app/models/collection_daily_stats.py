@@ -0,0 +1,41 @@
+from sqlalchemy import Column, String, Numeric, Integer, Date, DateTime, func
+from .base import Base
+
+
+class CollectionDailyStats(Base):
+    """
+    Read model: completed payments and refunds of a collection per UTC day.
+    Maintained in the same DB transaction as the payment or refund. Like the
+    collection account, a day is split into slots so concurrent payments to
+    one collection don't all update the same row; readers sum the slots.
+    """
+
+    __tablename__ = "collection_daily_stats"
+
+    collection_id = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    slot = Column(Integer, primary_key=True, default=0)
+    payments_count = Column(Integer, nullable=False, default=0)
+    payments_total = Column(Numeric(12, 2), nullable=False, default=0.00)
+    refunds_count = Column(Integer, nullable=False, default=0)
+    refunds_total = Column(Numeric(12, 2), nullable=False, default=0.00)
+    # Liczone tylko przy pierwszej płatności danego dnia (patrz CollectionDailyMember)
+    payers = Column(Integer, nullable=False, default=0)
+    students = Column(Integer, nullable=False, default=0)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class CollectionDailyMember(Base):
+    """
+    Payers and students already counted for a collection on a day. Only
+    recent days are needed to count new ones; older rows are pruned.
+    """
+
+    __tablename__ = "collection_daily_members"
+
+    collection_id = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    kind = Column(String, primary_key=True)  # "payer" | "student"
+    member = Column(String, primary_key=True)  # accounts.id lub student_id
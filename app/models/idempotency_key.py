@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+from .base import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)  # Idempotency-Key header
+    endpoint = Column(String, nullable=False)
+    request_hash = Column(String, nullable=False)
+    # Zapisana odpowiedź (TransactionRead); NULL dopóki operacja trwa
+    response = Column(JSONB, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
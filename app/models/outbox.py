@@ -0,0 +1,32 @@
+from sqlalchemy import (
+    Column,
+    BigInteger,
+    Integer,
+    String,
+    DateTime,
+    Identity,
+    func,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from .base import Base
+
+
+class OutboxEvent(Base):
+    """
+    Event written in the same DB transaction as the change it describes and
+    delivered later by the outbox publisher (at-least-once). Rows are deleted
+    once a sink has acknowledged them.
+    """
+
+    __tablename__ = "outbox"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    event_type = Column(String, nullable=False)  # np. "transaction.payment"
+    aggregate_id = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), index=True
+    )
+    last_error = Column(String, nullable=True)
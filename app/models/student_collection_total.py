@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Numeric, DateTime, func
+from .base import Base
+
+
+class StudentCollectionTotal(Base):
+    """
+    Read model: sum of completed PAYMENT transactions per (collection, student).
+    Maintained in the same DB transaction as the payment itself.
+    """
+
+    __tablename__ = "student_collection_totals"
+
+    collection_id = Column(String, primary_key=True)
+    student_id = Column(String, primary_key=True, index=True)
+    total_paid = Column(Numeric(10, 2), nullable=False, default=0.00)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
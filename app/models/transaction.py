@@ -7,6 +7,7 @@ from sqlalchemy import (
     DateTime,
     func,
     ForeignKey,
+    Index,
     Enum as SQLEnum,
 )
 from sqlalchemy.dialects.postgresql import UUID
@@ -29,6 +30,9 @@ class TransactionStatus(enum.Enum):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    # Partycje miesięczne (transactions_pYYYY_MM), zarządzane przez
+    # TransactionPartitionService; klucz partycji musi być częścią PK
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     # Konto użytkownika powiązane z transakcją
@@ -38,7 +42,12 @@ class Transaction(Base):
         SQLEnum(TransactionStatus), nullable=False, default=TransactionStatus.PENDING
     )
     amount = Column(Numeric(10, 2), nullable=False)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(
+        DateTime(timezone=True),
+        primary_key=True,
+        nullable=False,
+        server_default=func.now(),
+    )
     description = Column(String, nullable=True)
 
     # ID zbiórki, której dotyczy płatność/zwrot
@@ -47,5 +56,28 @@ class Transaction(Base):
     # ID ucznia, którego dotyczy płatność (jeśli dotyczy)
     student_id = Column(String, nullable=True, index=True)  # Zmieniona nazwa pola
 
-    # ID transakcji zewnętrznej (np. bramka płatnicza)
-    external_transaction_id = Column(String, nullable=True, unique=True, index=True)
+    # ID transakcji zewnętrznej (np. bramka płatnicza); unikalność tylko w
+    # obrębie partycji nie miałaby sensu, więc indeks jest zwykły
+    external_transaction_id = Column(String, nullable=True, index=True)
+
+    # Wypłata pobrana przez WithdrawalProcessor; do tego czasu inne procesy
+    # jej nie pobierają, a po nim (np. po awarii) zostanie wysłana ponownie
+    payout_claimed_until = Column(DateTime(timezone=True), nullable=True)
+
+
+# Historia transakcji użytkownika: keyset pagination po (timestamp, id)
+Index(
+    "ix_transactions_account_id_timestamp_id",
+    Transaction.account_id,
+    Transaction.timestamp.desc(),
+    Transaction.id.desc(),
+)
+
+# Kolejka wypłat do realizacji (WithdrawalProcessor); indeks częściowy
+# pozostaje mały, bo wypłaty szybko opuszczają status PENDING
+Index(
+    "ix_transactions_pending_withdrawals",
+    Transaction.timestamp,
+    postgresql_where=(Transaction.type == TransactionType.WITHDRAWAL)
+    & (Transaction.status == TransactionStatus.PENDING),
+)
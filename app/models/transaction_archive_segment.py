@@ -0,0 +1,49 @@
+from sqlalchemy import (
+    Column,
+    BigInteger,
+    Boolean,
+    Integer,
+    String,
+    Date,
+    DateTime,
+    ForeignKey,
+    func,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from .base import Base
+
+
+class TransactionArchiveSegment(Base):
+    """
+    One archived month of transactions: a compressed segment in the object
+    store plus its manifest. The month's rows are no longer in `transactions`.
+    """
+
+    __tablename__ = "transaction_archive_segments"
+
+    month = Column(Date, primary_key=True)  # pierwszy dzień miesiąca (UTC)
+    object_key = Column(String, nullable=False)
+    manifest_key = Column(String, nullable=False)
+    row_count = Column(Integer, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Czy transaction_archive_accounts zawiera konta tego segmentu (segmenty
+    # sprzed jej wprowadzenia są uzupełniane przez archiwizator)
+    accounts_indexed = Column(Boolean, nullable=False, server_default="false")
+
+
+class TransactionArchiveAccount(Base):
+    """
+    Accounts with rows in an archived month, so account reads go to the
+    object store only for the months that hold that account's rows.
+    """
+
+    __tablename__ = "transaction_archive_accounts"
+
+    account_id = Column(UUID(as_uuid=True), primary_key=True)
+    month = Column(
+        Date,
+        ForeignKey("transaction_archive_segments.month", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    row_count = Column(Integer, nullable=False)
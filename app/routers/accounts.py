@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 
 from app.schemas.account import AccountRead
+from app.schemas.reconciliation import ReconciliationReport
 from app.services.account_service import account_service
-from app.dependencies.db import DatabaseDep
+from app.services.reconciliation_service import reconciliation_service
+from app.dependencies.db import ReadDatabaseDep
 from app.dependencies.auth import CurrentUserIdDep
 
 router = APIRouter()
@@ -12,13 +14,39 @@ router = APIRouter()
     "/me", response_model=AccountRead, summary="Get current user's account details"
 )
 async def read_account_me(
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     current_user_id: CurrentUserIdDep,
 ):
     """
     Retrieves the details of the currently logged-in user's internal account,
-    including the current balance. Creates the account if it doesn't exist.
+    including the current balance. A user without an account yet gets a zero
+    balance; the account is created by the first deposit or payment.
     """
-    # get_account_details includes get_or_create logic
     account = await account_service.get_account_details(db=db, user_id=current_user_id)
     return account
+
+
+# === Internal / Admin Endpoints ===
+
+
+@router.post(
+    "/reconciliation",
+    response_model=ReconciliationReport,
+    summary="Reconcile balances with transactions (Admin)",
+    # dependencies=[Depends(require_admin_or_service_role)] # TODO: Secure this endpoint!
+)
+async def reconcile_balances(full: bool = False):
+    """
+    Compares every account and collection balance with the net of its
+    transactions since the last snapshot and returns the mismatches. A full
+    run over millions of transactions takes minutes, longer than a request
+    should, so `full` and the very first run (no snapshot yet) are refused:
+    use `python -m app.commands.reconcile_balances [--full]` for those.
+    """
+    if full:
+        raise HTTPException(
+            status_code=400,
+            detail="Full reconciliation is not run over HTTP, "
+            "use the reconcile_balances command",
+        )
+    return await reconciliation_service.reconcile(require_snapshot=True)
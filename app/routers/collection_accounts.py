@@ -1,9 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List, Literal
 
-from app.schemas.collection_account import CollectionAccountRead
+from app.core.export import EXPORT_MEDIA_TYPES, encode_export
+from app.models.transaction import TransactionType
+from app.schemas.collection_account import (
+    CollectionAccountRead,
+    CollectionStatsResponse,
+)
+from app.schemas.transaction import TransactionRead
 from app.services.collection_account_service import collection_account_service
-from app.dependencies.db import DatabaseDep
+from app.services.collection_stats_service import collection_stats_service
+from app.services.transaction_service import transaction_service
+from app.dependencies.db import ReadDatabaseDep
 
 # TODO: Add appropriate authorization dependency (e.g., check for admin or service role)
 # from app.dependencies.auth import require_admin_or_service_role
@@ -20,7 +31,7 @@ router = APIRouter()
 )
 async def read_collection_account(  # Zmieniono nazwę funkcji i parametr
     collection_id: str,
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
 ):
     """
     Retrieves the details of a specific collection's internal account,
@@ -37,6 +48,76 @@ async def read_collection_account(  # Zmieniono nazwę funkcji i parametr
     return account
 
 
+@router.get(
+    "/{collection_id}/transactions/export",
+    summary="Export collection transactions",
+    response_class=StreamingResponse,
+    # dependencies=[Depends(require_admin_or_service_role)] # Example protection
+)
+async def export_collection_transactions(
+    collection_id: str,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    type: List[TransactionType] | None = Query(None),
+):
+    """
+    Streams all transactions of a collection (oldest first) as NDJSON or CSV.
+    Optional filters: `date_from` (inclusive), `date_to` (exclusive) and `type`.
+    Requires appropriate permissions.
+    """
+    transactions = transaction_service.stream_transactions(
+        collection_id=collection_id, date_from=date_from, date_to=date_to, types=type
+    )
+    return StreamingResponse(
+        encode_export(transactions, format, list(TransactionRead.model_fields)),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{collection_id}_transactions.{format}"'
+        },
+    )
+
+
+@router.get(
+    "/{collection_id}/stats",
+    response_model=CollectionStatsResponse,
+    summary="Get daily payment statistics of a collection",
+    # dependencies=[Depends(require_admin_or_service_role)] # Example protection
+)
+async def read_collection_stats(
+    collection_id: str,
+    db: ReadDatabaseDep,
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    """
+    Returns payments, refunds, distinct payers and distinct students per day
+    (UTC) between `date_from` and `date_to` inclusive; by default the last
+    30 days. Payer and student counts are per day and are not summed.
+    Requires appropriate permissions.
+    """
+    date_to = date_to or datetime.now(timezone.utc).date()
+    date_from = date_from or date_to - timedelta(days=30)
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_from must not be after date_to",
+        )
+    days = await collection_stats_service.get_daily_stats(
+        db, collection_id, date_from, date_to
+    )
+    return CollectionStatsResponse(
+        collection_id=collection_id,
+        date_from=date_from,
+        date_to=date_to,
+        payments_count=sum(d.payments_count for d in days),
+        payments_total=sum((d.payments_total for d in days), Decimal("0.00")),
+        refunds_count=sum(d.refunds_count for d in days),
+        refunds_total=sum((d.refunds_total for d in days), Decimal("0.00")),
+        days=days,
+    )
+
+
 # Potential endpoint for listing accounts (also needs protection)
 # @router.get("", response_model=List[CollectionAccountRead], ...)
 # async def list_collection_accounts(...): ...
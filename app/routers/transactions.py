@@ -1,25 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from typing import List
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    status,
+    Body,
+    Response,
+    Query,
+    Header,
+    Request,
+)
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from decimal import Decimal
+from typing import Annotated, List, Literal
 
 from app.schemas.transaction import (
     TransactionRead,
     TransactionPaymentRequest,
+    TransactionPaymentBatchRequest,
     TransactionDepositRequest,
     TransactionWithdrawalRequest,
     RefundRequest,  # Internal refund request schema
+    BulkRefundRequest,
+    BulkRefundJobRead,
     StudentPaymentSummary,
     StudentPaymentSummaryBatchRequest,
     StudentPaymentSummaryBatchResponse,
+    ChildrenSummaryResponse,
+    TransactionSearchResult,
 )
 from app.services.transaction_service import transaction_service
-from app.dependencies.db import DatabaseDep
-from app.dependencies.auth import UserIdDep  # User ID from token
+from app.services.bulk_refund_service import bulk_refund_service
+from app.services.idempotency_service import idempotency_service
+from app.services.deposit_batcher import deposit_batcher
+from app.services.transaction_search_service import transaction_search_service
+from app.clients.user_service_api import get_children_for_parent
+from app.core.config import DEPOSIT_GROUP_COMMIT
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.export import EXPORT_MEDIA_TYPES, encode_export
+from app.models.transaction import TransactionType, TransactionStatus
+from app.dependencies.db import DatabaseDep, ReadDatabaseDep
+from app.dependencies.auth import CurrentUserIdDep  # User ID from token
 
 # TODO: Add dependencies for service-to-service or admin authorization
 # from app.dependencies.auth import verify_service_token, require_admin_role
 
 router = APIRouter()
 
+# Clients retrying a timed-out request resend the same key
+IdempotencyKeyHeader = Annotated[
+    str | None, Header(alias="Idempotency-Key", max_length=255)
+]
+
 
 @router.post(
     "/deposit",
@@ -29,8 +61,9 @@ router = APIRouter()
 )
 async def initiate_deposit_endpoint(
     db: DatabaseDep,
-    current_user_id: UserIdDep,
+    current_user_id: CurrentUserIdDep,
     deposit_request: TransactionDepositRequest,
+    idempotency_key: IdempotencyKeyHeader = None,
 ):
     """
     Initiates the process of depositing funds into the user's internal account.
@@ -38,10 +71,19 @@ async def initiate_deposit_endpoint(
     """
     # Use commit/rollback block for top-level operations
     try:
-        transaction = await transaction_service.initiate_deposit(
-            db=db, user_id=current_user_id, deposit_data=deposit_request
+        if DEPOSIT_GROUP_COMMIT and idempotency_key is None:
+            # Applied and committed together with concurrent deposits
+            return await deposit_batcher.submit(current_user_id, deposit_request)
+        transaction = await idempotency_service.execute(
+            db,
+            user_id=current_user_id,
+            key=idempotency_key,
+            endpoint="deposit",
+            request_data=deposit_request,
+            operation=lambda: transaction_service.initiate_deposit(
+                db=db, user_id=current_user_id, deposit_data=deposit_request
+            ),
         )
-        await db.commit()
         return transaction
     except HTTPException as e:
         await db.rollback()
@@ -63,18 +105,25 @@ async def initiate_deposit_endpoint(
 )
 async def request_withdrawal_endpoint(
     db: DatabaseDep,
-    current_user_id: UserIdDep,
+    current_user_id: CurrentUserIdDep,
     withdrawal_request: TransactionWithdrawalRequest,
+    idempotency_key: IdempotencyKeyHeader = None,
 ):
     """
     Requests a withdrawal of funds from the user's internal account.
     Creates a PENDING transaction. Requires sufficient funds.
     """
     try:
-        transaction = await transaction_service.initiate_withdrawal(
-            db=db, user_id=current_user_id, withdrawal_data=withdrawal_request
+        transaction = await idempotency_service.execute(
+            db,
+            user_id=current_user_id,
+            key=idempotency_key,
+            endpoint="withdraw",
+            request_data=withdrawal_request,
+            operation=lambda: transaction_service.initiate_withdrawal(
+                db=db, user_id=current_user_id, withdrawal_data=withdrawal_request
+            ),
         )
-        await db.commit()
         return transaction
     except HTTPException as e:
         await db.rollback()
@@ -96,8 +145,9 @@ async def request_withdrawal_endpoint(
 )
 async def pay_for_collection_endpoint(  # Zmieniono nazwę funkcji
     db: DatabaseDep,
-    current_user_id: UserIdDep,
+    current_user_id: CurrentUserIdDep,
     payment_request: TransactionPaymentRequest,  # Używa zaktualizowanego schematu
+    idempotency_key: IdempotencyKeyHeader = None,
 ):
     """
     Pays a specific amount from the user's internal account for a given collection
@@ -105,10 +155,17 @@ async def pay_for_collection_endpoint(  # Zmieniono nazwę funkcji
     """
     try:
         # make_payment handles the nested transaction internally
-        transaction = await transaction_service.make_payment(
-            db=db, user_id=current_user_id, payment_data=payment_request
+        # Commits the outer transaction, or replays a stored result for a reused key
+        transaction = await idempotency_service.execute(
+            db,
+            user_id=current_user_id,
+            key=idempotency_key,
+            endpoint="pay",
+            request_data=payment_request,
+            operation=lambda: transaction_service.make_payment(
+                db=db, user_id=current_user_id, payment_data=payment_request
+            ),
         )
-        await db.commit()  # Commit the outer transaction
         return transaction
     except HTTPException as e:
         await db.rollback()  # Rollback outer transaction on error
@@ -122,30 +179,177 @@ async def pay_for_collection_endpoint(  # Zmieniono nazwę funkcji
         )
 
 
+@router.post(
+    "/pay/batch",
+    response_model=List[TransactionRead],
+    status_code=status.HTTP_201_CREATED,
+    summary="Pay for several collections at once",
+)
+async def pay_for_collections_batch_endpoint(
+    db: DatabaseDep,
+    current_user_id: CurrentUserIdDep,
+    batch_request: TransactionPaymentBatchRequest,
+):
+    """
+    Pays for several collection/student pairs in one atomic operation.
+    Either all payments succeed or none do. Requires sufficient funds for the total.
+    """
+    try:
+        transactions = await transaction_service.make_payments_batch(
+            db=db, user_id=current_user_id, batch_data=batch_request
+        )
+        await db.commit()
+        return transactions
+    except HTTPException as e:
+        await db.rollback()
+        raise e
+    except Exception as e:
+        await db.rollback()
+        print(f"Error during batch payment: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred during batch payment processing.",
+        )
+
+
 @router.get(
     "/me",
     response_model=List[TransactionRead],
     summary="Get current user's transaction history",
 )
 async def read_transactions_me(
-    db: DatabaseDep,
-    current_user_id: UserIdDep,
+    db: ReadDatabaseDep,
+    current_user_id: CurrentUserIdDep,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: str | None = None,
 ):
     """
     Retrieves a list of the current user's past transactions, ordered by date descending.
-    Supports pagination using `skip` and `limit` query parameters.
+    Supports cursor pagination: pass the `X-Next-Cursor` header of the previous
+    page as `cursor`. Offset pagination with `skip` and `limit` is still supported.
     """
     transactions = await transaction_service.get_user_transactions(
-        db=db, user_id=current_user_id, skip=skip, limit=limit
+        db=db,
+        user_id=current_user_id,
+        skip=skip,
+        limit=limit,
+        cursor=decode_cursor(cursor) if cursor else None,
     )
+    if transactions and len(transactions) == limit:
+        last = transactions[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.timestamp, last.id)
     return transactions
 
 
+@router.get(
+    "/me/children-summary",
+    response_model=ChildrenSummaryResponse,
+    summary="Get current user's balance and payments per child",
+)
+async def read_children_summary_me(
+    db: ReadDatabaseDep,
+    current_user_id: CurrentUserIdDep,
+    request: Request,
+):
+    """
+    Returns the parent's account balance together with the amounts paid for
+    each of their children, per collection, in a single response.
+    """
+    return await transaction_service.get_children_summary(
+        db,
+        user_id=current_user_id,
+        child_ids_lookup=get_children_for_parent(current_user_id, request),
+    )
+
+
+@router.get(
+    "/export",
+    summary="Export current user's transaction history",
+    response_class=StreamingResponse,
+)
+async def export_transactions_me(
+    current_user_id: CurrentUserIdDep,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    type: List[TransactionType] | None = Query(None),
+):
+    """
+    Streams the current user's transactions (oldest first) as NDJSON or CSV.
+    Optional filters: `date_from` (inclusive), `date_to` (exclusive) and `type`.
+    """
+    transactions = transaction_service.stream_transactions(
+        user_id=current_user_id, date_from=date_from, date_to=date_to, types=type
+    )
+    return StreamingResponse(
+        encode_export(transactions, format, list(TransactionRead.model_fields)),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions.{format}"'
+        },
+    )
+
+
 # === Internal / Service-to-Service / Admin Endpoints ===
 
 
+@router.get(
+    "/search",
+    response_model=List[TransactionSearchResult],
+    summary="Search transactions (Support/Admin)",
+    # dependencies=[Depends(require_admin_or_service_role)] # TODO: Secure this endpoint!
+)
+async def search_transactions_endpoint(
+    response: Response,
+    q: str | None = Query(None, description="Full-text match on description"),
+    user_id: str | None = None,
+    collection_id: str | None = None,
+    student_id: str | None = None,
+    type: List[TransactionType] | None = Query(None),
+    status_: List[TransactionStatus] | None = Query(None, alias="status"),
+    amount_min: Decimal | None = Query(None, ge=0),
+    amount_max: Decimal | None = Query(None, ge=0),
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    size: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+):
+    """
+    Searches all transactions in the search index, newest first. Pass the
+    `X-Next-Cursor` header of the previous page as `cursor` for the next one.
+    The index is fed from the outbox, so it may lag writes by a moment.
+    """
+    # TODO: Add permission check logic here
+    try:
+        results, next_cursor = await transaction_search_service.search(
+            text=q,
+            user_id=user_id,
+            collection_id=collection_id,
+            student_id=student_id,
+            types=type,
+            statuses=status_,
+            amount_min=amount_min,
+            amount_max=amount_max,
+            date_from=date_from,
+            date_to=date_to,
+            size=size,
+            cursor=cursor,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error during transaction search: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Transaction search is unavailable.",
+        )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return results
+
+
 @router.post(
     "/internal/refund",
     response_model=TransactionRead,
@@ -187,6 +391,73 @@ async def process_refund_endpoint(
         )
 
 
+@router.post(
+    "/internal/collections/{collection_id}/bulk-refund",
+    response_model=BulkRefundJobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Refund all payers of a collection (Internal/Admin/Service)",
+    # dependencies=[Depends(require_admin_or_service_role)] # TODO: Secure this endpoint!
+)
+async def start_bulk_refund_endpoint(
+    collection_id: str,
+    db: DatabaseDep,
+    request: Request,
+    response: Response,
+    refund_request: BulkRefundRequest = Body(BulkRefundRequest()),
+):
+    """
+    Starts a job returning to every payer what they paid into the collection
+    (payments minus refunds), e.g. after the collection was cancelled. The
+    refunds are applied in the background; follow them with
+    `GET /internal/bulk-refunds/{job_id}` (the `Location` header). If a job
+    for the collection is still running, that job is returned instead.
+    """
+    # TODO: Add permission check logic here
+    try:
+        job, created = await bulk_refund_service.create_job(
+            db,
+            collection_id=collection_id,
+            description=refund_request.description,
+            chunk_size=refund_request.chunk_size,
+        )
+        await db.commit()
+    except HTTPException as e:
+        await db.rollback()
+        raise e
+    except Exception as e:
+        await db.rollback()
+        print(f"Error creating bulk refund job: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while creating the bulk refund job.",
+        )
+    if not created:
+        response.status_code = status.HTTP_200_OK
+    response.headers["Location"] = str(
+        request.url_for("read_bulk_refund_endpoint", job_id=job.id)
+    )
+    return job
+
+
+@router.get(
+    "/internal/bulk-refunds/{job_id}",
+    response_model=BulkRefundJobRead,
+    summary="Get bulk refund progress (Internal/Admin/Service)",
+    # dependencies=[Depends(require_admin_or_service_role)] # TODO: Secure this endpoint!
+)
+async def read_bulk_refund_endpoint(job_id: int, db: DatabaseDep):
+    """
+    Status and progress of a bulk refund job. `last_account_id` is the
+    checkpoint the job resumes from after a restart.
+    """
+    job = await bulk_refund_service.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Bulk refund job not found"
+        )
+    return job
+
+
 @router.post(
     "/summary/student-collection-payments",  # Zmieniono ścieżkę
     response_model=StudentPaymentSummaryBatchResponse,
@@ -194,7 +465,7 @@ async def process_refund_endpoint(
     # dependencies=[Depends(verify_service_token)] # TODO: Secure this endpoint!
 )
 async def get_student_collection_payment_summaries(  # Zmieniono nazwę funkcji
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     batch_request: StudentPaymentSummaryBatchRequest,  # Używa zaktualizowanego schematu
 ):
     """
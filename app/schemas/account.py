@@ -9,11 +9,12 @@ class AccountBase(BaseModel):
 
 
 class AccountRead(AccountBase):
-    id: uuid.UUID
+    # id/created_at are null until the first deposit or payment creates it
+    id: uuid.UUID | None = None
     user_id: str
     balance: Decimal = Field(..., decimal_places=2)
-    created_at: datetime
+    created_at: datetime | None = None
     updated_at: datetime | None = None
 
     class Config:
-        orm_mode = True  # Pydantic v2: from_attributes = True
+        from_attributes = True
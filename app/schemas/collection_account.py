@@ -1,7 +1,8 @@
 import uuid
 from pydantic import BaseModel, Field
 from decimal import Decimal
-from datetime import datetime
+from datetime import date, datetime
+from typing import List
 
 # Jeśli używasz statusu w modelu:
 # from app.models.collection_account import CollectionAccountStatus
@@ -20,5 +21,29 @@ class CollectionAccountRead(CollectionAccountBase):  # Zmieniono nazwę
     updated_at: datetime | None = None
 
     class Config:
-        orm_mode = True
+        from_attributes = True
         use_enum_values = True
+
+
+class CollectionDailyStatsRead(BaseModel):
+    day: date
+    payments_count: int
+    payments_total: Decimal = Field(..., decimal_places=2)
+    refunds_count: int
+    refunds_total: Decimal = Field(..., decimal_places=2)
+    payers: int  # distinct payers that day
+    students: int  # distinct students paid for that day
+
+    class Config:
+        from_attributes = True
+
+
+class CollectionStatsResponse(BaseModel):
+    collection_id: str
+    date_from: date
+    date_to: date
+    payments_count: int
+    payments_total: Decimal = Field(..., decimal_places=2)
+    refunds_count: int
+    refunds_total: Decimal = Field(..., decimal_places=2)
+    days: List[CollectionDailyStatsRead]  # only days with activity
@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from decimal import Decimal
+from datetime import datetime
+from typing import List, Literal
+
+
+class BalanceMismatch(BaseModel):
+    kind: Literal["account", "collection"]
+    key: str  # accounts.id or collection_id
+    stored_balance: Decimal | None = Field(None, decimal_places=2)  # None: no row
+    expected_balance: Decimal = Field(..., decimal_places=2)
+    difference: Decimal = Field(..., decimal_places=2)  # stored - expected
+
+
+class ReconciliationReport(BaseModel):
+    snapshot_id: int
+    base_checkpoint: datetime | None = None  # None: full run from the start
+    checkpoint: datetime
+    transactions_checked: int
+    accounts_checked: int
+    collections_checked: int
+    mismatch_count: int
+    mismatches: List[BalanceMismatch]  # first RECONCILIATION_MAX_REPORTED
+    duration_seconds: float
@@ -4,6 +4,7 @@ from decimal import Decimal
 from datetime import datetime
 from typing import List
 from app.models.transaction import TransactionType, TransactionStatus
+from app.models.bulk_refund import BulkRefundStatus
 
 
 class TransactionBase(BaseModel):
@@ -41,6 +42,10 @@ class TransactionPaymentRequest(BaseModel):
     description: str | None = None
 
 
+class TransactionPaymentBatchRequest(BaseModel):
+    payments: List[TransactionPaymentRequest] = Field(..., min_length=1, max_length=100)
+
+
 class RefundRequest(BaseModel):  # Schema for internal refund endpoint
     user_id: str
     collection_id: str  # Zmieniono nazwę
@@ -48,6 +53,32 @@ class RefundRequest(BaseModel):  # Schema for internal refund endpoint
     description: str | None = None
 
 
+class BulkRefundRequest(BaseModel):  # Schema for internal bulk refund endpoint
+    description: str | None = None
+    chunk_size: int | None = Field(None, ge=1, le=1000)
+
+
+class BulkRefundJobRead(BaseModel):
+    id: int
+    collection_id: str
+    status: BulkRefundStatus
+    description: str | None = None
+    chunk_size: int
+    total_items: int
+    total_amount: Decimal = Field(..., decimal_places=2)
+    refunded_items: int
+    refunded_amount: Decimal = Field(..., decimal_places=2)
+    last_account_id: uuid.UUID | None = None
+    error: str | None = None
+    created_at: datetime
+    updated_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
+        use_enum_values = True
+
+
 class TransactionRead(TransactionBase):
     id: uuid.UUID
     account_id: uuid.UUID
@@ -60,10 +91,14 @@ class TransactionRead(TransactionBase):
     external_transaction_id: str | None = None
 
     class Config:
-        orm_mode = True
+        from_attributes = True
         use_enum_values = True
 
 
+class TransactionSearchResult(TransactionRead):
+    user_id: str
+
+
 # Schemas for student payment summary endpoint
 class StudentPaymentSummary(BaseModel):
     collection_id: str  # Zmieniono nazwę
@@ -82,3 +117,20 @@ class StudentPaymentSummaryBatchRequest(BaseModel):
 
 class StudentPaymentSummaryBatchResponse(BaseModel):
     summaries: List[StudentPaymentSummary]
+
+
+# Schemas for the family dashboard (parent's children summary)
+class ChildCollectionPayment(BaseModel):
+    collection_id: str
+    total_paid: Decimal = Field(..., decimal_places=2)
+
+
+class ChildPaymentSummary(BaseModel):
+    student_id: str
+    total_paid: Decimal = Field(..., decimal_places=2)
+    collections: List[ChildCollectionPayment]
+
+
+class ChildrenSummaryResponse(BaseModel):
+    balance: Decimal = Field(..., decimal_places=2)
+    children: List[ChildPaymentSummary]
@@ -1,12 +1,15 @@
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update
+from sqlalchemy import update, func
+from sqlalchemy.dialects.postgresql import insert
 from decimal import Decimal
 from fastapi import HTTPException, status
 
+from app.core.metrics import BALANCE_LOCK_WAIT, observe
 from app.models.account import Account
 from app.schemas.account import AccountRead
+from app.services.balance_cache import balance_cache
 
 
 class AccountService:
@@ -21,41 +24,142 @@ class AccountService:
         account = await self.get_account_by_user_id(db, user_id)
         if not account:
             print(f"Creating new account for user_id: {user_id}")
-            account = Account(user_id=user_id, balance=Decimal("0.00"))
-            db.add(account)
-            # Commit and refresh managed by caller or transaction context
-            await db.flush([account])  # Assign ID if needed before commit
+            # ON CONFLICT DO NOTHING keeps concurrent first requests from
+            # failing on the unique user_id; the loser re-reads the winner's row
+            result = await db.execute(
+                insert(Account)
+                .values(user_id=user_id, balance=Decimal("0.00"))
+                .on_conflict_do_nothing(index_elements=[Account.user_id])
+                .returning(Account)
+            )
+            account = result.scalars().first()
+            if not account:
+                account = await self.get_account_by_user_id(db, user_id)
             print(f"Account object created for {user_id}, pending commit.")
         return account
 
     async def get_account_details(self, db: AsyncSession, user_id: str) -> AccountRead:
-        account = await self.get_or_create_account(db, user_id)
-        return AccountRead.from_orm(account)
+        """
+        Read-only: a user without an account yet gets a zero balance; the
+        account row is created by the first deposit or payment.
+        """
+        if not db.info.get("strong_read"):
+            cached = balance_cache.get("user", user_id)
+            if cached is not None:
+                return cached
+        token = balance_cache.token()
+        account = await self.get_account_by_user_id(db, user_id)
+        if account is None:
+            account_read = AccountRead(user_id=user_id, balance=Decimal("0.00"))
+        else:
+            account_read = AccountRead.from_orm(account)
+        if not db.info.get("replica"):
+            balance_cache.put("user", user_id, account_read, token)
+        return account_read
 
     async def _update_balance_unsafe(
         self, db: AsyncSession, account_id: uuid.UUID, change: Decimal
     ) -> Account:
-        # Retrieve account with lock
-        result = await db.execute(
-            select(Account).filter(Account.id == account_id).with_for_update()
+        # Single conditional UPDATE: locks the row, checks funds and writes
+        # the new balance in one round trip
+        result = await self._execute_balance_update(
+            db,
+            update(Account)
+            .where(Account.id == account_id, Account.balance + change >= 0)
+            .values(balance=Account.balance + change)
+            .returning(Account),
         )
         account = result.scalars().first()
+        if not account:
+            exists = await db.scalar(
+                select(Account.id).filter(Account.id == account_id)
+            )
+            self._raise_balance_update_failed(account_missing=exists is None)
+        return account
 
+    async def _update_balance_by_user_id_unsafe(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        change: Decimal,
+        create_if_missing: bool = False,
+    ) -> Account:
+        """
+        Applies a balance change to the user's account in a single statement.
+        With create_if_missing, credits upsert the account and debits against a
+        missing account fail as insufficient funds (a new account starts at 0).
+        """
+        if create_if_missing and change >= 0:
+            stmt = insert(Account).values(user_id=user_id, balance=change)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Account.user_id],
+                set_={
+                    "balance": Account.balance + stmt.excluded.balance,
+                    "updated_at": func.now(),
+                },
+            ).returning(Account)
+            result = await self._execute_balance_update(
+                db, stmt, execution_options={"populate_existing": True}
+            )
+            return result.scalars().one()
+
+        result = await self._execute_balance_update(
+            db,
+            update(Account)
+            .where(Account.user_id == user_id, Account.balance + change >= 0)
+            .values(balance=Account.balance + change)
+            .returning(Account),
+        )
+        account = result.scalars().first()
         if not account:
+            account_missing = False
+            if not create_if_missing:
+                account_missing = (
+                    await db.scalar(
+                        select(Account.id).filter(Account.user_id == user_id)
+                    )
+                    is None
+                )
+            self._raise_balance_update_failed(account_missing=account_missing)
+        return account
+
+    async def _credit_accounts_by_user_id_unsafe(
+        self, db: AsyncSession, amounts: dict[str, Decimal]
+    ) -> dict[str, uuid.UUID]:
+        """
+        Credits several users with one multi-row upsert (one row per user,
+        accounts created as needed). Returns account ids keyed by user_id.
+        """
+        # Sorted rows keep lock order deterministic across concurrent batches
+        rows = [
+            {"user_id": user_id, "balance": amounts[user_id]}
+            for user_id in sorted(amounts)
+        ]
+        stmt = insert(Account).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Account.user_id],
+            set_={
+                "balance": Account.balance + stmt.excluded.balance,
+                "updated_at": func.now(),
+            },
+        ).returning(Account.user_id, Account.id)
+        result = await self._execute_balance_update(db, stmt)
+        return dict(result.all())
+
+    def _raise_balance_update_failed(self, account_missing: bool):
+        if account_missing:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Account not found during balance update",
             )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Insufficient funds"
+        )
 
-        new_balance = account.balance + change
-        if new_balance < 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, detail="Insufficient funds"
-            )
-
-        account.balance = new_balance
-        db.add(account)  # Add to session to mark modified
-        return account
+    async def _execute_balance_update(self, db: AsyncSession, stmt, **kwargs):
+        # Row-locking statement: its duration is mostly time spent waiting on the lock
+        with observe(BALANCE_LOCK_WAIT, account_type="user"):
+            return await db.execute(stmt, **kwargs)
 
 
 account_service = AccountService()
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+from pydantic import BaseModel
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core import database
+from app.core.config import (
+    BALANCE_CACHE_SIZE,
+    BALANCE_CACHE_TTL,
+    BALANCE_CACHE_NOTIFY,
+)
+from app.core.metrics import BALANCE_CACHE_REQUESTS
+
+NOTIFY_CHANNEL = "balance_cache"
+# Keeps each pg_notify payload well under the 8000 byte limit
+NOTIFY_KEYS_PER_MESSAGE = 50
+_PENDING_KEY = "balance_cache_invalidations"
+
+
+class BalanceCache:
+    """
+    Bounded LRU of account read models keyed by ("user", user_id) or
+    ("collection", collection_id).
+
+    Writers invalidate a key when they change the balance and again after
+    their commit, so a reader that loaded the old row in between cannot keep
+    it. Invalidations are stamped with a global counter; a reader takes a
+    token before querying and only stores its result if the key was not
+    invalidated since. Only values read from the primary are stored: a
+    replica read may predate a write whose invalidation has already passed,
+    and would then be served until it expires. With BALANCE_CACHE_NOTIFY, commits also send
+    pg_notify so other workers drop their copies; otherwise those copies
+    expire after BALANCE_CACHE_TTL.
+    """
+
+    def __init__(
+        self,
+        max_size: int = BALANCE_CACHE_SIZE,
+        ttl: float = BALANCE_CACHE_TTL,
+        notify: bool = BALANCE_CACHE_NOTIFY,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.notify = notify
+        self._entries: OrderedDict[tuple[str, str], tuple[float, BaseModel]] = (
+            OrderedDict()
+        )
+        self._clock = 0
+        self._invalidated_at: dict[tuple[str, str], int] = {}
+        # Keys dropped from _invalidated_at count as invalidated at this tick
+        self._floor = 0
+
+    def get(self, kind: str, key: str) -> BaseModel | None:
+        entry = self._entries.get((kind, key))
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end((kind, key))
+            BALANCE_CACHE_REQUESTS.labels(kind=kind, result="hit").inc()
+            return entry[1]
+        BALANCE_CACHE_REQUESTS.labels(kind=kind, result="miss").inc()
+        return None
+
+    def token(self) -> int:
+        """Taken before loading a value that will be passed to put()."""
+        return self._clock
+
+    def put(self, kind: str, key: str, value: BaseModel, token: int) -> None:
+        if self.max_size <= 0:
+            return
+        if self._invalidated_at.get((kind, key), self._floor) > token:
+            return  # changed while it was being loaded
+        self._entries[(kind, key)] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end((kind, key))
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[tuple[str, str]]) -> None:
+        self._clock += 1
+        for cache_key in keys:
+            self._entries.pop(cache_key, None)
+            self._invalidated_at[cache_key] = self._clock
+        if len(self._invalidated_at) > self.max_size:
+            self._invalidated_at.clear()
+            self._floor = self._clock
+
+    def clear(self) -> None:
+        self._clock += 1
+        self._entries.clear()
+        self._invalidated_at.clear()
+        self._floor = self._clock
+
+    def invalidate_on_commit(
+        self,
+        db: AsyncSession,
+        user_ids: Iterable[str] = (),
+        collection_ids: Iterable[str] = (),
+    ) -> None:
+        """Called by write paths for every balance they change."""
+        keys = [("user", u) for u in user_ids] + [
+            ("collection", c) for c in collection_ids
+        ]
+        self.invalidate(keys)
+        db.info.setdefault(_PENDING_KEY, set()).update(keys)
+
+    def _before_commit(self, session: Session) -> None:
+        keys = session.info.get(_PENDING_KEY)
+        # Also dispatched when a savepoint is released; notify once, at the end
+        if not keys or not self.notify or session.in_nested_transaction():
+            return
+        # NOTIFY is transactional: other workers hear it only if we commit
+        keys = sorted(keys)
+        for i in range(0, len(keys), NOTIFY_KEYS_PER_MESSAGE):
+            payload = json.dumps(keys[i : i + NOTIFY_KEYS_PER_MESSAGE])
+            session.execute(select(func.pg_notify(NOTIFY_CHANNEL, payload)))
+
+    def _after_transaction_end(self, session: Session, transaction) -> None:
+        # Only the outermost transaction ends with a commit or rollback;
+        # invalidating after a rollback just costs a cache miss
+        if transaction.parent is None:
+            keys = session.info.pop(_PENDING_KEY, None)
+            if keys:
+                self.invalidate(keys)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            self.invalidate(tuple(key) for key in json.loads(payload))
+        except (ValueError, TypeError):
+            self.clear()
+
+    async def listen(self) -> None:
+        """
+        Applies invalidations published by other workers. Holds one pooled
+        connection; clears the cache whenever it (re)connects, since
+        notifications sent while disconnected are lost.
+        """
+        while True:
+            try:
+                async with database.engine.connect() as conn:
+                    raw = (await conn.get_raw_connection()).driver_connection
+                    await raw.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                    self.clear()
+                    while True:
+                        await asyncio.sleep(30)
+                        await raw.execute("SELECT 1")  # detect dead connections
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Balance cache listener error: {e}")
+            self.clear()
+            await asyncio.sleep(5)
+
+
+balance_cache = BalanceCache()
+event.listen(Session, "before_commit", balance_cache._before_commit)
+event.listen(Session, "after_transaction_end", balance_cache._after_transaction_end)
@@ -0,0 +1,250 @@
+import asyncio
+import uuid
+from decimal import Decimal
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import BULK_REFUND_CHUNK_SIZE, BULK_REFUND_POLL_INTERVAL
+from app.core.database import get_sessionmaker
+from app.models.bulk_refund import BulkRefundJob, BulkRefundItem, BulkRefundStatus
+from app.models.collection_account import CollectionAccount
+from app.services.transaction_service import transaction_service
+
+UNFINISHED = [BulkRefundStatus.PENDING, BulkRefundStatus.RUNNING]
+
+
+class BulkRefundService:
+    """
+    Returns everything paid into a collection, as resumable jobs. Creating a
+    job lists the payers as job items; the worker then refunds them in
+    chunks of `chunk_size` accounts, each chunk in its own DB transaction
+    with one debit of the collection account. The amount refunded is each
+    account's net as of the chunk, computed with the collection account
+    locked, so refunds made in the meantime are not returned twice; the
+    last chunk also sweeps up accounts that paid after the job was created.
+    The chunk's refunds and the job's checkpoint commit together, so after
+    a crash the job continues after the last committed chunk.
+    """
+
+    async def get_job(self, db: AsyncSession, job_id: int) -> BulkRefundJob | None:
+        return await db.get(BulkRefundJob, job_id)
+
+    async def _get_unfinished_job(
+        self, db: AsyncSession, collection_id: str
+    ) -> BulkRefundJob | None:
+        return await db.scalar(
+            select(BulkRefundJob).filter(
+                BulkRefundJob.collection_id == collection_id,
+                BulkRefundJob.status.in_(UNFINISHED),
+            )
+        )
+
+    async def create_job(
+        self,
+        db: AsyncSession,
+        collection_id: str,
+        description: str | None = None,
+        chunk_size: int | None = None,
+    ) -> tuple[BulkRefundJob, bool]:
+        """
+        Starts a bulk refund of the collection, or returns the one already
+        running. Returns (job, created). Amounts already refunded are not in
+        the net, so a new job after a failed one only returns the rest.
+        """
+        job = await self._get_unfinished_job(db, collection_id)
+        if job is not None:
+            return job, False
+
+        nets = await transaction_service.get_collection_net_payments(db, collection_id)
+        try:
+            async with db.begin_nested():
+                job = BulkRefundJob(
+                    collection_id=collection_id,
+                    status=BulkRefundStatus.PENDING,
+                    description=description,
+                    chunk_size=chunk_size or BULK_REFUND_CHUNK_SIZE,
+                    total_items=len(nets),
+                    total_amount=sum(
+                        (net for _, net in nets.values()), Decimal("0.00")
+                    ),
+                    refunded_items=0,
+                    refunded_amount=Decimal("0.00"),
+                )
+                db.add(job)
+                await db.flush()
+                if nets:
+                    await db.execute(
+                        insert(BulkRefundItem),
+                        [
+                            {
+                                "job_id": job.id,
+                                "account_id": account_id,
+                                "user_id": user_id,
+                                "amount": net,
+                            }
+                            for account_id, (user_id, net) in nets.items()
+                        ],
+                    )
+        except IntegrityError:
+            # Created concurrently by another request
+            job = await self._get_unfinished_job(db, collection_id)
+            if job is None:
+                raise
+            return job, False
+        print(
+            f"Bulk refund job {job.id} created for collection {collection_id}: "
+            f"{job.total_items} accounts, {job.total_amount}"
+        )
+        return job, True
+
+    async def _fail(self, job_id: int, error: str) -> None:
+        async with get_sessionmaker()() as db:
+            await db.execute(
+                update(BulkRefundJob)
+                .where(BulkRefundJob.id == job_id)
+                .values(
+                    status=BulkRefundStatus.FAILED,
+                    error=error[:1000],
+                    finished_at=func.now(),
+                )
+            )
+            await db.commit()
+
+    async def _record_refunds(
+        self,
+        db: AsyncSession,
+        job_id: int,
+        nets: dict[uuid.UUID, tuple[str, Decimal]],
+    ) -> None:
+        """Adds the refunded nets to the job's items, creating missing ones."""
+        stmt = pg_insert(BulkRefundItem).values(
+            [
+                {
+                    "job_id": job_id,
+                    "account_id": account_id,
+                    "user_id": user_id,
+                    "amount": net,
+                }
+                for account_id, (user_id, net) in nets.items()
+            ]
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[BulkRefundItem.job_id, BulkRefundItem.account_id],
+                set_={"amount": BulkRefundItem.amount + stmt.excluded.amount},
+            )
+        )
+
+    async def run_chunk(self, job_id: int | None = None) -> BulkRefundJob | None:
+        """
+        Claims an unfinished job (the given one, or the oldest free one) and
+        refunds its next chunk. Returns the job as of the end of the chunk, or
+        None if there was nothing to claim. Jobs being run by another worker
+        are skipped.
+        """
+        async with get_sessionmaker()() as db:
+            query = (
+                select(BulkRefundJob)
+                .filter(BulkRefundJob.status.in_(UNFINISHED))
+                .order_by(BulkRefundJob.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            if job_id is not None:
+                query = query.filter(BulkRefundJob.id == job_id)
+            job = await db.scalar(query)
+            if job is None:
+                return None
+
+            items_query = (
+                select(BulkRefundItem)
+                .filter(BulkRefundItem.job_id == job.id)
+                .order_by(BulkRefundItem.account_id)
+                .limit(job.chunk_size)
+            )
+            if job.last_account_id is not None:
+                items_query = items_query.filter(
+                    BulkRefundItem.account_id > job.last_account_id
+                )
+            items = (await db.scalars(items_query)).all()
+            last_chunk = len(items) < job.chunk_size
+
+            job.status = BulkRefundStatus.RUNNING
+            for item in items:
+                item.amount = Decimal("0.00")  # Set to what is actually refunded
+            # Refunds debit this row, so none can commit while the nets are used
+            await db.execute(
+                select(CollectionAccount.id)
+                .filter(CollectionAccount.collection_id == job.collection_id)
+                .with_for_update()
+            )
+            # The last chunk also picks up accounts that paid after creation
+            nets = await transaction_service.get_collection_net_payments(
+                db,
+                job.collection_id,
+                account_ids=None if last_chunk else [i.account_id for i in items],
+            )
+            if nets:
+                try:
+                    await transaction_service.process_refunds_batch(
+                        db,
+                        collection_id=job.collection_id,
+                        refunds=list(nets.values()),
+                        description=job.description,
+                    )
+                except HTTPException as e:
+                    # e.g. the collection no longer holds the money
+                    failed_job_id = job.id
+                    await db.rollback()
+                    await self._fail(failed_job_id, str(e.detail))
+                    print(f"Bulk refund job {failed_job_id} failed: {e.detail}")
+                    raise
+                await self._record_refunds(db, job.id, nets)
+            if items:
+                job.last_account_id = items[-1].account_id
+            job.refunded_items += len(nets)
+            job.refunded_amount += sum(
+                (net for _, net in nets.values()), Decimal("0.00")
+            )
+            if last_chunk:
+                job.status = BulkRefundStatus.COMPLETED
+                job.finished_at = func.now()
+            await db.commit()
+            await db.refresh(job)
+
+        if job.status == BulkRefundStatus.COMPLETED:
+            print(
+                f"Bulk refund job {job.id} completed: {job.refunded_items} "
+                f"refunds, {job.refunded_amount} from collection {job.collection_id}"
+            )
+        return job
+
+    async def run_job(self, job_id: int) -> BulkRefundJob | None:
+        """Runs one job chunk by chunk until it is finished or claimed elsewhere."""
+        while True:
+            job = await self.run_chunk(job_id)
+            if job is None or job.status != BulkRefundStatus.RUNNING:
+                return job
+
+    async def run_periodically(self) -> None:
+        """Works through unfinished jobs; sleeps only when there are none."""
+        while True:
+            try:
+                job = await self.run_chunk()
+            except asyncio.CancelledError:
+                raise
+            except HTTPException:
+                job = None  # Already recorded on the job
+            except Exception as e:
+                print(f"Bulk refund worker error: {e}")
+                job = None
+            if job is None:
+                await asyncio.sleep(BULK_REFUND_POLL_INTERVAL)
+
+
+bulk_refund_service = BulkRefundService()
@@ -1,12 +1,19 @@
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update
+from sqlalchemy import update, delete, func, cast, literal, Integer, Numeric
+from sqlalchemy.dialects.postgresql import insert
 from decimal import Decimal
 from fastapi import HTTPException, status
 
-from app.models.collection_account import CollectionAccount  # , CollectionAccountStatus
+from app.core.config import COLLECTION_ACCOUNT_SLOTS
+from app.core.metrics import BALANCE_LOCK_WAIT, observe
+from app.models.collection_account import (
+    CollectionAccount,
+    CollectionAccountSlot,
+)  # , CollectionAccountStatus
 from app.schemas.collection_account import CollectionAccountRead
+from app.services.balance_cache import balance_cache
 
 
 class CollectionAccountService:  # Zmieniono nazwę klasy
@@ -30,13 +37,25 @@ class CollectionAccountService:  # Zmieniono nazwę klasy
         )  # Zmieniono wywołanie
         if not account:
             print(f"Creating new collection account for collection_id: {collection_id}")
-            account = CollectionAccount(  # Zmieniono model
-                collection_id=collection_id,  # Zmieniono pole
-                balance=Decimal("0.00"),
-                # status=CollectionAccountStatus.ACTIVE # Jeśli używasz statusu
+            # ON CONFLICT DO NOTHING makes concurrent first payments race-safe
+            result = await db.execute(
+                insert(CollectionAccount)
+                .values(
+                    collection_id=collection_id,
+                    balance=Decimal("0.00"),
+                    slot_count=COLLECTION_ACCOUNT_SLOTS,
+                    # status=CollectionAccountStatus.ACTIVE # Jeśli używasz statusu
+                )
+                .on_conflict_do_nothing(
+                    index_elements=[CollectionAccount.collection_id]
+                )
+                .returning(CollectionAccount)
             )
-            db.add(account)
-            await db.flush([account])  # Assign ID if needed before commit
+            account = result.scalars().first()
+            if not account:
+                account = await self.get_collection_account_by_collection_id(
+                    db, collection_id
+                )
             print(
                 f"Collection account object created for {collection_id}, pending commit."
             )
@@ -51,28 +70,144 @@ class CollectionAccountService:  # Zmieniono nazwę klasy
     async def get_collection_account_details(  # Zmieniono nazwę metody i parametr
         self, db: AsyncSession, collection_id: str
     ) -> CollectionAccountRead | None:
-        account = await self.get_collection_account_by_collection_id(
-            db, collection_id
-        )  # Zmieniono wywołanie
-        if account:
-            return CollectionAccountRead.from_orm(account)  # Zmieniono schemat
+        if not db.info.get("strong_read"):
+            cached = balance_cache.get("collection", collection_id)
+            if cached is not None:
+                return cached
+        token = balance_cache.token()
+        # Striped accounts keep part of the balance in slot rows
+        slot_balance = (
+            select(func.coalesce(func.sum(CollectionAccountSlot.balance), 0))
+            .where(CollectionAccountSlot.collection_account_id == CollectionAccount.id)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            select(CollectionAccount, slot_balance).filter(
+                CollectionAccount.collection_id == collection_id
+            )
+        )
+        row = result.first()
+        if row:
+            account, slots_total = row
+            account_read = CollectionAccountRead.from_orm(account)  # Zmieniono schemat
+            account_read.balance = account.balance + slots_total
+            if not db.info.get("replica"):
+                balance_cache.put("collection", collection_id, account_read, token)
+            return account_read
         return None
 
+    async def _credit_collection_account_unsafe(
+        self, db: AsyncSession, collection_id: str, amount: Decimal
+    ) -> None:
+        """
+        Credits the collection account, creating it on first payment.
+        Striped accounts (slot_count > 0) take the credit on a random slot
+        row, so concurrent payments only contend per slot instead of on the
+        account row.
+        """
+        stmt = insert(CollectionAccountSlot).from_select(
+            ["collection_account_id", "slot", "balance"],
+            select(
+                CollectionAccount.id,
+                cast(
+                    func.floor(func.random() * CollectionAccount.slot_count),
+                    Integer,
+                ),
+                literal(amount, Numeric(10, 2)),
+            ).where(
+                CollectionAccount.collection_id == collection_id,
+                CollectionAccount.slot_count > 0,
+            ),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                CollectionAccountSlot.collection_account_id,
+                CollectionAccountSlot.slot,
+            ],
+            set_={
+                "balance": CollectionAccountSlot.balance + stmt.excluded.balance,
+                "updated_at": func.now(),
+            },
+        ).returning(CollectionAccountSlot.collection_account_id)
+        result = await self._execute_balance_update(db, stmt)
+        if result.first():
+            return
+
+        await self._update_collection_balance_by_collection_id_unsafe(
+            db, collection_id=collection_id, change=amount, create_if_missing=True
+        )
+
+    async def compact_collection_account(
+        self, db: AsyncSession, collection_id: str
+    ) -> CollectionAccount | None:
+        """
+        Folds slot sub-balances back into the collection account row.
+        Runs before a debit that the base balance alone can't cover.
+        """
+        moved = (
+            delete(CollectionAccountSlot)
+            .where(
+                CollectionAccountSlot.collection_account_id
+                == select(CollectionAccount.id)
+                .where(CollectionAccount.collection_id == collection_id)
+                .scalar_subquery()
+            )
+            .returning(CollectionAccountSlot.balance)
+            .cte("moved")
+        )
+        result = await self._execute_balance_update(
+            db,
+            update(CollectionAccount)
+            .add_cte(moved)
+            .where(CollectionAccount.collection_id == collection_id)
+            .values(
+                balance=CollectionAccount.balance
+                + select(func.coalesce(func.sum(moved.c.balance), 0)).scalar_subquery()
+            )
+            .returning(CollectionAccount),
+            execution_options={"populate_existing": True},
+        )
+        return result.scalars().first()
+
+    async def set_collection_slot_count(
+        self, db: AsyncSession, collection_id: str, slot_count: int
+    ) -> CollectionAccount | None:
+        """Switches a collection account to (or out of) striped mode."""
+        account = await self.compact_collection_account(db, collection_id)
+        if account:
+            account.slot_count = slot_count
+            await db.flush([account])
+        return account
+
     async def _update_collection_balance_unsafe(  # Zmieniono nazwę metody i parametr
         self, db: AsyncSession, collection_account_id: uuid.UUID, change: Decimal
     ) -> CollectionAccount:
-        result = await db.execute(
-            select(CollectionAccount)
-            .filter(CollectionAccount.id == collection_account_id)
-            .with_for_update()  # Zmieniono model
+        # Single conditional UPDATE: lock, funds check and write in one round trip
+        result = await self._execute_balance_update(
+            db,
+            update(CollectionAccount)
+            .where(
+                CollectionAccount.id == collection_account_id,
+                CollectionAccount.balance + change >= 0,
+            )
+            .values(balance=CollectionAccount.balance + change)
+            .returning(CollectionAccount),
         )
         account = result.scalars().first()
 
         if not account:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Collection account not found during balance update",  # Zmieniono komunikat
+            collection_id = await db.scalar(
+                select(CollectionAccount.collection_id).filter(
+                    CollectionAccount.id == collection_account_id
+                )
             )
+            if collection_id is not None:
+                # Part of the balance may sit in slots; the collection_id path
+                # folds them in and reports the precise failure
+                return await self._update_collection_balance_by_collection_id_unsafe(
+                    db, collection_id=collection_id, change=change
+                )
+            self._raise_collection_balance_update_failed(collection_id)
 
         # Jeśli używasz statusu:
         # if account.status != CollectionAccountStatus.ACTIVE:
@@ -81,16 +216,85 @@ class CollectionAccountService:  # Zmieniono nazwę klasy
         #         detail=f"Cannot update balance for non-active collection ({account.collection_id}, status: {account.status})"
         #     )
 
-        new_balance = account.balance + change
-        if new_balance < 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient funds in collection account {account.collection_id} for this operation.",  # Zmieniono komunikat
+        return account
+
+    async def _update_collection_balance_by_collection_id_unsafe(
+        self,
+        db: AsyncSession,
+        collection_id: str,
+        change: Decimal,
+        create_if_missing: bool = False,
+    ) -> CollectionAccount:
+        """
+        Applies a balance change to the collection account in a single statement.
+        With create_if_missing, credits upsert the collection account.
+        """
+        if create_if_missing and change >= 0:
+            stmt = insert(CollectionAccount).values(
+                collection_id=collection_id,
+                balance=change,
+                slot_count=COLLECTION_ACCOUNT_SLOTS,
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[CollectionAccount.collection_id],
+                set_={
+                    "balance": CollectionAccount.balance + stmt.excluded.balance,
+                    "updated_at": func.now(),
+                },
+            ).returning(CollectionAccount)
+            result = await self._execute_balance_update(
+                db, stmt, execution_options={"populate_existing": True}
             )
+            return result.scalars().one()
 
-        account.balance = new_balance
-        db.add(account)
+        account = await self._apply_collection_balance_change(db, collection_id, change)
+        if not account and change < 0:
+            # Part of the balance may sit in slots, fold it in and retry once
+            if await self.compact_collection_account(db, collection_id):
+                account = await self._apply_collection_balance_change(
+                    db, collection_id, change
+                )
+        if not account:
+            exists = await db.scalar(
+                select(CollectionAccount.id).filter(
+                    CollectionAccount.collection_id == collection_id
+                )
+            )
+            self._raise_collection_balance_update_failed(
+                collection_id if exists is not None else None
+            )
         return account
 
+    async def _apply_collection_balance_change(
+        self, db: AsyncSession, collection_id: str, change: Decimal
+    ) -> CollectionAccount | None:
+        result = await self._execute_balance_update(
+            db,
+            update(CollectionAccount)
+            .where(
+                CollectionAccount.collection_id == collection_id,
+                CollectionAccount.balance + change >= 0,
+            )
+            .values(balance=CollectionAccount.balance + change)
+            .returning(CollectionAccount),
+        )
+        return result.scalars().first()
+
+    def _raise_collection_balance_update_failed(self, collection_id: str | None):
+        if collection_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Collection account not found during balance update",  # Zmieniono komunikat
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient funds in collection account {collection_id} for this operation.",  # Zmieniono komunikat
+        )
+
+    async def _execute_balance_update(self, db: AsyncSession, stmt, **kwargs):
+        # Row-locking statement: its duration is mostly time spent waiting on the lock
+        with observe(BALANCE_LOCK_WAIT, account_type="collection"):
+            return await db.execute(stmt, **kwargs)
+
 
 collection_account_service = CollectionAccountService()  # Zmieniono nazwę instancji
@@ -0,0 +1,191 @@
+import asyncio
+import random
+import uuid
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, List
+
+from sqlalchemy import Integer, Numeric, String, bindparam, delete, func, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import (
+    COLLECTION_ACCOUNT_SLOTS,
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+)
+from app.core.database import get_sessionmaker
+from app.models.collection_daily_stats import (
+    CollectionDailyStats,
+    CollectionDailyMember,
+)
+from app.schemas.collection_account import CollectionDailyStatsRead
+
+# Today in UTC, as seen by the transaction (now() is fixed per transaction,
+# so it is the same day the transaction rows get)
+TODAY = "(now() AT TIME ZONE 'UTC')::date"
+
+# One statement per call: remember the payers/students not yet counted today,
+# then add the amounts and the newly seen members to the day's slot row
+_APPLY = text(f"""
+    WITH seen AS (
+        INSERT INTO collection_daily_members (collection_id, day, kind, member)
+        SELECT m.collection_id, {TODAY}, m.kind, m.member
+        FROM unnest(:member_collections, :member_kinds, :members)
+            AS m(collection_id, kind, member)
+        ON CONFLICT DO NOTHING
+        RETURNING collection_id, kind
+    ), new_members AS (
+        SELECT collection_id,
+               COUNT(*) FILTER (WHERE kind = 'payer') AS payers,
+               COUNT(*) FILTER (WHERE kind = 'student') AS students
+        FROM seen GROUP BY collection_id
+    )
+    INSERT INTO collection_daily_stats AS s
+        (collection_id, day, slot, payments_count, payments_total,
+         refunds_count, refunds_total, payers, students)
+    SELECT v.collection_id, {TODAY}, :slot, v.payments_count, v.payments_total,
+           v.refunds_count, v.refunds_total,
+           COALESCE(n.payers, 0), COALESCE(n.students, 0)
+    FROM unnest(:collections, :payments_counts, :payments_totals,
+                :refunds_counts, :refunds_totals)
+        AS v(collection_id, payments_count, payments_total,
+             refunds_count, refunds_total)
+    LEFT JOIN new_members n ON n.collection_id = v.collection_id
+    ORDER BY v.collection_id
+    ON CONFLICT (collection_id, day, slot) DO UPDATE SET
+        payments_count = s.payments_count + excluded.payments_count,
+        payments_total = s.payments_total + excluded.payments_total,
+        refunds_count = s.refunds_count + excluded.refunds_count,
+        refunds_total = s.refunds_total + excluded.refunds_total,
+        payers = s.payers + excluded.payers,
+        students = s.students + excluded.students,
+        updated_at = now()
+    """).bindparams(
+    bindparam("member_collections", type_=ARRAY(String)),
+    bindparam("member_kinds", type_=ARRAY(String)),
+    bindparam("members", type_=ARRAY(String)),
+    bindparam("collections", type_=ARRAY(String)),
+    bindparam("payments_counts", type_=ARRAY(Integer)),
+    bindparam("payments_totals", type_=ARRAY(Numeric(12, 2))),
+    bindparam("refunds_counts", type_=ARRAY(Integer)),
+    bindparam("refunds_totals", type_=ARRAY(Numeric(12, 2))),
+)
+
+
+class CollectionStatsService:
+    """
+    Per-day payment/refund statistics of collections (collection_daily_stats),
+    kept up to date by the payment and refund paths so the stats endpoint
+    never has to aggregate transactions.
+    """
+
+    async def _apply(
+        self,
+        db: AsyncSession,
+        sums: dict[str, list],
+        members: Iterable[tuple[str, str, str]],
+    ) -> None:
+        collections = sorted(sums)
+        members = sorted(set(members))
+        await db.execute(
+            _APPLY,
+            {
+                "member_collections": [m[0] for m in members],
+                "member_kinds": [m[1] for m in members],
+                "members": [m[2] for m in members],
+                "collections": collections,
+                "payments_counts": [sums[c][0] for c in collections],
+                "payments_totals": [sums[c][1] for c in collections],
+                "refunds_counts": [sums[c][2] for c in collections],
+                "refunds_totals": [sums[c][3] for c in collections],
+                "slot": random.randrange(max(COLLECTION_ACCOUNT_SLOTS, 1)),
+            },
+        )
+
+    async def add_payments(
+        self,
+        db: AsyncSession,
+        account_id: uuid.UUID,
+        payments: Iterable[tuple[str, str | None, Decimal]],
+    ) -> None:
+        """
+        Counts completed payments (collection_id, student_id, amount) of one
+        account. Must run inside the transaction that records the payments.
+        """
+        sums: dict[str, list] = {}
+        members = []
+        for collection_id, student_id, amount in payments:
+            entry = sums.setdefault(collection_id, [0, Decimal("0.00"), 0, 0])
+            entry[0] += 1
+            entry[1] += amount
+            members.append((collection_id, "payer", str(account_id)))
+            if student_id is not None:
+                members.append((collection_id, "student", student_id))
+        if sums:
+            await self._apply(db, sums, members)
+
+    async def add_refunds(
+        self, db: AsyncSession, refunds: Iterable[tuple[str, Decimal]]
+    ) -> None:
+        """Counts completed refunds (collection_id, amount), in their transaction."""
+        sums: dict[str, list] = {}
+        for collection_id, amount in refunds:
+            entry = sums.setdefault(collection_id, [0, 0, 0, Decimal("0.00")])
+            entry[2] += 1
+            entry[3] += amount
+        if sums:
+            await self._apply(db, sums, [])
+
+    async def get_daily_stats(
+        self,
+        db: AsyncSession,
+        collection_id: str,
+        date_from: date,
+        date_to: date,
+    ) -> List[CollectionDailyStatsRead]:
+        """Days with activity in [date_from, date_to], oldest first."""
+        stats = CollectionDailyStats
+        result = await db.execute(
+            select(
+                stats.day,
+                func.sum(stats.payments_count).label("payments_count"),
+                func.sum(stats.payments_total).label("payments_total"),
+                func.sum(stats.refunds_count).label("refunds_count"),
+                func.sum(stats.refunds_total).label("refunds_total"),
+                func.sum(stats.payers).label("payers"),
+                func.sum(stats.students).label("students"),
+            )
+            .where(
+                stats.collection_id == collection_id,
+                stats.day >= date_from,
+                stats.day <= date_to,
+            )
+            .group_by(stats.day)
+            .order_by(stats.day)
+        )
+        return [CollectionDailyStatsRead.model_validate(row) for row in result]
+
+    async def prune_members(self, db: AsyncSession) -> int:
+        """Drops the member rows of days that can no longer get payments."""
+        result = await db.execute(
+            delete(CollectionDailyMember).where(
+                CollectionDailyMember.day < text(f"{TODAY} - 1")
+            )
+        )
+        return result.rowcount
+
+    async def run_periodically(self) -> None:
+        while True:
+            try:
+                async with get_sessionmaker()() as db:
+                    await self.prune_members(db)
+                    await db.commit()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Collection stats maintenance failed: {e}")
+            await asyncio.sleep(PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+
+
+collection_stats_service = CollectionStatsService()
@@ -0,0 +1,87 @@
+import asyncio
+from typing import List
+
+from app.core.config import (
+    DEPOSIT_GROUP_COMMIT_WINDOW_MS,
+    DEPOSIT_GROUP_COMMIT_MAX_BATCH,
+)
+from app.core.database import get_sessionmaker
+from app.core.metrics import DEPOSIT_BATCH_SIZE
+from app.schemas.transaction import TransactionDepositRequest, TransactionRead
+from app.services.transaction_service import transaction_service
+
+
+class DepositBatcher:
+    """
+    Group commit for deposits. Requests submitted within `window_ms` of the
+    first one, or until `max_batch` are queued, are applied together by
+    TransactionService.initiate_deposits_batch in one DB transaction; each
+    caller then receives its own TransactionRead (or the batch's error).
+    Batches are independent, so a slow commit does not block the next window.
+    """
+
+    def __init__(
+        self,
+        window_ms: float = DEPOSIT_GROUP_COMMIT_WINDOW_MS,
+        max_batch: int = DEPOSIT_GROUP_COMMIT_MAX_BATCH,
+    ):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending: List[tuple[str, TransactionDepositRequest, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    async def submit(
+        self, user_id: str, deposit_data: TransactionDepositRequest
+    ) -> TransactionRead:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((user_id, deposit_data, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush_pending()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush_pending)
+        # A cancelled caller does not withdraw its deposit from the batch
+        return await asyncio.shield(future)
+
+    def _flush_pending(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._apply(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _apply(
+        self, batch: List[tuple[str, TransactionDepositRequest, asyncio.Future]]
+    ) -> None:
+        DEPOSIT_BATCH_SIZE.observe(len(batch))
+        try:
+            async with get_sessionmaker()() as db:
+                try:
+                    results = await transaction_service.initiate_deposits_batch(
+                        db, [(user_id, data) for user_id, data, _ in batch]
+                    )
+                    await db.commit()
+                except Exception:
+                    await db.rollback()
+                    raise
+        except Exception as e:
+            print(f"Error during group-committed deposits: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self) -> None:
+        """Applies whatever is still queued and waits for running batches."""
+        self._flush_pending()
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+
+
+deposit_batcher = DepositBatcher()
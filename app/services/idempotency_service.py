@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import IDEMPOTENCY_CACHE_SIZE
+from app.models.idempotency_key import IdempotencyKey
+from app.schemas.transaction import TransactionRead
+
+
+class IdempotencyService:
+    """
+    Runs money-moving operations at most once per (user, Idempotency-Key).
+
+    Replays are answered from a bounded in-process LRU, or from the
+    idempotency_keys table, without touching account rows. The key row is
+    inserted in the same DB transaction as the operation, so a concurrent
+    request with the same key in another worker blocks on the unique index
+    until the first one commits or rolls back.
+    """
+
+    def __init__(self, cache_size: int = IDEMPOTENCY_CACHE_SIZE):
+        self._cache_size = cache_size
+        self._cache: OrderedDict[tuple[str, str], tuple[str, TransactionRead]] = (
+            OrderedDict()
+        )
+        self._in_flight: dict[tuple[str, str], asyncio.Future] = {}
+
+    async def execute(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        key: str | None,
+        endpoint: str,
+        request_data: BaseModel,
+        operation: Callable[[], Awaitable[TransactionRead]],
+    ) -> TransactionRead:
+        """Runs operation and commits, unless the key was already used."""
+        if key is None:
+            result = await operation()
+            await db.commit()
+            return result
+
+        cache_key = (user_id, key)
+        request_hash = hashlib.sha256(
+            f"{endpoint}:{request_data.model_dump_json()}".encode()
+        ).hexdigest()
+
+        while True:
+            cached = self._get_cached(cache_key, request_hash)
+            if cached is not None:
+                return cached
+            waiter = self._in_flight.get(cache_key)
+            if waiter is None:
+                break
+            # Same key still running in this process: wait for its outcome,
+            # then either replay it or (if it failed) run it ourselves
+            await asyncio.shield(waiter)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._in_flight[cache_key] = waiter
+        try:
+            return await self._execute_once(
+                db, user_id, key, endpoint, request_hash, operation
+            )
+        finally:
+            del self._in_flight[cache_key]
+            waiter.set_result(None)
+
+    async def _execute_once(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        key: str,
+        endpoint: str,
+        request_hash: str,
+        operation: Callable[[], Awaitable[TransactionRead]],
+    ) -> TransactionRead:
+        claimed = await db.execute(
+            insert(IdempotencyKey)
+            .values(
+                user_id=user_id,
+                key=key,
+                endpoint=endpoint,
+                request_hash=request_hash,
+            )
+            .on_conflict_do_nothing()
+            .returning(IdempotencyKey.key)
+        )
+        if claimed.first() is None:
+            stored = await db.execute(
+                select(IdempotencyKey.request_hash, IdempotencyKey.response).filter(
+                    IdempotencyKey.user_id == user_id, IdempotencyKey.key == key
+                )
+            )
+            stored_hash, response = stored.one()
+            await db.rollback()
+            self._check_request_hash(stored_hash, request_hash)
+            result = TransactionRead.model_validate(response)
+            self._remember((user_id, key), request_hash, result)
+            return result
+
+        result = await operation()
+        await db.execute(
+            update(IdempotencyKey)
+            .filter(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .values(response=result.model_dump(mode="json"))
+        )
+        await db.commit()
+        self._remember((user_id, key), request_hash, result)
+        return result
+
+    def _get_cached(
+        self, cache_key: tuple[str, str], request_hash: str
+    ) -> TransactionRead | None:
+        entry = self._cache.get(cache_key)
+        if entry is None:
+            return None
+        self._cache.move_to_end(cache_key)
+        stored_hash, result = entry
+        self._check_request_hash(stored_hash, request_hash)
+        return result
+
+    def _remember(
+        self, cache_key: tuple[str, str], request_hash: str, result: TransactionRead
+    ):
+        self._cache[cache_key] = (request_hash, result)
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def _check_request_hash(self, stored_hash: str, request_hash: str):
+        if stored_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request.",
+            )
+
+
+idempotency_service = IdempotencyService()
@@ -0,0 +1,59 @@
+from typing import List
+
+from sqlalchemy import String, cast, func, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.account import Account
+from app.models.outbox import OutboxEvent
+from app.models.transaction import Transaction
+
+
+def transaction_document():
+    """
+    JSON document of a transactions row plus the owning user_id, shared by
+    outbox events and the search index. Requires a join to Account.
+    """
+    return func.to_jsonb(Transaction.__table__.table_valued()).op("||")(
+        func.jsonb_build_object("user_id", Account.user_id)
+    )
+
+
+class OutboxService:
+
+    async def add_transaction_events(
+        self, db: AsyncSession, transactions: List[Transaction]
+    ) -> None:
+        """
+        Queues one "transaction.<type>" event per transaction for the publisher.
+        Must run inside the transaction that records them, so an event exists
+        if and only if its transaction was committed.
+        """
+        if not transactions:
+            return
+        # Payload is built from the stored row in the same statement, so server
+        # defaults (timestamp) are included without reading the rows back
+        source = (
+            select(
+                literal("transaction.") + func.lower(cast(Transaction.type, String)),
+                cast(Transaction.id, String),
+                transaction_document(),
+            )
+            .join(Account, Account.id == Transaction.account_id)
+            .where(
+                Transaction.id.in_([t.id for t in transactions]),
+                # Lets the planner prune to the partitions holding the rows
+                Transaction.timestamp.between(
+                    min(t.timestamp for t in transactions),
+                    max(t.timestamp for t in transactions),
+                ),
+            )
+        )
+        await db.execute(
+            OutboxEvent.__table__.insert().from_select(
+                ["event_type", "aggregate_id", "payload"], source
+            )
+        )
+
+
+outbox_service = OutboxService()
@@ -0,0 +1,165 @@
+import asyncio
+import re
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+from typing import AsyncIterator, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database
+
+from app.core.config import (
+    TRANSACTION_PARTITIONS_AHEAD,
+    TRANSACTION_PARTITION_RETENTION_MONTHS,
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+)
+from app.core.database import get_sessionmaker
+
+PARENT_TABLE = "transactions"
+LOCK_KEY = "hashtext('transactions_partitions')"
+DEFAULT_PARTITION = "transactions_default"
+_PARTITION_NAME = re.compile(r"^transactions_p(\d{4})_(\d{2})$")
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"transactions_p{month:%Y_%m}"
+
+
+class TransactionPartitionService:
+    """
+    Maintains the monthly range partitions of `transactions`
+    (transactions_pYYYY_MM, bounds in UTC) and the default partition that
+    catches rows outside them. Future months are created ahead of time so the
+    default partition stays empty; old months can be detached into standalone
+    tables for archiving.
+    """
+
+    async def lock(self, db: AsyncSession) -> None:
+        # Serializes maintenance across workers; released at commit
+        await db.execute(text(f"SELECT pg_advisory_xact_lock({LOCK_KEY})"))
+
+    @asynccontextmanager
+    async def locked_session(self, **options) -> AsyncIterator[AsyncSession]:
+        """
+        Session on a connection that takes the maintenance lock before its
+        first transaction and holds it until the session is closed. For
+        REPEATABLE READ work: its snapshot is taken by the first statement,
+        so it would predate a lock taken inside the transaction. `options`
+        are execution options for the connection, e.g. isolation_level.
+        """
+        async with database.engine.connect() as conn:
+            await conn.execute(text(f"SELECT pg_advisory_lock({LOCK_KEY})"))
+            await conn.commit()
+            try:
+                await conn.execution_options(**options)
+                async with get_sessionmaker()(bind=conn) as db:
+                    yield db
+            finally:
+                await conn.rollback()
+                await conn.execute(text(f"SELECT pg_advisory_unlock({LOCK_KEY})"))
+                await conn.commit()
+
+    async def list_partitions(self, db: AsyncSession) -> List[date]:
+        """Months that currently have an attached partition, oldest first."""
+        result = await db.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:parent AS regclass)"
+            ),
+            {"parent": PARENT_TABLE},
+        )
+        months = []
+        for (name,) in result:
+            match = _PARTITION_NAME.match(name)
+            if match:
+                months.append(date(int(match[1]), int(match[2]), 1))
+        return sorted(months)
+
+    async def ensure_partitions(
+        self,
+        db: AsyncSession,
+        months_ahead: int = TRANSACTION_PARTITIONS_AHEAD,
+        today: date | None = None,
+    ) -> List[str]:
+        """Creates missing partitions up to `months_ahead` months from now."""
+        await self.lock(db)
+        current = month_start(today or datetime.now(timezone.utc).date())
+        existing = set(await self.list_partitions(db))
+        created = []
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            await db.execute(
+                text(
+                    f"CREATE TABLE {partition_name(month)} PARTITION OF {PARENT_TABLE} "
+                    f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+                    f"TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+                )
+            )
+            created.append(partition_name(month))
+        await db.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} "
+                f"PARTITION OF {PARENT_TABLE} DEFAULT"
+            )
+        )
+        return created
+
+    async def detach_partitions_before(
+        self, db: AsyncSession, before: date
+    ) -> List[str]:
+        """
+        Detaches partitions whose whole month lies before `before`. The
+        detached tables keep their data and can be archived or dropped.
+        """
+        await self.lock(db)
+        detached = []
+        for month in await self.list_partitions(db):
+            if add_months(month, 1) > before:
+                break
+            await db.execute(
+                text(
+                    f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition_name(month)}"
+                )
+            )
+            detached.append(partition_name(month))
+        return detached
+
+    async def run_maintenance(self) -> None:
+        async with get_sessionmaker()() as db:
+            created = await self.ensure_partitions(db)
+            detached = []
+            if TRANSACTION_PARTITION_RETENTION_MONTHS > 0:
+                cutoff = add_months(
+                    month_start(datetime.now(timezone.utc).date()),
+                    -TRANSACTION_PARTITION_RETENTION_MONTHS,
+                )
+                detached = await self.detach_partitions_before(db, cutoff)
+            await db.commit()
+        if created or detached:
+            print(f"Partition maintenance: created {created}, detached {detached}")
+
+    async def run_periodically(self) -> None:
+        while True:
+            try:
+                await self.run_maintenance()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Partition maintenance failed: {e}")
+            await asyncio.sleep(PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+
+
+transaction_partition_service = TransactionPartitionService()
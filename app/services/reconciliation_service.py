@@ -0,0 +1,338 @@
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+from fastapi import HTTPException
+from sqlalchemy import (
+    BigInteger,
+    String,
+    and_,
+    case,
+    cast,
+    column,
+    delete,
+    desc,
+    func,
+    insert,
+    literal,
+    select,
+    table,
+    text,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import (
+    RECONCILIATION_SNAPSHOT_LAG_SECONDS,
+    RECONCILIATION_SNAPSHOTS_KEPT,
+    RECONCILIATION_MAX_REPORTED,
+)
+from app.models.balance_snapshot import BalanceSnapshot, BalanceSnapshotEntry
+from app.models.transaction import Transaction, TransactionType, TransactionStatus
+from app.schemas.reconciliation import BalanceMismatch, ReconciliationReport
+from app.services.partition_service import transaction_partition_service
+from app.services.transaction_archive_service import transaction_archive_service
+
+# Sign with which a transaction moves each balance; anything else (failed,
+# cancelled) leaves it untouched
+ACCOUNT_EFFECTS = {
+    (TransactionType.DEPOSIT, TransactionStatus.COMPLETED): 1,
+    (TransactionType.PAYMENT, TransactionStatus.COMPLETED): -1,
+    (TransactionType.REFUND, TransactionStatus.COMPLETED): 1,
+    # Withdrawals take the funds when requested, not when paid out
+    (TransactionType.WITHDRAWAL, TransactionStatus.PENDING): -1,
+    (TransactionType.WITHDRAWAL, TransactionStatus.COMPLETED): -1,
+}
+COLLECTION_EFFECTS = {
+    (TransactionType.PAYMENT, TransactionStatus.COMPLETED): 1,
+    (TransactionType.REFUND, TransactionStatus.COMPLETED): -1,
+}
+
+# Per-run scratch tables (dropped at commit)
+moves = table(
+    "reconciliation_moves",
+    column("kind"),
+    column("key"),
+    column("total"),
+    column("before"),
+    column("rows"),
+)
+ARCHIVE_INSERT_CHUNK = 10000
+
+
+def _signed_minor(effects: dict):
+    """SQL for the signed amount of a transaction, in integer minor units."""
+    sign = case(
+        *[
+            (and_(Transaction.type == type_, Transaction.status == status), value)
+            for (type_, status), value in effects.items()
+        ],
+        else_=0,
+    )
+    return sign * cast(Transaction.amount * 100, BigInteger)
+
+
+def _minor_to_decimal(value: int) -> Decimal:
+    return Decimal(value).scaleb(-2)
+
+
+def _parse_timestamp(value: str) -> datetime:
+    # Archived rows are pydantic JSON ("...Z"), which fromisoformat on
+    # Python < 3.11 does not accept
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class ReconciliationService:
+    """
+    Checks that accounts.balance and the collection account balances equal
+    the net of their transactions. All sums are done by the database (or, for
+    archived months, one block at a time) in integer minor units, so memory
+    does not grow with the number of transactions.
+
+    Each completed run stores a snapshot of the nets up to a checkpoint; the
+    next run adds only the transactions since that checkpoint. The checkpoint
+    trails now() by RECONCILIATION_SNAPSHOT_LAG_SECONDS and never passes a
+    PENDING transaction, so every transaction it covers is final.
+    """
+
+    async def _checkpoint(self, db: AsyncSession) -> datetime:
+        oldest_pending = await db.scalar(
+            select(func.min(Transaction.timestamp)).filter(
+                Transaction.status == TransactionStatus.PENDING
+            )
+        )
+        now = await db.scalar(select(func.now()))
+        checkpoint = now - timedelta(seconds=RECONCILIATION_SNAPSHOT_LAG_SECONDS)
+        if oldest_pending is not None:
+            checkpoint = min(checkpoint, oldest_pending)
+        return checkpoint
+
+    async def _add_hot_moves(
+        self, db: AsyncSession, since: datetime | None, checkpoint: datetime
+    ) -> None:
+        for kind, key, effects in (
+            ("account", cast(Transaction.account_id, String), ACCOUNT_EFFECTS),
+            ("collection", Transaction.collection_id, COLLECTION_EFFECTS),
+        ):
+            amount = _signed_minor(effects)
+            query = select(
+                literal(kind),
+                key,
+                func.sum(amount),
+                func.coalesce(
+                    func.sum(amount).filter(Transaction.timestamp < checkpoint), 0
+                ),
+                func.count() if kind == "account" else literal(0),
+            ).group_by(key)
+            if kind == "collection":
+                query = query.filter(Transaction.collection_id.is_not(None))
+            if since is not None:
+                query = query.filter(Transaction.timestamp >= since)
+            await db.execute(
+                insert(moves).from_select(
+                    ["kind", "key", "total", "before", "rows"], query
+                )
+            )
+
+    async def _add_archived_moves(
+        self, db: AsyncSession, since: datetime | None, checkpoint: datetime
+    ) -> None:
+        account_effects = {
+            (t.value, s.value): v for (t, s), v in ACCOUNT_EFFECTS.items()
+        }
+        collection_effects = {
+            (t.value, s.value): v for (t, s), v in COLLECTION_EFFECTS.items()
+        }
+        for segment in await transaction_archive_service.get_segments(
+            db, date_from=since
+        ):
+            # [total, before checkpoint, rows] per (kind, key), for one month
+            sums: dict[tuple[str, str], list[int]] = {}
+            async for rows in transaction_archive_service.iter_segment_blocks(segment):
+                for row in rows:
+                    timestamp = _parse_timestamp(row["timestamp"])
+                    if since is not None and timestamp < since:
+                        continue
+                    before = timestamp < checkpoint
+                    minor = int(Decimal(row["amount"]) * 100)
+                    effect = (row["type"], row["status"])
+                    entry = sums.setdefault(("account", row["account_id"]), [0, 0, 0])
+                    value = account_effects.get(effect, 0) * minor
+                    entry[0] += value
+                    entry[1] += value if before else 0
+                    entry[2] += 1
+                    if row["collection_id"] is not None:
+                        entry = sums.setdefault(
+                            ("collection", row["collection_id"]), [0, 0, 0]
+                        )
+                        value = collection_effects.get(effect, 0) * minor
+                        entry[0] += value
+                        entry[1] += value if before else 0
+            values = [
+                {"kind": kind, "key": key, "total": t, "before": b, "rows": n}
+                for (kind, key), (t, b, n) in sums.items()
+            ]
+            for start in range(0, len(values), ARCHIVE_INSERT_CHUNK):
+                await db.execute(
+                    insert(moves), values[start : start + ARCHIVE_INSERT_CHUNK]
+                )
+
+    async def _find_mismatches(
+        self, db: AsyncSession
+    ) -> tuple[int, List[BalanceMismatch]]:
+        count = 0
+        reported: List[BalanceMismatch] = []
+        result = await db.stream(text("""
+                SELECT 'account', COALESCE(a.id::text, n.key),
+                       CAST(a.balance * 100 AS bigint), COALESCE(n.total, 0)
+                FROM accounts a
+                FULL JOIN (
+                    SELECT key, total FROM reconciliation_nets WHERE kind = 'account'
+                ) n ON n.key = a.id::text
+                UNION ALL
+                SELECT 'collection', COALESCE(c.collection_id, n.key),
+                       CAST((c.balance + COALESCE(s.balance, 0)) * 100 AS bigint),
+                       COALESCE(n.total, 0)
+                FROM collection_accounts c
+                LEFT JOIN (
+                    SELECT collection_account_id, SUM(balance) AS balance
+                    FROM collection_account_slots GROUP BY collection_account_id
+                ) s ON s.collection_account_id = c.id
+                FULL JOIN (
+                    SELECT key, total FROM reconciliation_nets WHERE kind = 'collection'
+                ) n ON n.key = c.collection_id
+                """))
+        async for kind, key, stored, expected in result:
+            if stored == expected:
+                continue
+            count += 1
+            if len(reported) < RECONCILIATION_MAX_REPORTED:
+                reported.append(
+                    BalanceMismatch(
+                        kind=kind,
+                        key=key,
+                        stored_balance=(
+                            _minor_to_decimal(stored) if stored is not None else None
+                        ),
+                        expected_balance=_minor_to_decimal(expected),
+                        difference=_minor_to_decimal((stored or 0) - expected),
+                    )
+                )
+        return count, reported
+
+    async def reconcile(
+        self, full: bool = False, require_snapshot: bool = False
+    ) -> ReconciliationReport:
+        """
+        Runs one reconciliation in a single REPEATABLE READ transaction, so
+        balances and transactions are compared as of the same moment, and
+        stores a new snapshot. `full` ignores earlier snapshots. The partition
+        maintenance lock is held from before the snapshot, so no month can
+        move to the archive between the snapshot and reading it.
+        `require_snapshot` refuses to run when there is no earlier snapshot
+        to start from, as that run would read every transaction.
+        """
+        started = time.monotonic()
+        async with transaction_partition_service.locked_session(
+            isolation_level="REPEATABLE READ"
+        ) as db:
+            await db.execute(text("SET LOCAL statement_timeout = 0"))
+
+            base = None
+            if not full:
+                base = await db.scalar(
+                    select(BalanceSnapshot)
+                    .order_by(desc(BalanceSnapshot.checkpoint))
+                    .limit(1)
+                )
+            if base is None and require_snapshot:
+                raise HTTPException(
+                    status_code=409,
+                    detail="No earlier snapshot to start from, run the "
+                    "reconcile_balances command for the first reconciliation",
+                )
+            since = base.checkpoint if base is not None else None
+            checkpoint = await self._checkpoint(db)
+            if since is not None:
+                checkpoint = max(checkpoint, since)
+
+            await db.execute(
+                text(
+                    "CREATE TEMP TABLE reconciliation_moves "
+                    "(kind text, key text, total bigint, before bigint, rows bigint) "
+                    "ON COMMIT DROP"
+                )
+            )
+            if base is not None:
+                await db.execute(
+                    insert(moves).from_select(
+                        ["kind", "key", "total", "before", "rows"],
+                        select(
+                            BalanceSnapshotEntry.kind,
+                            BalanceSnapshotEntry.key,
+                            BalanceSnapshotEntry.net_minor,
+                            BalanceSnapshotEntry.net_minor,
+                            literal(0),
+                        ).filter(BalanceSnapshotEntry.snapshot_id == base.id),
+                    )
+                )
+            await self._add_hot_moves(db, since, checkpoint)
+            await self._add_archived_moves(db, since, checkpoint)
+            await db.execute(
+                text(
+                    "CREATE TEMP TABLE reconciliation_nets ON COMMIT DROP AS "
+                    "SELECT kind, key, SUM(total) AS total, SUM(before) AS before, "
+                    "SUM(rows) AS rows FROM reconciliation_moves GROUP BY kind, key"
+                )
+            )
+
+            mismatch_count, mismatches = await self._find_mismatches(db)
+            snapshot = BalanceSnapshot(
+                checkpoint=checkpoint,
+                transactions_checked=await db.scalar(
+                    text(
+                        "SELECT COALESCE(SUM(rows), 0) FROM reconciliation_nets "
+                        "WHERE kind = 'account'"
+                    )
+                ),
+                accounts_checked=await db.scalar(text("SELECT count(*) FROM accounts")),
+                collections_checked=await db.scalar(
+                    text("SELECT count(*) FROM collection_accounts")
+                ),
+                mismatches=mismatch_count,
+            )
+            db.add(snapshot)
+            await db.flush()
+            await db.execute(
+                text(
+                    "INSERT INTO balance_snapshot_entries "
+                    "(snapshot_id, kind, key, net_minor) "
+                    "SELECT :snapshot_id, kind, key, before FROM reconciliation_nets "
+                    "WHERE before <> 0"
+                ),
+                {"snapshot_id": snapshot.id},
+            )
+            kept = (
+                select(BalanceSnapshot.id)
+                .order_by(desc(BalanceSnapshot.checkpoint))
+                .limit(max(RECONCILIATION_SNAPSHOTS_KEPT, 1))
+            )
+            await db.execute(
+                delete(BalanceSnapshot).where(BalanceSnapshot.id.not_in(kept))
+            )
+            await db.commit()
+
+        return ReconciliationReport(
+            snapshot_id=snapshot.id,
+            base_checkpoint=since,
+            checkpoint=checkpoint,
+            transactions_checked=snapshot.transactions_checked,
+            accounts_checked=snapshot.accounts_checked,
+            collections_checked=snapshot.collections_checked,
+            mismatch_count=mismatch_count,
+            mismatches=mismatches,
+            duration_seconds=round(time.monotonic() - started, 3),
+        )
+
+
+reconciliation_service = ReconciliationService()
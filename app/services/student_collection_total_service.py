@@ -0,0 +1,206 @@
+from decimal import Decimal
+from typing import List
+
+from sqlalchemy import Numeric, String, bindparam, delete, func, text, union_all
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.student_collection_total import StudentCollectionTotal
+from app.models.transaction import Transaction, TransactionType, TransactionStatus
+from app.services.partition_service import transaction_partition_service
+from app.services.transaction_archive_service import transaction_archive_service
+
+# Upper bound of pairs sent in one lookup statement
+TOTALS_LOOKUP_CHUNK_SIZE = 5000
+
+
+class StudentCollectionTotalService:
+
+    async def add_payments(
+        self, db: AsyncSession, amounts: dict[tuple[str, str], Decimal]
+    ) -> None:
+        """
+        Adds paid amounts keyed by (collection_id, student_id) to the read model.
+        Must run inside the transaction that records the payments.
+        """
+        if not amounts:
+            return
+        # Sorted keys keep row lock order deterministic across concurrent batches
+        rows = [
+            {"collection_id": c, "student_id": s, "total_paid": amounts[(c, s)]}
+            for c, s in sorted(amounts)
+        ]
+        stmt = insert(StudentCollectionTotal).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                StudentCollectionTotal.collection_id,
+                StudentCollectionTotal.student_id,
+            ],
+            set_={
+                "total_paid": StudentCollectionTotal.total_paid
+                + stmt.excluded.total_paid,
+                "updated_at": func.now(),
+            },
+        )
+        await db.execute(stmt)
+
+    async def get_totals(
+        self, db: AsyncSession, pairs: List[tuple[str, str]]
+    ) -> dict[tuple[str, str], Decimal]:
+        totals: dict[tuple[str, str], Decimal] = {}
+        for start in range(0, len(pairs), TOTALS_LOOKUP_CHUNK_SIZE):
+            chunk = pairs[start : start + TOTALS_LOOKUP_CHUNK_SIZE]
+            totals.update(await self._get_totals_chunk(db, chunk))
+        return totals
+
+    async def _get_totals_chunk(
+        self, db: AsyncSession, pairs: List[tuple[str, str]]
+    ) -> dict[tuple[str, str], Decimal]:
+        # Join against unnest() of two array parameters: the statement and its
+        # plan stay the same size no matter how many pairs are requested
+        requested = (
+            func.unnest(
+                bindparam("collection_ids", [c for c, _ in pairs], ARRAY(String)),
+                bindparam("student_ids", [s for _, s in pairs], ARRAY(String)),
+            )
+            .table_valued("collection_id", "student_id")
+            .render_derived(name="requested")
+        )
+        result = await db.execute(
+            select(
+                StudentCollectionTotal.collection_id,
+                StudentCollectionTotal.student_id,
+                StudentCollectionTotal.total_paid,
+            ).join(
+                requested,
+                (StudentCollectionTotal.collection_id == requested.c.collection_id)
+                & (StudentCollectionTotal.student_id == requested.c.student_id),
+            )
+        )
+        return {(row.collection_id, row.student_id): row.total_paid for row in result}
+
+    async def get_totals_for_students(
+        self, db: AsyncSession, student_ids: List[str]
+    ) -> List[StudentCollectionTotal]:
+        if not student_ids:
+            return []
+        result = await db.execute(
+            select(StudentCollectionTotal)
+            .where(
+                StudentCollectionTotal.student_id
+                == func.any(bindparam("student_ids", student_ids, ARRAY(String)))
+            )
+            .order_by(
+                StudentCollectionTotal.student_id, StudentCollectionTotal.collection_id
+            )
+        )
+        return list(result.scalars().all())
+
+    async def _paid_from_archive(
+        self, db: AsyncSession
+    ) -> dict[tuple[str, str], Decimal]:
+        """Completed payments in archived months, per (collection, student)."""
+        paid: dict[tuple[str, str], Decimal] = {}
+        for segment in await transaction_archive_service.get_segments(db):
+            async for rows in transaction_archive_service.iter_segment_blocks(segment):
+                for row in rows:
+                    if (
+                        row["type"] != TransactionType.PAYMENT.value
+                        or row["status"] != TransactionStatus.COMPLETED.value
+                        or row["collection_id"] is None
+                        or row["student_id"] is None
+                    ):
+                        continue
+                    key = (row["collection_id"], row["student_id"])
+                    paid[key] = paid.get(key, Decimal("0.00")) + Decimal(row["amount"])
+        return paid
+
+    async def _paid_from_transactions(self, db: AsyncSession):
+        """
+        Expected totals: completed payments in `transactions` plus those in
+        archived months. Holds the partition maintenance lock until the
+        caller's transaction ends, so no month moves to the archive in
+        between and is counted twice or not at all.
+        """
+        await transaction_partition_service.lock(db)
+        hot = select(
+            Transaction.collection_id,
+            Transaction.student_id,
+            Transaction.amount,
+        ).where(
+            Transaction.type == TransactionType.PAYMENT,
+            Transaction.status == TransactionStatus.COMPLETED,
+            Transaction.collection_id.is_not(None),
+            Transaction.student_id.is_not(None),
+        )
+        archived = await self._paid_from_archive(db)
+        if archived:
+            pairs = list(archived)
+            archived_rows = select(
+                func.unnest(
+                    bindparam("collection_ids", [c for c, _ in pairs], ARRAY(String)),
+                    bindparam("student_ids", [s for _, s in pairs], ARRAY(String)),
+                    bindparam("amounts", list(archived.values()), ARRAY(Numeric)),
+                )
+                .table_valued("collection_id", "student_id", "amount")
+                .render_derived(name="archived")
+            )
+            paid = union_all(hot, archived_rows).subquery()
+        else:
+            paid = hot.subquery()
+        return select(
+            paid.c.collection_id,
+            paid.c.student_id,
+            func.sum(paid.c.amount).label("total_paid"),
+        ).group_by(paid.c.collection_id, paid.c.student_id)
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        """
+        Recomputes the whole read model from transactions, archived months
+        included. Caller commits.
+        """
+        # Blocks concurrent add_payments until commit, so no payment is lost
+        # or counted twice while the table is rebuilt
+        await db.execute(text("LOCK TABLE student_collection_totals IN EXCLUSIVE MODE"))
+        expected = await self._paid_from_transactions(db)
+        await db.execute(delete(StudentCollectionTotal))
+        result = await db.execute(
+            insert(StudentCollectionTotal).from_select(
+                ["collection_id", "student_id", "total_paid"], expected
+            )
+        )
+        return result.rowcount
+
+    async def verify(self, db: AsyncSession) -> list[dict]:
+        """Returns the (collection, student) pairs whose stored total is wrong."""
+        expected = (await self._paid_from_transactions(db)).subquery()
+        stored = StudentCollectionTotal
+        result = await db.execute(
+            select(
+                func.coalesce(expected.c.collection_id, stored.collection_id).label(
+                    "collection_id"
+                ),
+                func.coalesce(expected.c.student_id, stored.student_id).label(
+                    "student_id"
+                ),
+                func.coalesce(expected.c.total_paid, 0).label("expected"),
+                func.coalesce(stored.total_paid, 0).label("stored"),
+            )
+            .select_from(
+                expected.join(
+                    stored,
+                    (expected.c.collection_id == stored.collection_id)
+                    & (expected.c.student_id == stored.student_id),
+                    full=True,
+                )
+            )
+            .where(
+                func.coalesce(expected.c.total_paid, 0)
+                != func.coalesce(stored.total_paid, 0)
+            )
+        )
+        return [dict(row._mapping) for row in result]
+
+
+student_collection_total_service = StudentCollectionTotalService()
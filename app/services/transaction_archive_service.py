@@ -0,0 +1,482 @@
+import asyncio
+import gzip
+import json
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import AsyncIterator, List
+
+from sqlalchemy import exists, insert, or_, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.clients.object_store import ObjectStore, get_archive_store
+from app.core.config import (
+    TRANSACTION_ARCHIVE_AFTER_MONTHS,
+    ARCHIVE_BLOCK_ROWS,
+    ARCHIVE_MANIFEST_CACHE_SIZE,
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+)
+from app.core.database import get_sessionmaker
+from app.models.transaction import Transaction, TransactionType, TransactionStatus
+from app.models.transaction_archive_segment import (
+    TransactionArchiveSegment,
+    TransactionArchiveAccount,
+)
+from app.schemas.transaction import TransactionRead
+from app.services.partition_service import (
+    PARENT_TABLE,
+    add_months,
+    month_start,
+    partition_name,
+    transaction_partition_service,
+)
+
+MANIFEST_VERSION = 1
+
+
+def month_bounds(month: date) -> tuple[datetime, datetime]:
+    return (
+        datetime.combine(month, time(), timezone.utc),
+        datetime.combine(add_months(month, 1), time(), timezone.utc),
+    )
+
+
+def segment_keys(month: date) -> tuple[str, str]:
+    prefix = f"transactions/{month:%Y/%m}"
+    return f"{prefix}.ndjson.gz", f"{prefix}.manifest.json"
+
+
+class SegmentWriter:
+    """
+    Builds one segment: NDJSON rows sorted by (account_id, timestamp, id),
+    gzip-compressed in blocks of up to `block_rows` rows. Each block is a
+    separate gzip member, so a reader can fetch and inflate just the blocks
+    the manifest points it to. The manifest keeps the account range of every
+    block and the blocks each collection appears in; `accounts` counts the
+    rows of every account, for transaction_archive_accounts.
+    """
+
+    def __init__(self, month: date, block_rows: int = ARCHIVE_BLOCK_ROWS):
+        self.month = month
+        self.block_rows = block_rows
+        self.data = bytearray()
+        self.blocks: list[dict] = []
+        self.collections: dict[str, list[int]] = {}
+        self.accounts: dict[str, int] = {}
+        self.rows = 0
+        self._lines: list[bytes] = []
+        self._first_account: str | None = None
+        self._last_account: str | None = None
+        self._block_collections: set[str] = set()
+
+    def add(self, transaction: TransactionRead) -> None:
+        if len(self._lines) >= self.block_rows:
+            self._close_block()
+        account_id = str(transaction.account_id)
+        if self._first_account is None:
+            self._first_account = account_id
+        self._last_account = account_id
+        self.accounts[account_id] = self.accounts.get(account_id, 0) + 1
+        if transaction.collection_id is not None:
+            self._block_collections.add(transaction.collection_id)
+        self._lines.append(transaction.model_dump_json().encode() + b"\n")
+        self.rows += 1
+
+    def _close_block(self) -> None:
+        if not self._lines:
+            return
+        compressed = gzip.compress(b"".join(self._lines), compresslevel=6)
+        block_id = len(self.blocks)
+        self.blocks.append(
+            {
+                "offset": len(self.data),
+                "length": len(compressed),
+                "rows": len(self._lines),
+                "first_account": self._first_account,
+                "last_account": self._last_account,
+            }
+        )
+        for collection_id in self._block_collections:
+            self.collections.setdefault(collection_id, []).append(block_id)
+        self.data += compressed
+        self._lines = []
+        self._first_account = self._last_account = None
+        self._block_collections = set()
+
+    def finish(self) -> tuple[bytes, dict]:
+        self._close_block()
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "month": f"{self.month:%Y-%m}",
+            "rows": self.rows,
+            "blocks": self.blocks,
+            "collections": self.collections,
+        }
+        return bytes(self.data), manifest
+
+
+def _decode_block(data: bytes, account_id: str | None, collection_id: str | None):
+    # Rows are written by model_dump_json, so a byte match on the serialized
+    # field skips json parsing of the rows we don't want
+    needles = []
+    if account_id is not None:
+        needles.append(f'"account_id":"{account_id}"'.encode())
+    if collection_id is not None:
+        needles.append(f'"collection_id":{json.dumps(collection_id)}'.encode())
+    rows = []
+    for line in gzip.decompress(data).splitlines():
+        if all(needle in line for needle in needles):
+            rows.append(TransactionRead.model_validate_json(line))
+    return rows
+
+
+def _load_block(data: bytes) -> List[dict]:
+    return [json.loads(line) for line in gzip.decompress(data).splitlines()]
+
+
+class TransactionArchiveService:
+    """
+    Cold storage for closed months of `transactions`. Archiving a month
+    writes its partition to a compressed segment in the object store,
+    records it in `transaction_archive_segments` and drops the partition.
+    Reads that reach past the hot data continue into the segments, using
+    the manifests to fetch only the blocks of the requested account or
+    collection. Which months hold rows of an account is recorded in
+    `transaction_archive_accounts`, so account reads skip the other months
+    without touching the store.
+    """
+
+    def __init__(self, store: ObjectStore | None = None):
+        self._store = store
+        self._manifests: OrderedDict[str, dict] = OrderedDict()
+
+    @property
+    def store(self) -> ObjectStore:
+        if self._store is None:
+            self._store = get_archive_store()
+        return self._store
+
+    # --- Writing ---
+
+    async def archive_month(
+        self, db: AsyncSession, month: date
+    ) -> TransactionArchiveSegment | None:
+        """
+        Moves one monthly partition into the archive. The partition is locked
+        against writes while it is copied and is dropped in the same DB
+        transaction that records the segment; the caller commits.
+        Returns None if the month has no partition (e.g. another worker
+        archived it first) or still holds PENDING transactions (withdrawals
+        awaiting payout), which must stay writable until they are settled.
+        """
+        await transaction_partition_service.lock(db)
+        if month not in await transaction_partition_service.list_partitions(db):
+            return None
+        table = partition_name(month)
+        await db.execute(text(f"LOCK TABLE {table} IN SHARE MODE"))
+
+        start, end = month_bounds(month)
+        if await db.scalar(
+            select(
+                exists().where(
+                    Transaction.timestamp >= start,
+                    Transaction.timestamp < end,
+                    Transaction.status == TransactionStatus.PENDING,
+                )
+            )
+        ):
+            print(f"Not archiving {table} yet: it has pending transactions")
+            return None
+        writer = SegmentWriter(month)
+        # Keyset batches rather than a server-side cursor: an open portal
+        # would keep the partition from being dropped in this transaction
+        order = (Transaction.account_id, Transaction.timestamp, Transaction.id)
+        last = None
+        while True:
+            query = (
+                select(Transaction)
+                .filter(Transaction.timestamp >= start, Transaction.timestamp < end)
+                .order_by(*order)
+                .limit(ARCHIVE_BLOCK_ROWS)
+            )
+            if last is not None:
+                query = query.filter(tuple_(*order) > tuple_(*last))
+            batch = (await db.execute(query)).scalars().all()
+            for transaction in batch:
+                writer.add(TransactionRead.from_orm(transaction))
+            if len(batch) < ARCHIVE_BLOCK_ROWS:
+                break
+            last = (batch[-1].account_id, batch[-1].timestamp, batch[-1].id)
+            db.expunge_all()
+        data, manifest = writer.finish()
+
+        # Objects first: if the commit below fails they are just overwritten
+        # by the next attempt
+        object_key, manifest_key = segment_keys(month)
+        await self.store.put(object_key, data)
+        await self.store.put(manifest_key, json.dumps(manifest).encode())
+
+        segment = TransactionArchiveSegment(
+            month=month,
+            object_key=object_key,
+            manifest_key=manifest_key,
+            row_count=writer.rows,
+            size_bytes=len(data),
+            accounts_indexed=True,
+        )
+        db.add(segment)
+        await db.flush()
+        await self._add_accounts(db, month, writer.accounts)
+        await db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {table}"))
+        await db.execute(text(f"DROP TABLE {table}"))
+        return segment
+
+    async def _add_accounts(
+        self, db: AsyncSession, month: date, accounts: dict[str, int]
+    ) -> None:
+        if accounts:
+            await db.execute(
+                insert(TransactionArchiveAccount),
+                [
+                    {"account_id": uuid.UUID(a), "month": month, "row_count": n}
+                    for a, n in accounts.items()
+                ],
+            )
+
+    async def index_archived_accounts(self) -> int:
+        """
+        Fills transaction_archive_accounts for segments written before it
+        existed, one segment per DB transaction. Returns the number indexed.
+        """
+        indexed = 0
+        while True:
+            async with get_sessionmaker()() as db:
+                segment = await db.scalar(
+                    select(TransactionArchiveSegment)
+                    .filter(TransactionArchiveSegment.accounts_indexed.is_(False))
+                    .order_by(TransactionArchiveSegment.month)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )
+                if segment is None:
+                    return indexed
+                accounts: dict[str, int] = {}
+                async for rows in self.iter_segment_blocks(segment):
+                    for row in rows:
+                        account_id = row["account_id"]
+                        accounts[account_id] = accounts.get(account_id, 0) + 1
+                await self._add_accounts(db, segment.month, accounts)
+                segment.accounts_indexed = True
+                await db.commit()
+            indexed += 1
+
+    async def archive_before(self, before: date) -> List[date]:
+        """Archives every monthly partition whose whole month lies before `before`."""
+        await self.index_archived_accounts()
+        async with get_sessionmaker()() as db:
+            months = [
+                month
+                for month in await transaction_partition_service.list_partitions(db)
+                if add_months(month, 1) <= before
+            ]
+        archived = []
+        for month in months:
+            async with get_sessionmaker()() as db:
+                segment = await self.archive_month(db, month)
+                await db.commit()
+            if segment is None:
+                continue
+            print(
+                f"Archived {partition_name(month)}: {segment.row_count} rows, "
+                f"{segment.size_bytes} bytes"
+            )
+            archived.append(month)
+        return archived
+
+    async def run_periodically(self) -> None:
+        while True:
+            try:
+                cutoff = add_months(
+                    month_start(datetime.now(timezone.utc).date()),
+                    -TRANSACTION_ARCHIVE_AFTER_MONTHS,
+                )
+                await self.archive_before(cutoff)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Transaction archival failed: {e}")
+            await asyncio.sleep(PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+
+    # --- Reading ---
+
+    async def get_segments(
+        self,
+        db: AsyncSession,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        account_id: uuid.UUID | None = None,
+    ) -> List[TransactionArchiveSegment]:
+        """
+        Archived months overlapping [date_from, date_to), oldest first; with
+        an account, only the months holding rows of that account.
+        """
+        query = select(TransactionArchiveSegment).order_by(
+            TransactionArchiveSegment.month
+        )
+        if account_id is not None:
+            query = query.filter(
+                or_(
+                    TransactionArchiveSegment.accounts_indexed.is_(False),
+                    exists().where(
+                        TransactionArchiveAccount.account_id == account_id,
+                        TransactionArchiveAccount.month
+                        == TransactionArchiveSegment.month,
+                    ),
+                )
+            )
+        if date_from is not None:
+            query = query.filter(
+                TransactionArchiveSegment.month >= month_start(_utc(date_from).date())
+            )
+        if date_to is not None:
+            last = _utc(date_to) - timedelta(microseconds=1)
+            query = query.filter(
+                TransactionArchiveSegment.month <= month_start(last.date())
+            )
+        result = await db.execute(query)
+        return list(result.scalars().all())
+
+    async def _get_manifest(self, segment: TransactionArchiveSegment) -> dict:
+        # Segments are immutable, so manifests can be cached for good
+        manifest = self._manifests.get(segment.manifest_key)
+        if manifest is None:
+            manifest = json.loads(await self.store.get(segment.manifest_key))
+            self._manifests[segment.manifest_key] = manifest
+            while len(self._manifests) > ARCHIVE_MANIFEST_CACHE_SIZE:
+                self._manifests.popitem(last=False)
+        else:
+            self._manifests.move_to_end(segment.manifest_key)
+        return manifest
+
+    async def _read_segment(
+        self,
+        segment: TransactionArchiveSegment,
+        account_id: uuid.UUID | None = None,
+        collection_id: str | None = None,
+    ) -> List[TransactionRead]:
+        """Rows of one segment for the account and/or collection, unordered."""
+        manifest = await self._get_manifest(segment)
+        blocks = manifest["blocks"]
+        block_ids = set(range(len(blocks)))
+        account = str(account_id) if account_id is not None else None
+        if account is not None:
+            block_ids &= {
+                i
+                for i, block in enumerate(blocks)
+                if block["first_account"] <= account <= block["last_account"]
+            }
+        if collection_id is not None:
+            block_ids &= set(manifest["collections"].get(collection_id, []))
+
+        rows: List[TransactionRead] = []
+        # Adjacent blocks are fetched with one ranged read
+        for run in _consecutive_runs(sorted(block_ids)):
+            first, last = blocks[run[0]], blocks[run[-1]]
+            data = await self.store.get(
+                segment.object_key,
+                offset=first["offset"],
+                length=last["offset"] + last["length"] - first["offset"],
+            )
+            for block_id in run:
+                block = blocks[block_id]
+                start = block["offset"] - first["offset"]
+                rows += await asyncio.to_thread(
+                    _decode_block,
+                    data[start : start + block["length"]],
+                    account,
+                    collection_id,
+                )
+        return rows
+
+    async def iter_segment_blocks(
+        self, segment: TransactionArchiveSegment
+    ) -> AsyncIterator[List[dict]]:
+        """All rows of a segment as raw JSON dicts, one block at a time."""
+        manifest = await self._get_manifest(segment)
+        for block in manifest["blocks"]:
+            data = await self.store.get(
+                segment.object_key, offset=block["offset"], length=block["length"]
+            )
+            yield await asyncio.to_thread(_load_block, data)
+
+    async def get_account_transactions(
+        self,
+        db: AsyncSession,
+        account_id: uuid.UUID,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: tuple[datetime, uuid.UUID] | None = None,
+    ) -> List[TransactionRead]:
+        """Archived history of an account, newest first, paged like the hot one."""
+        segments = await self.get_segments(
+            db,
+            date_to=cursor[0] + timedelta(microseconds=1) if cursor else None,
+            account_id=account_id,
+        )
+        collected: List[TransactionRead] = []
+        for segment in reversed(segments):
+            rows = await self._read_segment(segment, account_id=account_id)
+            if cursor is not None:
+                rows = [r for r in rows if (r.timestamp, r.id) < cursor]
+            rows.sort(key=lambda r: (r.timestamp, r.id), reverse=True)
+            collected += rows
+            if len(collected) >= skip + limit:
+                break
+        return collected[skip : skip + limit]
+
+    async def stream_transactions(
+        self,
+        db: AsyncSession,
+        account_id: uuid.UUID | None = None,
+        collection_id: str | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        types: List[TransactionType] | None = None,
+    ) -> AsyncIterator[TransactionRead]:
+        """Archived rows matching the export filters, oldest first."""
+        date_from = _utc(date_from) if date_from is not None else None
+        date_to = _utc(date_to) if date_to is not None else None
+        type_values = {t.value for t in types} if types else None
+        for segment in await self.get_segments(db, date_from, date_to, account_id):
+            rows = await self._read_segment(
+                segment, account_id=account_id, collection_id=collection_id
+            )
+            rows.sort(key=lambda r: (r.timestamp, r.id))
+            for row in rows:
+                if date_from is not None and row.timestamp < date_from:
+                    continue
+                if date_to is not None and row.timestamp >= date_to:
+                    continue
+                if type_values is not None and row.type not in type_values:
+                    continue
+                yield row
+
+
+def _utc(value: datetime) -> datetime:
+    # Naive datetimes from query parameters are taken as UTC, like Postgres does
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _consecutive_runs(ids: List[int]) -> List[List[int]]:
+    runs: List[List[int]] = []
+    for i in ids:
+        if runs and runs[-1][-1] == i - 1:
+            runs[-1].append(i)
+        else:
+            runs.append([i])
+    return runs
+
+
+transaction_archive_service = TransactionArchiveService()
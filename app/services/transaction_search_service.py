@@ -0,0 +1,122 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List
+
+from app.clients.elasticsearch import get_es_instance
+from app.core.config import TRANSACTIONS_INDEX
+from app.core.metrics import OUTBOUND_REQUEST_DURATION, observe
+from app.core.pagination import encode_cursor, decode_cursor
+from app.models.transaction import TransactionType, TransactionStatus
+from app.schemas.transaction import TransactionSearchResult
+
+
+class TransactionSearchService:
+
+    def _build_query(
+        self,
+        text: str | None,
+        user_id: str | None,
+        collection_id: str | None,
+        student_id: str | None,
+        types: List[TransactionType] | None,
+        statuses: List[TransactionStatus] | None,
+        amount_min: Decimal | None,
+        amount_max: Decimal | None,
+        date_from: datetime | None,
+        date_to: datetime | None,
+    ) -> dict:
+        must = []
+        if text:
+            must.append({"match": {"description": {"query": text, "operator": "and"}}})
+        # Exact filters do not score and are cached by Elasticsearch
+        filters = []
+        for field, value in (
+            ("user_id", user_id),
+            ("collection_id", collection_id),
+            ("student_id", student_id),
+        ):
+            if value is not None:
+                filters.append({"term": {field: value}})
+        if types:
+            filters.append({"terms": {"type": [t.value for t in types]}})
+        if statuses:
+            filters.append({"terms": {"status": [s.value for s in statuses]}})
+        amount_range = {}
+        if amount_min is not None:
+            amount_range["gte"] = float(amount_min)
+        if amount_max is not None:
+            amount_range["lte"] = float(amount_max)
+        if amount_range:
+            filters.append({"range": {"amount": amount_range}})
+        date_range = {}
+        if date_from is not None:
+            date_range["gte"] = date_from.isoformat()
+        if date_to is not None:
+            date_range["lt"] = date_to.isoformat()
+        if date_range:
+            filters.append({"range": {"timestamp": date_range}})
+        return {"bool": {"must": must or [{"match_all": {}}], "filter": filters}}
+
+    async def search(
+        self,
+        text: str | None = None,
+        user_id: str | None = None,
+        collection_id: str | None = None,
+        student_id: str | None = None,
+        types: List[TransactionType] | None = None,
+        statuses: List[TransactionStatus] | None = None,
+        amount_min: Decimal | None = None,
+        amount_max: Decimal | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        size: int = 50,
+        cursor: str | None = None,
+    ) -> tuple[List[TransactionSearchResult], str | None]:
+        """
+        Searches the transactions index, newest first. Pages with search_after
+        on (timestamp, id), so deep pages cost the same as the first one.
+        Returns the hits and the cursor of the next page (None on the last).
+        """
+        body = {
+            "query": self._build_query(
+                text,
+                user_id,
+                collection_id,
+                student_id,
+                types,
+                statuses,
+                amount_min,
+                amount_max,
+                date_from,
+                date_to,
+            ),
+            "sort": [{"timestamp": "desc"}, {"id": "desc"}],
+            "size": size,
+            "track_total_hits": False,
+        }
+        if cursor:
+            after_ts, after_id = decode_cursor(cursor)
+            body["search_after"] = [
+                round(after_ts.timestamp() * 1000),
+                str(after_id),
+            ]
+
+        with observe(
+            OUTBOUND_REQUEST_DURATION, target="elasticsearch", operation="search"
+        ):
+            response = await get_es_instance().search(
+                index=TRANSACTIONS_INDEX, body=body
+            )
+        hits = response["hits"]["hits"]
+        results = [TransactionSearchResult(**hit["_source"]) for hit in hits]
+
+        next_cursor = None
+        if len(hits) == size:
+            last_ts, last_id = hits[-1]["sort"]
+            next_cursor = encode_cursor(
+                datetime.fromtimestamp(last_ts / 1000, tz=timezone.utc), last_id
+            )
+        return results, next_cursor
+
+
+transaction_search_service = TransactionSearchService()
@@ -1,27 +1,45 @@
+import asyncio
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import desc, func, and_, or_
+from sqlalchemy import bindparam, case, desc, func, insert, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from decimal import Decimal
-from fastapi import HTTPException, status
-from typing import List
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Iterable, List
 
+from app.core.database import get_read_sessionmaker
+from app.core.metrics import TRANSACTIONS
 from app.models.transaction import Transaction, TransactionType, TransactionStatus
 from app.models.account import Account
-from app.models.collection_account import CollectionAccount  # Zmieniono import
 from app.schemas.transaction import (
     TransactionCreateInternal,  # Use internal schema
     TransactionRead,
     TransactionPaymentRequest,
+    TransactionPaymentBatchRequest,
     TransactionDepositRequest,
     TransactionWithdrawalRequest,
     StudentPaymentSummaryRequestItem,
     StudentPaymentSummary,
+    ChildCollectionPayment,
+    ChildPaymentSummary,
+    ChildrenSummaryResponse,
 )
 from app.services.account_service import account_service
+from app.core.read_routing import primary_pins
+from app.services.balance_cache import balance_cache
 from app.services.collection_account_service import (
     collection_account_service,
 )  # Zmieniono import
+from app.services.collection_stats_service import collection_stats_service
+from app.services.outbox_service import outbox_service
+from app.services.student_collection_total_service import (
+    student_collection_total_service,
+)
+from app.services.transaction_archive_service import transaction_archive_service
+
+# Rows fetched per round trip from the server-side cursor during exports
+EXPORT_BATCH_SIZE = 1000
 
 
 class TransactionService:
@@ -30,47 +48,53 @@ class TransactionService:
         self, db: AsyncSession, transaction_data: TransactionCreateInternal
     ) -> Transaction:
         """Internal helper to create and add a transaction record."""
-        db_transaction = Transaction(**transaction_data.dict())
-        db.add(db_transaction)
-        await db.flush([db_transaction])  # Assign ID
-        return db_transaction
+        # RETURNING yields the stored row (timestamp, normalized amount), so
+        # the response is built without reading the transaction back
+        return await db.scalar(
+            insert(Transaction).values(**transaction_data.dict()).returning(Transaction)
+        )
+
+    def _balances_changed(
+        self,
+        db: AsyncSession,
+        user_ids: Iterable[str] = (),
+        collection_ids: Iterable[str] = (),
+    ) -> None:
+        # Cached balances go stale; the users should read their own writes
+        user_ids = list(user_ids)
+        balance_cache.invalidate_on_commit(db, user_ids, collection_ids)
+        primary_pins.pin_on_commit(db, user_ids)
+
+    def _record_outcome(self, transaction: TransactionRead) -> TransactionRead:
+        TRANSACTIONS.labels(type=transaction.type, status=transaction.status).inc()
+        return transaction
 
     async def make_payment(
         self, db: AsyncSession, user_id: str, payment_data: TransactionPaymentRequest
     ) -> TransactionRead:
         """Processes payment: Debits user, credits collection account."""
         async with db.begin_nested():  # Use savepoint for atomicity
-            # 1. Get/Create user account
-            user_account = await account_service.get_or_create_account(db, user_id)
-
-            # 2. Get/Create collection account
-            # This will raise HTTPException if collection is inactive (if status is used)
-            collection_account = (
-                await collection_account_service.get_or_create_collection_account(
-                    db, payment_data.collection_id  # Zmieniono pole
+            # 1. Debit user account (consistent order: user then collection).
+            # A single conditional UPDATE locks the row and checks funds; a
+            # missing account is treated as empty, i.e. insufficient funds.
+            locked_user_account = (
+                await account_service._update_balance_by_user_id_unsafe(
+                    db,
+                    user_id=user_id,
+                    change=-payment_data.amount,
+                    create_if_missing=True,
                 )
             )
-            # Ensure IDs are available after potential creation
-            await db.flush()
 
-            # 3. Lock both accounts (consistent order: user then collection)
-            locked_user_account = await account_service._update_balance_unsafe(
+            # 2. Credit collection account, creating it on first payment (upsert)
+            # This will raise HTTPException if collection is inactive (if status is used)
+            await collection_account_service._credit_collection_account_unsafe(
                 db,
-                account_id=user_account.id,
-                change=-payment_data.amount,  # Debits and locks user acc
-            )
-            # _update_balance_unsafe already performed the balance check and update
-
-            locked_collection_account = (
-                await collection_account_service._update_collection_balance_unsafe(
-                    db,
-                    collection_account_id=collection_account.id,
-                    change=payment_data.amount,  # Credits and locks collection acc
-                )
+                collection_id=payment_data.collection_id,  # Zmieniono pole
+                amount=payment_data.amount,
             )
-            # _update_collection_balance_unsafe already performed the update
 
-            # 4. Create transaction record (linked to user account)
+            # 3. Create transaction record (linked to user account)
             transaction_create = TransactionCreateInternal(
                 account_id=locked_user_account.id,
                 type=TransactionType.PAYMENT,
@@ -84,18 +108,113 @@ class TransactionService:
             db_transaction = await self._create_transaction_record_internal(
                 db, transaction_data=transaction_create
             )
+            await outbox_service.add_transaction_events(db, [db_transaction])
 
-            # Nested transaction commits here automatically if no exceptions
+            # 4. Keep the per-student paid totals in step with the payment
+            await student_collection_total_service.add_payments(
+                db,
+                {
+                    (
+                        payment_data.collection_id,
+                        payment_data.student_id,
+                    ): payment_data.amount
+                },
+            )
+            await collection_stats_service.add_payments(
+                db,
+                locked_user_account.id,
+                [
+                    (
+                        payment_data.collection_id,
+                        payment_data.student_id,
+                        payment_data.amount,
+                    )
+                ],
+            )
+            self._balances_changed(
+                db, user_ids=[user_id], collection_ids=[payment_data.collection_id]
+            )
 
-        # Refresh objects after successful nested commit if needed for response
-        await db.refresh(locked_user_account)
-        await db.refresh(locked_collection_account)
-        await db.refresh(db_transaction)
+            # Nested transaction commits here automatically if no exceptions
 
         print(
             f"Payment successful: User {user_id} paid {payment_data.amount} to collection {payment_data.collection_id}"
         )  # Zmieniono komunikat
-        return TransactionRead.from_orm(db_transaction)
+        return self._record_outcome(TransactionRead.from_orm(db_transaction))
+
+    async def make_payments_batch(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        batch_data: TransactionPaymentBatchRequest,
+    ) -> List[TransactionRead]:
+        """Processes several payments as one unit: one user debit, one credit per collection."""
+        payments = batch_data.payments
+        async with db.begin_nested():
+            # 1. Debit the user once for the whole batch
+            total = sum((p.amount for p in payments), Decimal("0.00"))
+            user_account = await account_service._update_balance_by_user_id_unsafe(
+                db, user_id=user_id, change=-total, create_if_missing=True
+            )
+
+            # 2. Credit each collection once, in collection_id order so that
+            # concurrent batches lock collection accounts in the same order
+            per_collection: dict[str, Decimal] = {}
+            for p in payments:
+                per_collection[p.collection_id] = (
+                    per_collection.get(p.collection_id, Decimal("0.00")) + p.amount
+                )
+            for collection_id in sorted(per_collection):
+                await collection_account_service._credit_collection_account_unsafe(
+                    db,
+                    collection_id=collection_id,
+                    amount=per_collection[collection_id],
+                )
+
+            # 3. Insert all transaction records with one multi-row INSERT
+            rows = [
+                TransactionCreateInternal(
+                    account_id=user_account.id,
+                    type=TransactionType.PAYMENT,
+                    status=TransactionStatus.COMPLETED,
+                    amount=p.amount,
+                    description=p.description
+                    or f"Payment for collection {p.collection_id}",
+                    collection_id=p.collection_id,
+                    student_id=p.student_id,
+                ).dict()
+                for p in payments
+            ]
+            result = await db.scalars(
+                insert(Transaction).returning(
+                    Transaction, sort_by_parameter_order=True
+                ),
+                rows,
+            )
+            db_transactions = result.all()
+            await outbox_service.add_transaction_events(db, db_transactions)
+
+            # 4. Keep the per-student paid totals in step with the payments
+            per_student: dict[tuple[str, str], Decimal] = {}
+            for p in payments:
+                key = (p.collection_id, p.student_id)
+                per_student[key] = per_student.get(key, Decimal("0.00")) + p.amount
+            await student_collection_total_service.add_payments(db, per_student)
+            await collection_stats_service.add_payments(
+                db,
+                user_account.id,
+                [(p.collection_id, p.student_id, p.amount) for p in payments],
+            )
+            self._balances_changed(
+                db, user_ids=[user_id], collection_ids=per_collection
+            )
+
+        print(
+            f"Batch payment successful: User {user_id} paid {total} in {len(payments)} payments"
+        )
+        return [
+            self._record_outcome(TransactionRead.from_orm(t)) for t in db_transactions
+        ]
 
     async def process_refund(
         self,
@@ -107,41 +226,19 @@ class TransactionService:
     ) -> TransactionRead:
         """Processes refund: Debits collection account, credits user account."""
         async with db.begin_nested():
-            # 1. Get user account (must exist for refund)
-            user_account = await account_service.get_account_by_user_id(db, user_id)
-            if not user_account:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"User account for user_id {user_id} not found for refund.",
-                )
-
-            # 2. Get collection account (must exist)
-            collection_account = await collection_account_service.get_collection_account_by_collection_id(
-                db, collection_id
-            )  # Zmieniono wywołanie
-            if not collection_account:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Collection account {collection_id} not found for refund.",
-                )  # Zmieniono komunikat
-
-            await db.flush()  # Ensure IDs
-
-            # 3. Lock and update balances (consistent order)
-            locked_collection_account = (
-                await collection_account_service._update_collection_balance_unsafe(
-                    db,
-                    collection_account_id=collection_account.id,
-                    change=-amount,  # Debits collection
-                )
+            # 1. Debit collection account (must exist and have enough funds)
+            await collection_account_service._update_collection_balance_by_collection_id_unsafe(
+                db, collection_id=collection_id, change=-amount  # Debits collection
             )
-            # Check for insufficient funds in collection account is done inside ^
 
-            locked_user_account = await account_service._update_balance_unsafe(
-                db, account_id=user_account.id, change=amount  # Credits user
+            # 2. Credit user account (must exist for refund)
+            locked_user_account = (
+                await account_service._update_balance_by_user_id_unsafe(
+                    db, user_id=user_id, change=amount  # Credits user
+                )
             )
 
-            # 4. Create refund transaction record
+            # 3. Create refund transaction record
             transaction_create = TransactionCreateInternal(
                 account_id=locked_user_account.id,
                 type=TransactionType.REFUND,
@@ -155,15 +252,148 @@ class TransactionService:
             db_transaction = await self._create_transaction_record_internal(
                 db, transaction_data=transaction_create
             )
-
-        await db.refresh(locked_user_account)
-        await db.refresh(locked_collection_account)
-        await db.refresh(db_transaction)
+            await outbox_service.add_transaction_events(db, [db_transaction])
+            await collection_stats_service.add_refunds(db, [(collection_id, amount)])
+            self._balances_changed(
+                db, user_ids=[user_id], collection_ids=[collection_id]
+            )
 
         print(
             f"Refund successful: User {user_id} received {amount} from collection {collection_id}"
         )  # Zmieniono komunikat
-        return TransactionRead.from_orm(db_transaction)
+        return self._record_outcome(TransactionRead.from_orm(db_transaction))
+
+    async def process_refunds_batch(
+        self,
+        db: AsyncSession,
+        collection_id: str,
+        refunds: List[tuple[str, Decimal]],
+        description: str | None = None,
+    ) -> List[TransactionRead]:
+        """
+        Refunds many (user_id, amount) pairs from one collection: a single
+        debit of the collection account, one upsert crediting all users and
+        one INSERT recording all refunds. Results are in input order.
+        """
+        async with db.begin_nested():
+            # 1. Debit the collection once for the whole batch
+            total = sum((amount for _, amount in refunds), Decimal("0.00"))
+            await collection_account_service._update_collection_balance_by_collection_id_unsafe(
+                db, collection_id=collection_id, change=-total
+            )
+
+            # 2. Credit every user by their summed amount
+            per_user: dict[str, Decimal] = {}
+            for user_id, amount in refunds:
+                per_user[user_id] = per_user.get(user_id, Decimal("0.00")) + amount
+            account_ids = await account_service._credit_accounts_by_user_id_unsafe(
+                db, per_user
+            )
+
+            # 3. Insert all refund records with one multi-row INSERT
+            rows = [
+                TransactionCreateInternal(
+                    account_id=account_ids[user_id],
+                    type=TransactionType.REFUND,
+                    status=TransactionStatus.COMPLETED,
+                    amount=amount,
+                    description=description
+                    or f"Refund from collection {collection_id}",
+                    collection_id=collection_id,
+                ).dict()
+                for user_id, amount in refunds
+            ]
+            result = await db.scalars(
+                insert(Transaction).returning(
+                    Transaction, sort_by_parameter_order=True
+                ),
+                rows,
+            )
+            db_transactions = result.all()
+            await outbox_service.add_transaction_events(db, db_transactions)
+            await collection_stats_service.add_refunds(
+                db, [(collection_id, amount) for _, amount in refunds]
+            )
+            self._balances_changed(
+                db, user_ids=per_user, collection_ids=[collection_id]
+            )
+
+        print(
+            f"Batch refund successful: {len(refunds)} refunds totalling {total} from collection {collection_id}"
+        )
+        return [
+            self._record_outcome(TransactionRead.from_orm(t)) for t in db_transactions
+        ]
+
+    async def get_collection_net_payments(
+        self,
+        db: AsyncSession,
+        collection_id: str,
+        account_ids: List[uuid.UUID] | None = None,
+    ) -> dict[uuid.UUID, tuple[str, Decimal]]:
+        """
+        Net amount (completed payments minus completed refunds) each account
+        has paid into a collection, archived months included, keyed by
+        account_id with the account's user_id. Accounts at zero are left out.
+        With account_ids, only those accounts are summed.
+        """
+        signed = case(
+            (Transaction.type == TransactionType.REFUND, -Transaction.amount),
+            else_=Transaction.amount,
+        )
+        query = (
+            select(Transaction.account_id, Account.user_id, func.sum(signed))
+            .join(Account, Account.id == Transaction.account_id)
+            .filter(
+                Transaction.collection_id == collection_id,
+                Transaction.status == TransactionStatus.COMPLETED,
+                Transaction.type.in_([TransactionType.PAYMENT, TransactionType.REFUND]),
+            )
+            .group_by(Transaction.account_id, Account.user_id)
+        )
+        if account_ids is not None:
+            query = query.filter(
+                Transaction.account_id
+                == func.any(bindparam("account_ids", account_ids, ARRAY(UUID)))
+            )
+        result = await db.execute(query)
+        nets = {account_id: [user_id, net] for account_id, user_id, net in result}
+
+        archived: dict[uuid.UUID, Decimal] = {}
+        async for row in transaction_archive_service.stream_transactions(
+            db,
+            collection_id=collection_id,
+            types=[TransactionType.PAYMENT, TransactionType.REFUND],
+        ):
+            if row.status != TransactionStatus.COMPLETED.value:
+                continue
+            if account_ids is not None and row.account_id not in account_ids:
+                continue
+            amount = (
+                -row.amount if row.type == TransactionType.REFUND.value else row.amount
+            )
+            archived[row.account_id] = (
+                archived.get(row.account_id, Decimal("0.00")) + amount
+            )
+        missing = [a for a in archived if a not in nets]
+        if missing:
+            users = await db.execute(
+                select(Account.id, Account.user_id).filter(
+                    Account.id
+                    == func.any(bindparam("account_ids", missing, ARRAY(UUID)))
+                )
+            )
+            for account_id, user_id in users:
+                nets[account_id] = [user_id, Decimal("0.00")]
+        for account_id, amount in archived.items():
+            if account_id in nets:
+                nets[account_id][1] += amount
+
+        return {
+            account_id: (user_id, net)
+            for account_id, (user_id, net) in nets.items()
+            if net > 0
+        }
 
     async def initiate_deposit(
         self, db: AsyncSession, user_id: str, deposit_data: TransactionDepositRequest
@@ -172,12 +402,12 @@ class TransactionService:
         # Real scenario: Call payment gateway, get URL/ID, create PENDING transaction
         print(f"Initiating deposit for user {user_id}, amount {deposit_data.amount}")
         async with db.begin_nested():
-            account = await account_service.get_or_create_account(db, user_id)
-            await db.flush()
-
-            # Simulate immediate completion for simplicity
-            updated_account = await account_service._update_balance_unsafe(
-                db, account_id=account.id, change=deposit_data.amount
+            # Simulate immediate completion for simplicity; upserts the account
+            updated_account = await account_service._update_balance_by_user_id_unsafe(
+                db,
+                user_id=user_id,
+                change=deposit_data.amount,
+                create_if_missing=True,
             )
 
             transaction_create = TransactionCreateInternal(
@@ -191,13 +421,61 @@ class TransactionService:
             db_transaction = await self._create_transaction_record_internal(
                 db, transaction_data=transaction_create
             )
+            await outbox_service.add_transaction_events(db, [db_transaction])
+            self._balances_changed(db, user_ids=[user_id])
 
-        await db.refresh(updated_account)
-        await db.refresh(db_transaction)
         print(
             f"Simulated deposit completed for user {user_id}, amount {deposit_data.amount}"
         )
-        return TransactionRead.from_orm(db_transaction)
+        return self._record_outcome(TransactionRead.from_orm(db_transaction))
+
+    async def initiate_deposits_batch(
+        self,
+        db: AsyncSession,
+        deposits: List[tuple[str, TransactionDepositRequest]],
+    ) -> List[TransactionRead]:
+        """
+        Applies many (user_id, deposit) requests at once: one upsert credits
+        every account by its summed amount, one INSERT records all transactions.
+        Results are returned in input order.
+        """
+        async with db.begin_nested():
+            per_user: dict[str, Decimal] = {}
+            for user_id, deposit_data in deposits:
+                per_user[user_id] = (
+                    per_user.get(user_id, Decimal("0.00")) + deposit_data.amount
+                )
+            account_ids = await account_service._credit_accounts_by_user_id_unsafe(
+                db, per_user
+            )
+
+            rows = [
+                TransactionCreateInternal(
+                    account_id=account_ids[user_id],
+                    type=TransactionType.DEPOSIT,
+                    status=TransactionStatus.COMPLETED,  # Simulating immediate success
+                    amount=deposit_data.amount,
+                    description="Simulated deposit completed",
+                    external_transaction_id=f"sim_dep_{uuid.uuid4()}",
+                ).dict()
+                for user_id, deposit_data in deposits
+            ]
+            result = await db.scalars(
+                insert(Transaction).returning(
+                    Transaction, sort_by_parameter_order=True
+                ),
+                rows,
+            )
+            db_transactions = result.all()
+            await outbox_service.add_transaction_events(db, db_transactions)
+            self._balances_changed(db, user_ids=per_user)
+
+        print(
+            f"Simulated deposits completed: {len(deposits)} deposits for {len(per_user)} users"
+        )
+        return [
+            self._record_outcome(TransactionRead.from_orm(t)) for t in db_transactions
+        ]
 
     async def initiate_withdrawal(
         self,
@@ -211,12 +489,12 @@ class TransactionService:
             f"Initiating withdrawal for user {user_id}, amount {withdrawal_data.amount}"
         )
         async with db.begin_nested():
-            account = await account_service.get_or_create_account(db, user_id)
-            await db.flush()
-
             # Lock funds by debiting
-            updated_account = await account_service._update_balance_unsafe(
-                db, account_id=account.id, change=-withdrawal_data.amount
+            updated_account = await account_service._update_balance_by_user_id_unsafe(
+                db,
+                user_id=user_id,
+                change=-withdrawal_data.amount,
+                create_if_missing=True,
             )
 
             transaction_create = TransactionCreateInternal(
@@ -230,31 +508,194 @@ class TransactionService:
             db_transaction = await self._create_transaction_record_internal(
                 db, transaction_data=transaction_create
             )
+            await outbox_service.add_transaction_events(db, [db_transaction])
+            self._balances_changed(db, user_ids=[user_id])
 
-        await db.refresh(updated_account)
-        await db.refresh(db_transaction)
         print(
             f"Withdrawal request created for user {user_id}, amount {withdrawal_data.amount}. Status: PENDING"
         )
-        return TransactionRead.from_orm(db_transaction)
+        return self._record_outcome(TransactionRead.from_orm(db_transaction))
+
+    async def settle_withdrawals(
+        self,
+        db: AsyncSession,
+        completed: List[Transaction],
+        failed: List[tuple[Transaction, str]],
+    ) -> List[TransactionRead]:
+        """
+        Records payout outcomes of PENDING withdrawals: one UPDATE marks the
+        paid ones COMPLETED, one marks the rejected (withdrawal, user_id)
+        pairs FAILED and one upsert gives their users the held funds back.
+        Withdrawals that are no longer PENDING (settled by another worker)
+        are left alone and not credited again.
+        """
+        settled: List[Transaction] = []
+        failed_ids: set[uuid.UUID] = set()
+        async with db.begin_nested():
+            for new_status, rows in (
+                (TransactionStatus.COMPLETED, completed),
+                (TransactionStatus.FAILED, [t for t, _ in failed]),
+            ):
+                if not rows:
+                    continue
+                result = await db.scalars(
+                    update(Transaction)
+                    .where(
+                        Transaction.id.in_([t.id for t in rows]),
+                        # Lets the planner prune to the partitions holding the rows
+                        Transaction.timestamp.between(
+                            min(t.timestamp for t in rows),
+                            max(t.timestamp for t in rows),
+                        ),
+                        Transaction.status == TransactionStatus.PENDING,
+                    )
+                    .values(status=new_status)
+                    .returning(Transaction),
+                    execution_options={"populate_existing": True},
+                )
+                rows = result.all()
+                settled.extend(rows)
+                if new_status == TransactionStatus.FAILED:
+                    failed_ids = {t.id for t in rows}
+
+            per_user: dict[str, Decimal] = {}
+            for withdrawal, user_id in failed:
+                if withdrawal.id not in failed_ids:
+                    continue
+                per_user[user_id] = (
+                    per_user.get(user_id, Decimal("0.00")) + withdrawal.amount
+                )
+            if per_user:
+                await account_service._credit_accounts_by_user_id_unsafe(db, per_user)
+                self._balances_changed(db, user_ids=per_user)
+            await outbox_service.add_transaction_events(db, settled)
+
+        return [self._record_outcome(TransactionRead.from_orm(t)) for t in settled]
 
     async def get_user_transactions(
-        self, db: AsyncSession, user_id: str, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        user_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: tuple[datetime, uuid.UUID] | None = None,
     ) -> list[TransactionRead]:
-        """Gets user's transaction history."""
+        """
+        Gets user's transaction history, newest first.
+        With a cursor (timestamp, id of the last row seen) pages by keyset
+        instead of offset, using the (account_id, timestamp, id) index.
+        A page that runs past the hot rows continues into the archive.
+        """
+        query = (
+            select(Transaction)
+            .join(Account, Transaction.account_id == Account.id)
+            .filter(Account.user_id == user_id)
+            .order_by(desc(Transaction.timestamp), desc(Transaction.id))
+        )
+        if cursor is not None:
+            query = query.filter(
+                tuple_(Transaction.timestamp, Transaction.id) < tuple_(*cursor),
+                # Row comparisons don't prune partitions; this bound does
+                Transaction.timestamp <= cursor[0],
+            )
+        else:
+            query = query.offset(skip)
+
+        result = await db.execute(query.limit(limit))
+        transactions = [TransactionRead.from_orm(t) for t in result.scalars().all()]
+        if len(transactions) < limit:
+            transactions += await self._get_archived_user_transactions(
+                db, user_id, skip, limit, cursor, hot_rows=len(transactions)
+            )
+        return transactions
+
+    async def _get_archived_user_transactions(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        skip: int,
+        limit: int,
+        cursor: tuple[datetime, uuid.UUID] | None,
+        hot_rows: int,
+    ) -> list[TransactionRead]:
+        # Archived months are older than every hot row, so the archive just
+        # continues the hot page
         account = await account_service.get_account_by_user_id(db, user_id)
-        if not account:
+        if account is None:
             return []
-
-        result = await db.execute(
-            select(Transaction)
-            .filter(Transaction.account_id == account.id)
-            .order_by(desc(Transaction.timestamp))
-            .offset(skip)
-            .limit(limit)
+        if not await transaction_archive_service.get_segments(
+            db,
+            date_to=cursor[0] + timedelta(microseconds=1) if cursor else None,
+            account_id=account.id,
+        ):
+            return []
+        archive_skip = 0
+        if cursor is None and hot_rows == 0 and skip > 0:
+            # The offset may reach past all hot rows; skip what remains
+            hot_count = await db.scalar(
+                select(func.count())
+                .select_from(Transaction)
+                .filter(Transaction.account_id == account.id)
+            )
+            archive_skip = max(0, skip - hot_count)
+        return await transaction_archive_service.get_account_transactions(
+            db,
+            account.id,
+            skip=archive_skip,
+            limit=limit - hot_rows,
+            cursor=cursor,
         )
-        transactions = result.scalars().all()
-        return [TransactionRead.from_orm(t) for t in transactions]
+
+    async def stream_transactions(
+        self,
+        user_id: str | None = None,
+        collection_id: str | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        types: List[TransactionType] | None = None,
+    ) -> AsyncIterator[TransactionRead]:
+        """
+        Streams matching transactions, oldest first, through a server-side cursor.
+        Opens its own session so it can outlive the request that started it.
+        """
+        query = select(Transaction).order_by(Transaction.timestamp, Transaction.id)
+        if user_id is not None:
+            query = query.join(Account, Transaction.account_id == Account.id).filter(
+                Account.user_id == user_id
+            )
+        if collection_id is not None:
+            query = query.filter(Transaction.collection_id == collection_id)
+        if date_from is not None:
+            query = query.filter(Transaction.timestamp >= date_from)
+        if date_to is not None:
+            query = query.filter(Transaction.timestamp < date_to)
+        if types:
+            query = query.filter(Transaction.type.in_(types))
+
+        async with get_read_sessionmaker()() as db:
+            # Archived months come first: they are older than any hot row
+            account_id = None
+            if user_id is not None:
+                account = await account_service.get_account_by_user_id(db, user_id)
+                account_id = account.id if account else None
+            if user_id is None or account_id is not None:
+                async for (
+                    transaction
+                ) in transaction_archive_service.stream_transactions(
+                    db,
+                    account_id=account_id,
+                    collection_id=collection_id,
+                    date_from=date_from,
+                    date_to=date_to,
+                    types=types,
+                ):
+                    yield transaction
+
+            result = await db.stream(
+                query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            async for transaction in result.scalars():
+                yield TransactionRead.from_orm(transaction)
 
     async def get_students_paid_summaries(  # Renamed method for clarity
         self, db: AsyncSession, requests: List[StudentPaymentSummaryRequestItem]
@@ -263,44 +704,11 @@ class TransactionService:
         if not requests:
             return []
 
-        conditions = []
-        for req in requests:
-            conditions.append(
-                and_(
-                    Transaction.collection_id == req.collection_id,  # Zmieniono pole
-                    Transaction.student_id == req.student_id,
-                )
-            )
-
-        query = (
-            select(
-                Transaction.collection_id,  # Zmieniono pole
-                Transaction.student_id,
-                func.coalesce(func.sum(Transaction.amount), Decimal("0.00")).label(
-                    "total_paid"
-                ),
-            )
-            .where(
-                Transaction.type == TransactionType.PAYMENT,
-                Transaction.status == TransactionStatus.COMPLETED,
-                or_(*conditions),
-            )
-            .group_by(
-                Transaction.collection_id, Transaction.student_id
-            )  # Zmieniono pole
+        # Indexed lookup in the student_collection_totals read model
+        paid_map = await student_collection_total_service.get_totals(
+            db, list({(req.collection_id, req.student_id) for req in requests})
         )
 
-        result = await db.execute(query)
-        paid_summaries_raw = result.all()
-
-        paid_map = {
-            (
-                summary.collection_id,
-                summary.student_id,
-            ): summary.total_paid  # Zmieniono pole
-            for summary in paid_summaries_raw
-        }
-
         response_summaries = []
         for req in requests:
             total_paid = paid_map.get(
@@ -316,5 +724,51 @@ class TransactionService:
 
         return response_summaries
 
+    async def get_children_summary(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        child_ids_lookup: Awaitable[list[str]],
+    ) -> ChildrenSummaryResponse:
+        """
+        Builds the family dashboard: account balance plus paid totals per child.
+        The children lookup (User Service) and the balance query run concurrently;
+        all children's totals then come from one query.
+        """
+        # The session can't run queries concurrently, so only the HTTP lookup
+        # goes to a task; it is cancelled if the balance query fails
+        children_task = asyncio.ensure_future(child_ids_lookup)
+        try:
+            account = await account_service.get_account_by_user_id(db, user_id)
+            child_ids = await children_task
+        finally:
+            children_task.cancel()
+        totals = await student_collection_total_service.get_totals_for_students(
+            db, child_ids
+        )
+
+        per_child: dict[str, list[ChildCollectionPayment]] = {
+            child_id: [] for child_id in child_ids
+        }
+        for total in totals:
+            per_child[total.student_id].append(
+                ChildCollectionPayment(
+                    collection_id=total.collection_id, total_paid=total.total_paid
+                )
+            )
+        return ChildrenSummaryResponse(
+            balance=account.balance if account else Decimal("0.00"),
+            children=[
+                ChildPaymentSummary(
+                    student_id=child_id,
+                    total_paid=sum(
+                        (c.total_paid for c in collections), Decimal("0.00")
+                    ),
+                    collections=collections,
+                )
+                for child_id, collections in per_child.items()
+            ],
+        )
+
 
 transaction_service = TransactionService()
@@ -0,0 +1,126 @@
+import asyncio
+
+from sqlalchemy import Interval, cast, delete, func, literal, update
+from sqlalchemy.future import select
+
+from app.core.config import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_ES_INDEX,
+    OUTBOX_FILE_PATH,
+    OUTBOX_POLL_INTERVAL,
+    OUTBOX_RETRY_BASE_SECONDS,
+    OUTBOX_RETRY_MAX_SECONDS,
+    OUTBOX_SINK,
+    OUTBOX_WEBHOOK_URL,
+    TRANSACTIONS_INDEX,
+)
+from app.core.database import get_sessionmaker
+from app.core.metrics import OUTBOX_EVENTS
+from app.models.outbox import OutboxEvent
+from app.workers.outbox_sinks import (
+    ElasticsearchSink,
+    FileSink,
+    OutboxSink,
+    TransactionIndexSink,
+    WebhookSink,
+)
+
+
+def create_sink(es_client=None) -> OutboxSink:
+    """Builds the sink selected by OUTBOX_SINK."""
+    if OUTBOX_SINK == "transactions_index":
+        return TransactionIndexSink(es_client, TRANSACTIONS_INDEX)
+    if OUTBOX_SINK == "elasticsearch":
+        return ElasticsearchSink(es_client, OUTBOX_ES_INDEX)
+    if OUTBOX_SINK == "webhook":
+        if not OUTBOX_WEBHOOK_URL:
+            raise ValueError("OUTBOX_WEBHOOK_URL is required for the webhook sink")
+        return WebhookSink(OUTBOX_WEBHOOK_URL)
+    if OUTBOX_SINK == "file":
+        return FileSink(OUTBOX_FILE_PATH)
+    raise ValueError(f"Unknown OUTBOX_SINK: {OUTBOX_SINK}")
+
+
+class OutboxPublisher:
+    """
+    Drains the outbox table into a sink. Several publishers (also across
+    replicas) can run at once: batches are claimed with FOR UPDATE SKIP LOCKED
+    and stay locked until they are acknowledged or rescheduled.
+    """
+
+    def __init__(
+        self,
+        sink: OutboxSink,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_interval: float = OUTBOX_POLL_INTERVAL,
+    ):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+    def _next_attempt_at(self):
+        # now() + min(base * 2^attempts, max) seconds, evaluated per row
+        delay = func.least(
+            OUTBOX_RETRY_BASE_SECONDS * func.power(2, OutboxEvent.attempts),
+            OUTBOX_RETRY_MAX_SECONDS,
+        )
+        return func.now() + cast(literal("1 second"), Interval) * delay
+
+    async def publish_batch(self) -> int:
+        """Claims and delivers one batch. Returns the number of events claimed."""
+        async with get_sessionmaker()() as db:
+            async with db.begin():
+                result = await db.execute(
+                    select(OutboxEvent)
+                    .where(OutboxEvent.next_attempt_at <= func.now())
+                    .order_by(OutboxEvent.id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                events = result.scalars().all()
+                if not events:
+                    return 0
+
+                error = None
+                try:
+                    failed = await self.sink.publish(events)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"[:1000]
+                    failed = {event.id for event in events}
+
+                delivered = [event.id for event in events if event.id not in failed]
+                if delivered:
+                    await db.execute(
+                        delete(OutboxEvent).where(OutboxEvent.id.in_(delivered))
+                    )
+                if failed:
+                    await db.execute(
+                        update(OutboxEvent)
+                        .where(OutboxEvent.id.in_(failed))
+                        .values(
+                            attempts=OutboxEvent.attempts + 1,
+                            next_attempt_at=self._next_attempt_at(),
+                            last_error=error or "Rejected by sink",
+                        )
+                    )
+        OUTBOX_EVENTS.labels(result="published").inc(len(delivered))
+        OUTBOX_EVENTS.labels(result="failed").inc(len(failed))
+        if failed:
+            print(
+                f"Outbox: {len(failed)} of {len(events)} events failed: "
+                f"{error or 'rejected by sink'}"
+            )
+        return len(events)
+
+    async def run(self) -> None:
+        """Publishes until cancelled; sleeps only when the outbox is drained."""
+        while True:
+            try:
+                claimed = await self.publish_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Outbox publisher error: {e}")
+                claimed = 0
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,142 @@
+import asyncio
+import json
+from typing import Iterable, List, Protocol
+
+import httpx
+from elasticsearch.helpers import async_bulk
+
+from app.clients.elasticsearch import BulkIndexer
+from app.core.metrics import OUTBOUND_REQUEST_DURATION, observe
+from app.models.outbox import OutboxEvent
+
+
+def event_to_dict(event: OutboxEvent) -> dict:
+    return {
+        "event_id": event.id,
+        "event_type": event.event_type,
+        "aggregate_id": event.aggregate_id,
+        "created_at": event.created_at.isoformat() if event.created_at else None,
+        "payload": event.payload,
+    }
+
+
+class OutboxSink(Protocol):
+    def start(self) -> None: ...
+
+    async def publish(self, events: List[OutboxEvent]) -> set[int]:
+        """
+        Delivers a batch and returns the ids of events that failed. Raising
+        marks the whole batch as failed. Delivery is at-least-once, so sinks
+        should be idempotent on event_id.
+        """
+        ...
+
+    async def close(self) -> None: ...
+
+
+class TransactionIndexSink:
+    """
+    Upserts transaction.* events into the transactions search index (document
+    id = transaction id) through a shared BulkIndexer, so batches claimed by
+    concurrent publishers are coalesced into size- or time-flushed bulk calls.
+    Other event types are acknowledged without indexing.
+
+    The event id is the document version. Events of one transaction are
+    created in order (e.g. a withdrawal and then its settlement), so an event
+    delivered late or retried never overwrites a newer status.
+    """
+
+    def __init__(self, es_client, index: str):
+        self.index = index
+        self.indexer = BulkIndexer(es_client)
+
+    def start(self) -> None:
+        self.indexer.start()
+
+    async def publish(self, events: List[OutboxEvent]) -> set[int]:
+        pending = {}
+        for event in events:
+            if event.event_type.startswith("transaction."):
+                pending[event.id] = await self.indexer.add(
+                    self.index, event.aggregate_id, event.payload, version=event.id
+                )
+        errors = await asyncio.gather(*pending.values())
+        return {
+            event_id for event_id, error in zip(pending, errors) if error is not None
+        }
+
+    async def close(self) -> None:
+        await self.indexer.close()
+
+
+class ElasticsearchSink:
+    """Bulk-indexes events, using the event id as document id."""
+
+    def __init__(self, es_client, index: str):
+        self.es = es_client
+        self.index = index
+
+    def start(self) -> None:
+        pass
+
+    async def publish(self, events: List[OutboxEvent]) -> set[int]:
+        actions = (
+            {"_index": self.index, "_id": event.id, "_source": event_to_dict(event)}
+            for event in events
+        )
+        with observe(
+            OUTBOUND_REQUEST_DURATION, target="elasticsearch", operation="outbox_bulk"
+        ):
+            _, errors = await async_bulk(
+                self.es, actions, raise_on_error=False, raise_on_exception=False
+            )
+        return {int(next(iter(error.values()))["_id"]) for error in errors}
+
+    async def close(self) -> None:
+        pass
+
+
+class WebhookSink:
+    """POSTs each batch as a JSON array; any non-2xx response fails the batch."""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+        self.client: httpx.AsyncClient | None = None
+
+    def start(self) -> None:
+        self.client = httpx.AsyncClient(timeout=self.timeout)
+
+    async def publish(self, events: List[OutboxEvent]) -> set[int]:
+        with observe(OUTBOUND_REQUEST_DURATION, target="webhook", operation="outbox"):
+            response = await self.client.post(
+                self.url, json=[event_to_dict(e) for e in events]
+            )
+        response.raise_for_status()
+        return set()
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+
+
+class FileSink:
+    """Appends events as NDJSON to a local file (development and tests)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def start(self) -> None:
+        pass
+
+    def _append(self, lines: Iterable[str]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+
+    async def publish(self, events: List[OutboxEvent]) -> set[int]:
+        lines = [json.dumps(event_to_dict(e), default=str) + "\n" for e in events]
+        await asyncio.to_thread(self._append, lines)
+        return set()
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,101 @@
+import asyncio
+import random
+from typing import Protocol
+
+import httpx
+
+from app.core.metrics import OUTBOUND_REQUEST_DURATION, observe
+from app.models.transaction import Transaction
+
+
+class PayoutRejected(Exception):
+    """The provider refused the payout for good; the withdrawal fails."""
+
+
+class PayoutProvider(Protocol):
+    def start(self) -> None: ...
+
+    async def submit(self, withdrawal: Transaction, user_id: str) -> None:
+        """
+        Pays the withdrawal out to the user. Returning means the payout was
+        made; PayoutRejected means it never will be. Any other exception
+        leaves the outcome unknown and the withdrawal is submitted again
+        later, so providers must be idempotent on external_transaction_id.
+        """
+        ...
+
+    async def close(self) -> None: ...
+
+
+class FakePayoutProvider:
+    """
+    Local stand-in for a payout provider (development and tests): every
+    payout takes `latency` seconds (± `jitter`), is rejected with probability
+    `failure_rate` and times out (outcome unknown) with probability
+    `error_rate`.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        error_rate: float = 0.0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.error_rate = error_rate
+
+    def start(self) -> None:
+        pass
+
+    async def submit(self, withdrawal: Transaction, user_id: str) -> None:
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        await asyncio.sleep(max(delay, 0))
+        roll = random.random()
+        if roll < self.failure_rate:
+            raise PayoutRejected("Rejected by fake payout provider")
+        if roll < self.failure_rate + self.error_rate:
+            raise TimeoutError("Fake payout provider timed out")
+
+    async def close(self) -> None:
+        pass
+
+
+class HttpPayoutProvider:
+    """
+    POSTs each payout as JSON, with external_transaction_id as the
+    Idempotency-Key. 2xx means paid; 4xx other than 408/429 is a rejection;
+    anything else (timeouts, 5xx) is retried.
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+        self.client: httpx.AsyncClient | None = None
+
+    def start(self) -> None:
+        self.client = httpx.AsyncClient(timeout=self.timeout)
+
+    async def submit(self, withdrawal: Transaction, user_id: str) -> None:
+        with observe(OUTBOUND_REQUEST_DURATION, target="payout", operation="submit"):
+            response = await self.client.post(
+                self.url,
+                json={
+                    "id": withdrawal.external_transaction_id,
+                    "user_id": user_id,
+                    "amount": str(withdrawal.amount),
+                },
+                headers={"Idempotency-Key": withdrawal.external_transaction_id},
+            )
+        if 400 <= response.status_code < 500 and response.status_code not in (
+            408,
+            429,
+        ):
+            raise PayoutRejected(f"{response.status_code}: {response.text[:200]}")
+        response.raise_for_status()
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
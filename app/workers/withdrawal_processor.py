@@ -0,0 +1,195 @@
+import asyncio
+from datetime import timedelta
+
+from sqlalchemy import func, or_, update
+from sqlalchemy.future import select
+
+from app.core.config import (
+    PAYOUT_PROVIDER,
+    PAYOUT_PROVIDER_URL,
+    PAYOUT_PROVIDER_TIMEOUT,
+    PAYOUT_FAKE_LATENCY_MS,
+    PAYOUT_FAKE_JITTER_MS,
+    PAYOUT_FAKE_FAILURE_RATE,
+    PAYOUT_FAKE_ERROR_RATE,
+    WITHDRAWAL_WORKERS,
+    WITHDRAWAL_BATCH_SIZE,
+    WITHDRAWAL_MAX_IN_FLIGHT,
+    WITHDRAWAL_POLL_INTERVAL,
+    WITHDRAWAL_CLAIM_TIMEOUT,
+)
+from app.core.database import get_sessionmaker
+from app.core.metrics import (
+    PAYOUTS_IN_FLIGHT,
+    WITHDRAWAL_QUEUE_DEPTH,
+    WITHDRAWALS_PROCESSED,
+)
+from app.models.account import Account
+from app.models.transaction import Transaction, TransactionType, TransactionStatus
+from app.services.transaction_service import transaction_service
+from app.workers.payout_providers import (
+    FakePayoutProvider,
+    HttpPayoutProvider,
+    PayoutProvider,
+    PayoutRejected,
+)
+
+PENDING_WITHDRAWAL = (
+    Transaction.type == TransactionType.WITHDRAWAL,
+    Transaction.status == TransactionStatus.PENDING,
+)
+
+
+def create_payout_provider() -> PayoutProvider:
+    """Builds the provider selected by PAYOUT_PROVIDER, which must be set."""
+    if not PAYOUT_PROVIDER:
+        raise ValueError("PAYOUT_PROVIDER must be set (fake | http)")
+    if PAYOUT_PROVIDER == "fake":
+        return FakePayoutProvider(
+            latency=PAYOUT_FAKE_LATENCY_MS / 1000,
+            jitter=PAYOUT_FAKE_JITTER_MS / 1000,
+            failure_rate=PAYOUT_FAKE_FAILURE_RATE,
+            error_rate=PAYOUT_FAKE_ERROR_RATE,
+        )
+    if PAYOUT_PROVIDER == "http":
+        if not PAYOUT_PROVIDER_URL:
+            raise ValueError("PAYOUT_PROVIDER_URL is required for the http provider")
+        return HttpPayoutProvider(PAYOUT_PROVIDER_URL, PAYOUT_PROVIDER_TIMEOUT)
+    raise ValueError(f"Unknown PAYOUT_PROVIDER: {PAYOUT_PROVIDER}")
+
+
+class WithdrawalProcessor:
+    """
+    Pays PENDING withdrawals out. Each of the `workers` loops claims a batch
+    in one short DB transaction (FOR UPDATE SKIP LOCKED, then a lease of
+    `claim_timeout` seconds in payout_claimed_until, so it is also safe
+    across replicas), submits it to the provider concurrently with no DB
+    connection held, and records the outcomes in a second transaction. At
+    most `max_in_flight` provider calls run at once over all workers.
+
+    Withdrawals whose outcome is unknown (provider error, crash) stay
+    PENDING and are submitted again once their lease has expired.
+    """
+
+    def __init__(
+        self,
+        provider: PayoutProvider,
+        workers: int = WITHDRAWAL_WORKERS,
+        batch_size: int = WITHDRAWAL_BATCH_SIZE,
+        max_in_flight: int = WITHDRAWAL_MAX_IN_FLIGHT,
+        poll_interval: float = WITHDRAWAL_POLL_INTERVAL,
+        claim_timeout: float = WITHDRAWAL_CLAIM_TIMEOUT,
+    ):
+        self.provider = provider
+        self.workers = max(workers, 1)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.claim_timeout = claim_timeout
+        self._in_flight = asyncio.Semaphore(max(max_in_flight, 1))
+
+    async def _submit(self, withdrawal: Transaction, user_id: str) -> Exception | None:
+        async with self._in_flight:
+            PAYOUTS_IN_FLIGHT.inc()
+            try:
+                await self.provider.submit(withdrawal, user_id)
+            except Exception as e:
+                return e
+            finally:
+                PAYOUTS_IN_FLIGHT.dec()
+        return None
+
+    async def _claim(self) -> list[tuple[Transaction, str]]:
+        async with get_sessionmaker()() as db:
+            async with db.begin():
+                WITHDRAWAL_QUEUE_DEPTH.set(
+                    await db.scalar(
+                        select(func.count())
+                        .select_from(Transaction)
+                        .where(*PENDING_WITHDRAWAL)
+                    )
+                )
+                result = await db.execute(
+                    select(Transaction, Account.user_id)
+                    .join(Account, Account.id == Transaction.account_id)
+                    .where(
+                        *PENDING_WITHDRAWAL,
+                        or_(
+                            Transaction.payout_claimed_until.is_(None),
+                            Transaction.payout_claimed_until < func.now(),
+                        ),
+                    )
+                    .order_by(Transaction.timestamp)
+                    .limit(self.batch_size)
+                    .with_for_update(of=Transaction, skip_locked=True)
+                )
+                claimed = result.all()
+                if claimed:
+                    await db.execute(
+                        update(Transaction)
+                        .where(
+                            Transaction.id.in_([t.id for t, _ in claimed]),
+                            # Lets the planner prune to the partitions holding the rows
+                            Transaction.timestamp.between(
+                                claimed[0][0].timestamp, claimed[-1][0].timestamp
+                            ),
+                        )
+                        .values(
+                            payout_claimed_until=func.now()
+                            + timedelta(seconds=self.claim_timeout)
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+        return claimed
+
+    async def process_batch(self) -> int:
+        """
+        Claims, pays out and settles one batch. Returns the number of
+        withdrawals settled (COMPLETED or FAILED).
+        """
+        claimed = await self._claim()
+        if not claimed:
+            return 0
+
+        outcomes = await asyncio.gather(
+            *[self._submit(t, user_id) for t, user_id in claimed]
+        )
+        completed, failed, errors = [], [], []
+        for (withdrawal, user_id), error in zip(claimed, outcomes):
+            if error is None:
+                completed.append(withdrawal)
+            elif isinstance(error, PayoutRejected):
+                failed.append((withdrawal, user_id))
+            else:
+                errors.append(error)
+        if completed or failed:
+            async with get_sessionmaker()() as db:
+                async with db.begin():
+                    await transaction_service.settle_withdrawals(db, completed, failed)
+
+        WITHDRAWALS_PROCESSED.labels(result="completed").inc(len(completed))
+        WITHDRAWALS_PROCESSED.labels(result="failed").inc(len(failed))
+        WITHDRAWALS_PROCESSED.labels(result="error").inc(len(errors))
+        if failed or errors:
+            print(
+                f"Withdrawals: {len(completed)} completed, {len(failed)} failed, "
+                f"{len(errors)} left pending"
+                + (f" ({type(errors[0]).__name__}: {errors[0]})" if errors else "")
+            )
+        return len(completed) + len(failed)
+
+    async def _run_worker(self) -> None:
+        while True:
+            try:
+                settled = await self.process_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Withdrawal processor error: {e}")
+                settled = 0
+            # Sleep when drained or when part of the batch errored
+            if settled < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    async def run(self) -> None:
+        """Runs the worker pool until cancelled."""
+        await asyncio.gather(*[self._run_worker() for _ in range(self.workers)])
@@ -0,0 +1,190 @@
+"""
+Benchmark of monthly partitioning of `transactions` (migration 40d4fafb1adf).
+
+    python -m scripts.bench_partitioning seed [--rows 10000000]
+    python -m scripts.bench_partitioning run
+
+Use a scratch database in DATABASE_URL; `seed` refuses to write into a
+non-empty transactions table. To compare before and after:
+
+    DATABASE_URL=... alembic upgrade 73ab62d6279b     # just before partitioning
+    python -m scripts.bench_partitioning seed
+    python -m scripts.bench_partitioning run          # before
+    DATABASE_URL=... alembic upgrade 40d4fafb1adf     # copies rows into partitions
+    python -m scripts.bench_partitioning run          # after
+
+`seed` creates 100k accounts and spreads the rows over the last 36 months;
+user1 gets 1% of them. `run` prints the best of 5 server-side execution
+times (EXPLAIN ANALYZE) of the date-bounded and paginated reads, then times
+removing the oldest month (DELETE on a plain table, DETACH PARTITION on a
+partitioned one) inside a transaction that is rolled back.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import close_db, get_sessionmaker, init_db
+
+ACCOUNTS = 100000
+REPEAT = 5
+# Bounds of the month that started six months ago
+MONTH = (
+    "timestamp >= date_trunc('month', now()) - interval '6 months' "
+    "AND timestamp < date_trunc('month', now()) - interval '5 months'"
+)
+QUERIES = {
+    "user page 1 (50)": (
+        "SELECT * FROM transactions WHERE account_id = :account_id "
+        "ORDER BY timestamp DESC, id DESC LIMIT 50"
+    ),
+    "user deep cursor page (50)": (
+        "SELECT * FROM transactions WHERE account_id = :account_id "
+        "AND (timestamp, id) < (:cursor, 'ffffffff-ffff-ffff-ffff-ffffffffffff') "
+        "AND timestamp <= :cursor ORDER BY timestamp DESC, id DESC LIMIT 50"
+    ),
+    "collection 1-month export": (
+        f"SELECT * FROM transactions WHERE collection_id = 'col7' AND {MONTH} "
+        "ORDER BY timestamp, id"
+    ),
+    "1-month sum by type": (
+        f"SELECT type, count(*), sum(amount) FROM transactions WHERE {MONTH} "
+        "GROUP BY type"
+    ),
+    "user 1-month export": (
+        f"SELECT * FROM transactions WHERE account_id = :account_id AND {MONTH} "
+        "ORDER BY timestamp, id"
+    ),
+}
+
+
+async def seed(db: AsyncSession, rows: int) -> None:
+    if await db.scalar(text("SELECT EXISTS (SELECT 1 FROM transactions)")):
+        raise SystemExit("transactions is not empty, use a scratch database")
+    await db.execute(text("SET LOCAL statement_timeout = 0"))
+    await db.execute(
+        text(
+            "INSERT INTO accounts (id, user_id, balance, created_at) "
+            "SELECT gen_random_uuid(), 'user' || g, 1000, now() "
+            "FROM generate_series(1, :accounts) g"
+        ),
+        {"accounts": ACCOUNTS},
+    )
+    await db.execute(
+        text(
+            "CREATE TEMP TABLE bench_accounts ON COMMIT DROP AS "
+            "SELECT row_number() OVER (ORDER BY user_id) AS n, id FROM accounts"
+        )
+    )
+    await db.execute(text("CREATE INDEX ON bench_accounts (n)"))
+    await db.execute(text("ANALYZE bench_accounts"))
+    await db.execute(
+        text(
+            "INSERT INTO transactions (id, account_id, type, status, amount, "
+            "timestamp, description, collection_id, student_id) "
+            "SELECT gen_random_uuid(), a.id, "
+            "(ARRAY['PAYMENT','PAYMENT','PAYMENT','DEPOSIT','REFUND','WITHDRAWAL'])"
+            "[1 + g % 6]::transactiontype, 'COMPLETED'::transactionstatus, "
+            "(1 + g % 500)::numeric / 10, now() - random() * interval '1095 days', "
+            "'generated ' || g, 'col' || (g % 2000), 'stu' || (g % 50000) "
+            "FROM generate_series(1, :rows) g "
+            "JOIN bench_accounts a "
+            "ON a.n = CASE WHEN g % 100 = 0 THEN 1 ELSE 1 + g % :accounts END"
+        ),
+        {"rows": rows, "accounts": ACCOUNTS},
+    )
+    await db.commit()
+    await db.execute(text("SET LOCAL statement_timeout = 0"))
+    await db.execute(text("ANALYZE transactions"))
+    await db.commit()
+
+
+async def best_execution_ms(db: AsyncSession, sql: str, params: dict) -> float:
+    best = None
+    for _ in range(REPEAT):
+        plan = await db.scalar(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"), params)
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        elapsed = plan[0]["Execution Time"]
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+async def time_drop_oldest_month(db: AsyncSession) -> str:
+    oldest = await db.scalar(text("SELECT min(timestamp) FROM transactions"))
+    partition = await db.scalar(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'transactions'::regclass "
+            "AND c.relname <> 'transactions_default' "
+            "ORDER BY c.relname LIMIT 1"
+        )
+    )
+    start = time.perf_counter()
+    if partition is None:
+        result = await db.execute(
+            text(
+                "DELETE FROM transactions WHERE timestamp < "
+                "date_trunc('month', CAST(:oldest AS timestamptz)) "
+                "+ interval '1 month'"
+            ),
+            {"oldest": oldest},
+        )
+        how = f"DELETE of {result.rowcount} rows"
+    else:
+        await db.execute(text(f"ALTER TABLE transactions DETACH PARTITION {partition}"))
+        how = f"DETACH PARTITION {partition}"
+    elapsed = time.perf_counter() - start
+    await db.rollback()
+    return f"{how}: {elapsed * 1000:.1f} ms"
+
+
+async def run() -> None:
+    async with get_sessionmaker()() as db:
+        await db.execute(text("SET LOCAL statement_timeout = 0"))
+        account_id = await db.scalar(
+            text("SELECT id FROM accounts WHERE user_id = 'user1'")
+        )
+        cursor = await db.scalar(
+            text(
+                "SELECT timestamp FROM transactions WHERE account_id = :account_id "
+                "AND timestamp < now() - interval '540 days' "
+                "ORDER BY timestamp DESC LIMIT 1"
+            ),
+            {"account_id": account_id},
+        )
+        params = {"account_id": account_id, "cursor": cursor}
+        for name, sql in QUERIES.items():
+            used = {k: v for k, v in params.items() if f":{k}" in sql}
+            print(f"{name:<34} {await best_execution_ms(db, sql, used):10.2f} ms")
+        print(f"drop oldest month: {await time_drop_oldest_month(db)}")
+
+
+async def main_async(command: str, rows: int) -> None:
+    init_db()
+    try:
+        if command == "seed":
+            async with get_sessionmaker()() as db:
+                await seed(db, rows)
+            print(f"Seeded {rows} transactions over {ACCOUNTS} accounts")
+        else:
+            await run()
+    finally:
+        await close_db()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["seed", "run"])
+    parser.add_argument("--rows", type=int, default=10000000)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.command, args.rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark of the paid-summary lookup: totals for a list of
+(collection_id, student_id) pairs.
+
+    python -m scripts.bench_student_totals [--payments 1000000] [--pairs 500000]
+
+Needs a migrated database in DATABASE_URL. The data is seeded into TEMP
+tables that shadow `transactions` and `student_collection_totals` for this
+session only, and the transaction is rolled back at the end, so nothing is
+written to the real tables. Times, best of --repeat, for 10 / 1k / 50k pairs:
+  - baseline: the original or_() of per-pair conditions with GROUP BY over
+    transactions (fails beyond ~16k pairs: two bind parameters per pair,
+    and a statement takes at most 32767),
+  - StudentCollectionTotalService.get_totals: the read model joined against
+    unnest() of two array parameters, in chunks.
+"""
+
+import argparse
+import asyncio
+import time
+from decimal import Decimal
+from typing import List
+
+from sqlalchemy import and_, func, or_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.database import close_db, get_sessionmaker, init_db
+from app.models.transaction import Transaction, TransactionType, TransactionStatus
+from app.services.student_collection_total_service import (
+    student_collection_total_service,
+)
+
+SIZES = (10, 1000, 50000)
+STUDENTS_PER_COLLECTION = 30
+
+
+async def baseline_totals(
+    db: AsyncSession, pairs: List[tuple[str, str]]
+) -> dict[tuple[str, str], Decimal]:
+    """The lookup as it was before the student_collection_totals read model."""
+    conditions = [
+        and_(Transaction.collection_id == c, Transaction.student_id == s)
+        for c, s in pairs
+    ]
+    result = await db.execute(
+        select(
+            Transaction.collection_id,
+            Transaction.student_id,
+            func.coalesce(func.sum(Transaction.amount), Decimal("0.00")),
+        )
+        .where(
+            Transaction.type == TransactionType.PAYMENT,
+            Transaction.status == TransactionStatus.COMPLETED,
+            or_(*conditions),
+        )
+        .group_by(Transaction.collection_id, Transaction.student_id)
+    )
+    return {(c, s): total for c, s, total in result}
+
+
+async def seed(db: AsyncSession, payments: int, pairs: int) -> None:
+    await db.execute(text("SET LOCAL statement_timeout = 0"))
+    for table in ("transactions", "student_collection_totals"):
+        await db.execute(
+            text(
+                f"CREATE TEMP TABLE {table} (LIKE public.{table} INCLUDING ALL) "
+                "ON COMMIT DROP"
+            )
+        )
+    await db.execute(
+        text(
+            "INSERT INTO transactions "
+            "(id, account_id, type, status, amount, collection_id, student_id) "
+            "SELECT gen_random_uuid(), gen_random_uuid(), 'PAYMENT', 'COMPLETED', "
+            "5, 'c' || (i % :pairs / :per_collection), 's' || (i % :pairs) "
+            "FROM generate_series(1, :payments) i"
+        ),
+        {
+            "payments": payments,
+            "pairs": pairs,
+            "per_collection": STUDENTS_PER_COLLECTION,
+        },
+    )
+    await db.execute(
+        text(
+            "INSERT INTO student_collection_totals "
+            "(collection_id, student_id, total_paid) "
+            "SELECT collection_id, student_id, SUM(amount) FROM transactions "
+            "GROUP BY collection_id, student_id"
+        )
+    )
+    await db.execute(text("ANALYZE transactions"))
+    await db.execute(text("ANALYZE student_collection_totals"))
+
+
+async def best_of(repeat: int, lookup, db, pairs) -> str:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            await lookup(db, pairs)
+        except Exception as e:
+            return f"fails ({type(e).__name__})"
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return f"{best * 1000:.1f} ms"
+
+
+async def run(payments: int, pairs: int, repeat: int) -> None:
+    init_db()
+    try:
+        async with get_sessionmaker()() as db:
+            await seed(db, payments, pairs)
+            print(f"{payments} payment rows, {pairs} (collection, student) pairs")
+            print(f"{'pairs':>8}  {'baseline':<28}  unnest join")
+            for size in SIZES:
+                step = max(pairs // size, 1)
+                requested = [
+                    (f"c{i // STUDENTS_PER_COLLECTION}", f"s{i}")
+                    for i in range(0, step * size, step)
+                ]
+                old = await best_of(repeat, baseline_totals, db, requested)
+                new = await best_of(
+                    repeat, student_collection_total_service.get_totals, db, requested
+                )
+                print(f"{size:>8}  {old:<28}  {new}")
+            await db.rollback()
+    finally:
+        await close_db()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--payments", type=int, default=1000000)
+    parser.add_argument("--pairs", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.payments, args.pairs, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
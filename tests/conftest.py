@@ -0,0 +1,88 @@
+"""
+The tests run against a real PostgreSQL database, given as an asyncpg URL in
+TEST_DATABASE_URL. Its public schema is dropped and recreated for every test,
+so never point it at a database you care about. Without it the database
+tests are skipped.
+
+    TEST_DATABASE_URL=postgresql+asyncpg://postgres@localhost/test pytest tests
+"""
+
+import os
+from collections import OrderedDict
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # Read by app.core.config at import time
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    os.environ.pop("DATABASE_READ_URL", None)
+
+from sqlalchemy import event  # noqa: E402
+
+import app.main  # noqa: E402,F401  registers all models
+from app.clients.object_store import LocalObjectStore  # noqa: E402
+from app.core import database  # noqa: E402
+from app.models import Base  # noqa: E402
+from app.services.partition_service import transaction_partition_service  # noqa: E402
+from app.services.transaction_archive_service import (  # noqa: E402
+    transaction_archive_service,
+)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def sessionmaker():
+    """Session factory on a freshly created schema."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    database.init_db()
+    async with database.engine.begin() as conn:
+        await conn.exec_driver_sql("DROP SCHEMA public CASCADE")
+        await conn.exec_driver_sql("CREATE SCHEMA public")
+        await conn.run_sync(Base.metadata.create_all)
+    async with database.get_sessionmaker()() as db:
+        await transaction_partition_service.ensure_partitions(db)
+        await db.commit()
+    try:
+        yield database.get_sessionmaker()
+    finally:
+        await database.close_db()
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    """The archive service on a local store in a temporary directory."""
+    monkeypatch.setattr(
+        transaction_archive_service, "_store", LocalObjectStore(str(tmp_path))
+    )
+    monkeypatch.setattr(transaction_archive_service, "_manifests", OrderedDict())
+    return transaction_archive_service
+
+
+class StatementCounter:
+    """Records every statement sent to the database."""
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def take(self) -> list[str]:
+        """Returns the statements recorded since the last call."""
+        statements, self.statements = self.statements, []
+        return statements
+
+
+@pytest.fixture
+def statements(sessionmaker):
+    counter = StatementCounter()
+    sync_engine = database.engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", counter._on_execute)
+    yield counter
+    event.remove(sync_engine, "before_cursor_execute", counter._on_execute)
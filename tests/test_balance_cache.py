@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+import pytest
+
+from app.schemas.transaction import (
+    TransactionDepositRequest,
+    TransactionPaymentRequest,
+)
+from app.services.account_service import account_service
+from app.services.balance_cache import balance_cache
+from app.services.collection_account_service import collection_account_service
+from app.services.transaction_service import transaction_service
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_replica_reads_are_not_cached(sessionmaker):
+    async with sessionmaker() as db:
+        await transaction_service.initiate_deposits_batch(
+            db, [("u1", TransactionDepositRequest(amount=Decimal("10.00")))]
+        )
+        await transaction_service.make_payment(
+            db,
+            "u1",
+            TransactionPaymentRequest(
+                amount=Decimal("4.00"), collection_id="c1", student_id="s1"
+            ),
+        )
+        await db.commit()
+    balance_cache.clear()
+
+    async with sessionmaker(info={"replica": True}) as db:
+        await account_service.get_account_details(db, "u1")
+        await collection_account_service.get_collection_account_details(db, "c1")
+    assert balance_cache.get("user", "u1") is None
+    assert balance_cache.get("collection", "c1") is None
+
+    async with sessionmaker() as db:
+        await account_service.get_account_details(db, "u1")
+        await collection_account_service.get_collection_account_details(db, "c1")
+    assert balance_cache.get("user", "u1").balance == Decimal("6.00")
+    assert balance_cache.get("collection", "c1").balance == Decimal("4.00")
@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+import pytest
+
+from app.models.bulk_refund import BulkRefundStatus
+from app.schemas.transaction import (
+    TransactionDepositRequest,
+    TransactionPaymentRequest,
+)
+from app.services.account_service import account_service
+from app.services.bulk_refund_service import bulk_refund_service
+from app.services.collection_account_service import collection_account_service
+from app.services.transaction_service import transaction_service
+
+pytestmark = pytest.mark.anyio
+
+
+async def pay(db, user_id, amount):
+    await transaction_service.make_payment(
+        db,
+        user_id,
+        TransactionPaymentRequest(
+            amount=Decimal(amount), collection_id="c1", student_id=user_id
+        ),
+    )
+
+
+async def test_refunds_current_nets_once(sessionmaker):
+    users = [f"u{i}" for i in range(5)]
+    async with sessionmaker() as db:
+        await transaction_service.initiate_deposits_batch(
+            db,
+            [(u, TransactionDepositRequest(amount=Decimal("100.00"))) for u in users],
+        )
+        for user_id in users[:4]:
+            await pay(db, user_id, "10.00")
+        await db.commit()
+
+    async with sessionmaker() as db:
+        job, created = await bulk_refund_service.create_job(db, "c1", chunk_size=2)
+        await db.commit()
+    assert created and job.total_items == 4
+
+    async with sessionmaker() as db:
+        # Refunded individually before the job reaches it
+        await transaction_service.process_refund(db, "u0", "c1", Decimal("10.00"))
+        await transaction_service.process_refund(db, "u1", "c1", Decimal("4.00"))
+        # Paid after the job was created
+        await pay(db, "u2", "5.00")
+        await pay(db, "u4", "7.00")
+        await db.commit()
+
+    job = await bulk_refund_service.run_job(job.id)
+    assert job.status == BulkRefundStatus.COMPLETED
+    assert job.refunded_items == 4
+    assert job.refunded_amount == Decimal("6.00") + 15 + 10 + 7
+
+    async with sessionmaker() as db:
+        assert await transaction_service.get_collection_net_payments(db, "c1") == {}
+        for user_id in users:
+            account = await account_service.get_account_details(db, user_id)
+            assert account.balance == Decimal("100.00")
+        collection = await collection_account_service.get_collection_account_details(
+            db, "c1"
+        )
+        assert collection.balance == 0
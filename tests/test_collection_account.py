@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.config import COLLECTION_ACCOUNT_SLOTS
+from app.models import CollectionAccountSlot
+from app.schemas.transaction import (
+    TransactionDepositRequest,
+    TransactionPaymentRequest,
+)
+from app.services.collection_account_service import collection_account_service
+from app.services.transaction_service import transaction_service
+
+pytestmark = pytest.mark.anyio
+
+
+async def pay(db, amount):
+    await transaction_service.make_payment(
+        db,
+        "u1",
+        TransactionPaymentRequest(
+            amount=Decimal(amount), collection_id="c1", student_id="s1"
+        ),
+    )
+
+
+async def test_striped_account_takes_slot_credits(sessionmaker):
+    assert COLLECTION_ACCOUNT_SLOTS == 0  # striped per account, not globally
+    async with sessionmaker() as db:
+        await transaction_service.initiate_deposits_batch(
+            db, [("u1", TransactionDepositRequest(amount=Decimal("100.00")))]
+        )
+        await pay(db, "10.00")
+        await collection_account_service.set_collection_slot_count(db, "c1", 4)
+        for _ in range(3):
+            await pay(db, "5.00")
+        await db.commit()
+
+        slot_balance = await db.scalar(select(func.sum(CollectionAccountSlot.balance)))
+        account = await collection_account_service.get_collection_account_details(
+            db, "c1"
+        )
+    assert slot_balance == Decimal("15.00")
+    assert account.balance == Decimal("25.00")
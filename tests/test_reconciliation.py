@@ -0,0 +1,51 @@
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.schemas.transaction import TransactionDepositRequest
+from app.services.partition_service import LOCK_KEY
+from app.services.reconciliation_service import reconciliation_service
+from app.services.transaction_service import transaction_service
+
+pytestmark = pytest.mark.anyio
+
+
+async def try_partition_lock(sessionmaker) -> bool:
+    async with sessionmaker() as db:
+        return await db.scalar(text(f"SELECT pg_try_advisory_xact_lock({LOCK_KEY})"))
+
+
+async def test_holds_partition_lock_from_before_snapshot(sessionmaker, monkeypatch):
+    async with sessionmaker() as db:
+        await transaction_service.initiate_deposits_batch(
+            db, [("u1", TransactionDepositRequest(amount=Decimal("10.00")))]
+        )
+        await db.commit()
+
+    seen = {}
+    add_hot_moves = reconciliation_service._add_hot_moves
+
+    async def checked(db, since, checkpoint):
+        seen["isolation"] = await db.scalar(
+            text("SELECT current_setting('transaction_isolation')")
+        )
+        seen["archiver_blocked"] = not await try_partition_lock(sessionmaker)
+        await add_hot_moves(db, since, checkpoint)
+
+    monkeypatch.setattr(reconciliation_service, "_add_hot_moves", checked)
+    report = await reconciliation_service.reconcile(full=True)
+
+    assert seen == {"isolation": "repeatable read", "archiver_blocked": True}
+    assert report.mismatch_count == 0 and report.transactions_checked == 1
+    assert await try_partition_lock(sessionmaker)
+
+
+async def test_require_snapshot_refuses_first_run(sessionmaker):
+    with pytest.raises(HTTPException) as exc:
+        await reconciliation_service.reconcile(require_snapshot=True)
+    assert exc.value.status_code == 409
+    await reconciliation_service.reconcile()
+    report = await reconciliation_service.reconcile(require_snapshot=True)
+    assert report.base_checkpoint is not None
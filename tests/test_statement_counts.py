@@ -0,0 +1,100 @@
+"""
+Statement budgets of the write paths. Each operation is sent as a fixed
+number of statements (its SAVEPOINT/RELEASE included), whatever the
+account's history; a change here means a round trip was added or removed.
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from app.schemas.transaction import (
+    TransactionDepositRequest,
+    TransactionPaymentRequest,
+    TransactionWithdrawalRequest,
+)
+from app.services.transaction_service import transaction_service
+
+pytestmark = pytest.mark.anyio
+
+
+def summary(statements: list[str]) -> list[str]:
+    """First three words of each statement, without savepoints."""
+    return [
+        " ".join(s.split()[:3])
+        for s in statements
+        if not s.startswith(("SAVEPOINT", "RELEASE"))
+    ]
+
+
+async def test_write_path_statement_counts(sessionmaker, statements):
+    async with sessionmaker() as db:
+        await transaction_service.initiate_deposit(
+            db, "u1", TransactionDepositRequest(amount=Decimal("100"))
+        )
+        await db.commit()
+        statements.take()
+
+        # Existing account: one upsert, the row and its outbox event
+        await transaction_service.initiate_deposit(
+            db, "u1", TransactionDepositRequest(amount=Decimal("50"))
+        )
+        taken = statements.take()
+        assert summary(taken) == [
+            "INSERT INTO accounts",
+            "INSERT INTO transactions",
+            "INSERT INTO outbox",
+        ]
+        assert len(taken) == 5
+        await db.commit()
+        statements.take()
+
+        payment = await transaction_service.make_payment(
+            db,
+            "u1",
+            TransactionPaymentRequest(
+                amount=Decimal("10"), collection_id="c1", student_id="s1"
+            ),
+        )
+        taken = statements.take()
+        # The slot credit finds no striped account, so the account row takes it
+        assert summary(taken) == [
+            "UPDATE accounts SET",
+            "INSERT INTO collection_account_slots",
+            "INSERT INTO collection_accounts",
+            "INSERT INTO transactions",
+            "INSERT INTO outbox",
+            "INSERT INTO student_collection_totals",
+            "WITH seen AS",
+        ]
+        assert len(taken) == 9
+        assert payment.amount == Decimal("10")
+        await db.commit()
+        statements.take()
+
+        refund = await transaction_service.process_refund(db, "u1", "c1", Decimal("5"))
+        taken = statements.take()
+        assert summary(taken) == [
+            "UPDATE collection_accounts SET",
+            "UPDATE accounts SET",
+            "INSERT INTO transactions",
+            "INSERT INTO outbox",
+            "WITH seen AS",
+        ]
+        assert len(taken) == 7
+        assert refund.amount == Decimal("5")
+        await db.commit()
+        statements.take()
+
+        withdrawal = await transaction_service.initiate_withdrawal(
+            db, "u1", TransactionWithdrawalRequest(amount=Decimal("3"))
+        )
+        taken = statements.take()
+        assert summary(taken) == [
+            "UPDATE accounts SET",
+            "INSERT INTO transactions",
+            "INSERT INTO outbox",
+        ]
+        assert len(taken) == 5
+        assert withdrawal.amount == Decimal("3")
+        await db.commit()
@@ -0,0 +1,89 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.models import Account, StudentCollectionTotal, Transaction
+from app.models.transaction import TransactionStatus, TransactionType
+from app.services.partition_service import (
+    add_months,
+    month_start,
+    transaction_partition_service,
+)
+from app.services.student_collection_total_service import (
+    student_collection_total_service,
+)
+from app.services.transaction_archive_service import month_bounds
+
+pytestmark = pytest.mark.anyio
+
+
+def row(account_id, timestamp, type, status, amount, **kwargs):
+    return dict(
+        id=uuid.uuid4(),
+        account_id=account_id,
+        type=type,
+        status=status,
+        amount=Decimal(amount),
+        timestamp=timestamp,
+        **kwargs,
+    )
+
+
+async def test_archived_payments_count_towards_totals(sessionmaker, archive):
+    this_month = month_start(datetime.now(timezone.utc).date())
+    old_month = add_months(this_month, -3)
+    pending_month = add_months(this_month, -2)
+    async with sessionmaker() as db:
+        await transaction_partition_service.ensure_partitions(
+            db, months_ahead=4, today=old_month
+        )
+        account_id = await db.scalar(
+            insert(Account).values(user_id="u1", balance=0).returning(Account.id)
+        )
+        payment = dict(collection_id="c1", student_id="s1")
+        await db.execute(
+            insert(Transaction),
+            [
+                row(
+                    account_id,
+                    month_bounds(old_month)[0] + timedelta(days=1),
+                    TransactionType.PAYMENT,
+                    TransactionStatus.COMPLETED,
+                    "10.00",
+                    **payment,
+                ),
+                row(
+                    account_id,
+                    month_bounds(pending_month)[0] + timedelta(days=1),
+                    TransactionType.WITHDRAWAL,
+                    TransactionStatus.PENDING,
+                    "1.00",
+                ),
+                row(
+                    account_id,
+                    datetime.now(timezone.utc),
+                    TransactionType.PAYMENT,
+                    TransactionStatus.COMPLETED,
+                    "5.00",
+                    **payment,
+                ),
+            ],
+        )
+        await db.commit()
+
+    async with sessionmaker() as db:
+        assert await archive.archive_month(db, old_month) is not None
+        # Its withdrawal has not been paid out yet
+        assert await archive.archive_month(db, pending_month) is None
+        await db.commit()
+
+    async with sessionmaker() as db:
+        await student_collection_total_service.rebuild(db)
+        await db.commit()
+    async with sessionmaker() as db:
+        total = await db.scalar(select(StudentCollectionTotal.total_paid))
+        assert total == Decimal("15.00")
+        assert await student_collection_total_service.verify(db) == []
@@ -0,0 +1,123 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import delete, insert, select, update
+
+from app.models import (
+    Account,
+    Transaction,
+    TransactionArchiveAccount,
+    TransactionArchiveSegment,
+)
+from app.models.transaction import TransactionStatus, TransactionType
+from app.services.partition_service import (
+    add_months,
+    month_start,
+    transaction_partition_service,
+)
+from app.services.transaction_archive_service import month_bounds
+from app.services.transaction_service import transaction_service
+
+pytestmark = pytest.mark.anyio
+
+
+class CountingStore:
+    def __init__(self, store):
+        self.store = store
+        self.gets = 0
+
+    async def put(self, key, data):
+        await self.store.put(key, data)
+
+    async def get(self, key, offset=0, length=None):
+        self.gets += 1
+        return await self.store.get(key, offset=offset, length=length)
+
+
+def deposit(account_id, timestamp, amount="1.00"):
+    return dict(
+        id=uuid.uuid4(),
+        account_id=account_id,
+        type=TransactionType.DEPOSIT,
+        status=TransactionStatus.COMPLETED,
+        amount=Decimal(amount),
+        timestamp=timestamp,
+    )
+
+
+@pytest.fixture
+async def archived_month(sessionmaker, archive):
+    """u1 has rows in an archived month and this month; u2 only this month."""
+    this_month = month_start(datetime.now(timezone.utc).date())
+    old_month = add_months(this_month, -3)
+    async with sessionmaker() as db:
+        await transaction_partition_service.ensure_partitions(
+            db, months_ahead=4, today=old_month
+        )
+        accounts = {}
+        for user_id in ("u1", "u2"):
+            accounts[user_id] = await db.scalar(
+                insert(Account).values(user_id=user_id, balance=0).returning(Account.id)
+            )
+        old = month_bounds(old_month)[0] + timedelta(days=1)
+        now = datetime.now(timezone.utc)
+        await db.execute(
+            insert(Transaction),
+            [
+                deposit(accounts["u1"], old),
+                deposit(accounts["u1"], old + timedelta(hours=1)),
+                deposit(accounts["u1"], now),
+                deposit(accounts["u2"], now),
+            ],
+        )
+        await db.commit()
+    async with sessionmaker() as db:
+        await archive.archive_month(db, old_month)
+        await db.commit()
+    archive._store = CountingStore(archive.store)
+    return old_month, accounts
+
+
+async def test_account_without_archived_rows_skips_the_store(
+    sessionmaker, archive, archived_month
+):
+    async with sessionmaker() as db:
+        page = await transaction_service.get_user_transactions(db, "u2")
+        assert len(page) == 1
+        assert archive.store.gets == 0
+
+        page = await transaction_service.get_user_transactions(db, "u1")
+        assert len(page) == 3
+        assert archive.store.gets > 0
+
+
+async def test_segments_archived_before_the_index_are_backfilled(
+    sessionmaker, archive, archived_month
+):
+    month, accounts = archived_month
+    async with sessionmaker() as db:
+        await db.execute(delete(TransactionArchiveAccount))
+        await db.execute(
+            update(TransactionArchiveSegment).values(accounts_indexed=False)
+        )
+        await db.commit()
+
+    async with sessionmaker() as db:
+        # Not indexed yet: the segment is read for every account
+        assert len(await transaction_service.get_user_transactions(db, "u2")) == 1
+        assert archive.store.gets > 0
+
+    assert await archive.index_archived_accounts() == 1
+    async with sessionmaker() as db:
+        indexed = (
+            await db.execute(
+                select(
+                    TransactionArchiveAccount.account_id,
+                    TransactionArchiveAccount.month,
+                    TransactionArchiveAccount.row_count,
+                )
+            )
+        ).all()
+        assert indexed == [(accounts["u1"], month, 2)]
@@ -0,0 +1,70 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.clients.user_service_api import CircuitBreaker, UserServiceClient
+
+pytestmark = pytest.mark.anyio
+
+
+def make_client(handler) -> UserServiceClient:
+    """Client whose breaker opens on the first failure and retries at once."""
+    client = UserServiceClient()
+    client._breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    client._client = httpx.AsyncClient(
+        base_url="http://users", transport=httpx.MockTransport(handler)
+    )
+    return client
+
+
+async def open_breaker(client: UserServiceClient):
+    with pytest.raises(HTTPException):
+        await client._fetch_children("p1", "Bearer t")
+    assert client._breaker._opened_at is not None
+
+
+async def test_unexpected_error_in_trial_call_releases_the_trial():
+    responses = [
+        httpx.Response(500),
+        httpx.Response(200, text="not json"),
+        httpx.Response(200, json=[{"id": "c1"}]),
+    ]
+    client = make_client(lambda request: responses.pop(0))
+    await open_breaker(client)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await client._fetch_children("p1", "Bearer t")
+    assert exc_info.value.status_code == 500
+    assert not client._breaker._trial_in_progress
+
+    assert await client._fetch_children("p1", "Bearer t") == ["c1"]
+    assert client._breaker._opened_at is None
+
+
+async def test_cancelled_trial_call_releases_the_trial():
+    hang = asyncio.Event()
+    calls = 0
+
+    async def handler(request):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            return httpx.Response(503)
+        if calls == 2:
+            await hang.wait()
+        return httpx.Response(200, json=[{"id": "c1"}])
+
+    client = make_client(handler)
+    await open_breaker(client)
+
+    trial = asyncio.create_task(client._fetch_children("p1", "Bearer t"))
+    while calls < 2:
+        await asyncio.sleep(0)
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+    assert not client._breaker._trial_in_progress
+
+    assert await client._fetch_children("p1", "Bearer t") == ["c1"]
@@ -0,0 +1,111 @@
+import random
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.models import Account, Transaction
+from app.models.transaction import TransactionStatus, TransactionType
+from app.schemas.transaction import (
+    TransactionDepositRequest,
+    TransactionWithdrawalRequest,
+)
+from app.services.transaction_service import transaction_service
+from app.workers.payout_providers import FakePayoutProvider
+from app.workers import withdrawal_processor
+from app.workers.withdrawal_processor import (
+    WithdrawalProcessor,
+    create_payout_provider,
+)
+
+pytestmark = pytest.mark.anyio
+
+USERS = ["u1", "u2", "u3"]
+
+
+async def request_withdrawals(sessionmaker) -> None:
+    """100.00 deposited and 1.00 + 2.00 + ... + 5.00 requested per user."""
+    async with sessionmaker() as db:
+        for user_id in USERS:
+            await transaction_service.initiate_deposit(
+                db, user_id, TransactionDepositRequest(amount=Decimal("100"))
+            )
+            for amount in range(1, 6):
+                await transaction_service.initiate_withdrawal(
+                    db, user_id, TransactionWithdrawalRequest(amount=Decimal(amount))
+                )
+        await db.commit()
+
+
+async def withdrawals_and_balances(sessionmaker):
+    async with sessionmaker() as db:
+        withdrawals = (
+            await db.execute(
+                select(Account.user_id, Transaction.amount, Transaction.status)
+                .join(Account, Account.id == Transaction.account_id)
+                .where(Transaction.type == TransactionType.WITHDRAWAL)
+            )
+        ).all()
+        balances = dict(
+            (await db.execute(select(Account.user_id, Account.balance))).all()
+        )
+    return withdrawals, balances
+
+
+async def test_process_batch_settles_and_restores_failed(sessionmaker):
+    await request_withdrawals(sessionmaker)
+    random.seed(7)
+    processor = WithdrawalProcessor(
+        FakePayoutProvider(latency=0, failure_rate=0.4), batch_size=100
+    )
+
+    assert await processor.process_batch() == 15
+    assert await processor.process_batch() == 0
+
+    withdrawals, balances = await withdrawals_and_balances(sessionmaker)
+    statuses = [status for _, _, status in withdrawals]
+    assert statuses.count(TransactionStatus.COMPLETED) > 0
+    assert statuses.count(TransactionStatus.FAILED) > 0
+    assert (
+        statuses.count(TransactionStatus.COMPLETED)
+        + statuses.count(TransactionStatus.FAILED)
+        == 15
+    )
+    for user_id in USERS:
+        paid_out = sum(
+            amount
+            for owner, amount, status in withdrawals
+            if owner == user_id and status == TransactionStatus.COMPLETED
+        )
+        # Failed withdrawals gave their amount back
+        assert balances[user_id] == Decimal("100.00") - paid_out
+
+
+async def test_unknown_outcome_stays_pending_and_claimed(sessionmaker):
+    await request_withdrawals(sessionmaker)
+    processor = WithdrawalProcessor(
+        FakePayoutProvider(latency=0, error_rate=1), batch_size=100
+    )
+
+    assert await processor.process_batch() == 0
+    # Still leased to the first attempt, so not submitted again yet
+    processor.provider = FakePayoutProvider(latency=0)
+    assert await processor.process_batch() == 0
+
+    withdrawals, balances = await withdrawals_and_balances(sessionmaker)
+    assert {status for _, _, status in withdrawals} == {TransactionStatus.PENDING}
+    assert set(balances.values()) == {Decimal("85.00")}
+
+    # Once the lease has expired they are paid out
+    async with sessionmaker() as db:
+        await db.execute(
+            Transaction.__table__.update().values(payout_claimed_until=None)
+        )
+        await db.commit()
+    assert await processor.process_batch() == 15
+
+
+def test_payout_provider_must_be_set(monkeypatch):
+    monkeypatch.setattr(withdrawal_processor, "PAYOUT_PROVIDER", None)
+    with pytest.raises(ValueError):
+        create_payout_provider()